@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +53,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'meetings.replicas.ReplicaStickinessMiddleware',
+    'meetings.datetimes.TimeZoneMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,12 +87,52 @@ WSGI_APPLICATION = 'calendy.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# The primary & its read replicas are configured from the environment, i.e. DB_ENGINE, DB_NAME, DB_HOST ...
+# DB_REPLICAS lists the replicas, comma separated: SQLite files, or hosts serving DB_NAME for other engines
+
+def _database(**overrides):
+    config = {
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        # seconds a connection is reused by the following requests of the same thread, 0 closes it every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # server side cursors don't survive a transaction pooler such as PgBouncer, DB_POOLER=transaction
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_POOLER') == 'transaction',
     }
+    config.update(overrides)
+    return config
+
+
+DATABASES = {
+    # file based test database, in-memory SQLite locks whole tables across threads
+    'default': _database(TEST={'NAME': BASE_DIR / 'test_db.sqlite3'}),
+}
+REPLICA_DATABASES = []
+for _index, _replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(','))):
+    _location = {'NAME': _replica} if DATABASES['default']['ENGINE'].endswith('sqlite3') else {'HOST': _replica}
+    DATABASES[f'replica_{_index}'] = _database(TEST={'MIRROR': 'default'}, **_location)
+    REPLICA_DATABASES.append(f'replica_{_index}')
+
+# SQLite profile, see meetings.sqlite: pragmas of every new connection & write paths serialized in-process,
+# retried with an exponential backoff (seconds) while another process writes
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
 }
+SQLITE_SERIALIZE_WRITES = True
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF = 0.05
+
+# Reads go to the replicas, writes & mutations to the primary, see meetings.replicas
+DATABASE_ROUTERS = ['meetings.replicas.ReplicaRouter']
+# Seconds a client reads from the primary after writing, should cover the replication lag
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
 
 
 # Password validation
@@ -138,3 +181,57 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 GRAPHENE = {
     "SCHEMA": "meetings.schema.schema"
 }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Guest listings response cache, see meetings.cache
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 30
+
+# Per-owner schedules validating writes & serving availability and myMeetings, see meetings.schedule_cache.
+# Point it at a cache shared by every process (Memcached, Redis) when running several of them
+SCHEDULE_CACHE_ALIAS = 'default'
+SCHEDULE_CACHE_TIMEOUT = 600
+
+# Parsed & validated GraphQL documents kept in memory, Automatic Persisted Queries lifetime (None: forever)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 512
+PERSISTED_QUERY_TIMEOUT = None
+
+# Queries over these limits are rejected before execution, see meetings.cost
+GRAPHQL_QUERY_LIMITS = {
+    'MAX_DEPTH': 10,
+    'MAX_ALIASES': 20,
+    'MAX_COST': 5000,
+}
+GRAPHQL_FIELD_COSTS = {
+    'MeetingType.owner': 1,
+    'Query.availability': 10,
+    'Query.commonAvailability': 25,
+    'Mutation.createSchedule': 100,
+    'Mutation.batchMeetings': 100,
+}
+
+# Per-resolver & SQL timings in `extensions.tracing` (Apollo tracing format) and in the /graphql/metrics
+# histograms, leave disabled when not profiling, see meetings.tracing
+GRAPHQL_TRACING = False
+# clients allowed to read /graphql/metrics besides staff users, i.e the Prometheus scraper
+GRAPHQL_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Threads running resolvers of the async GraphQL endpoint
+GRAPHQL_ASYNC_WORKERS = 8
+
+# Seconds a guest holds a meeting through holdMeeting before it's released, see release_holds
+MEETING_HOLD_TTL = 120
+
+# Days finished meetings stay in the meeting table before archive_meetings moves them out, see meetings.archive
+MEETING_RETENTION_DAYS = 90
+
+# Signed auth tokens, see meetings.auth. Users are cached AUTH_TOKEN_CACHE_TTL seconds in each process, other
+# processes keep accepting the tokens of a user deactivated or whose password changed for that long at most
+AUTH_TOKEN_MAX_AGE = 60 * 60 * 24 * 7
+AUTH_TOKEN_CACHE_SIZE = 1024
+AUTH_TOKEN_CACHE_TTL = 60
@@ -17,10 +17,14 @@ from django.urls import path
 from django.contrib import admin
 from django.views.decorators.csrf import csrf_exempt
 
-from graphene_django.views import GraphQLView
+from meetings.views import MeetingsGraphQLView, async_graphql_view, cache_stats, metrics, export_meetings
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql', csrf_exempt(MeetingsGraphQLView.as_view(graphiql=True))),
+    path('graphql-async', async_graphql_view),
+    path('graphql/cache-stats', cache_stats),
+    path('graphql/metrics', metrics),
+    path('meetings/export', export_meetings),
 ]
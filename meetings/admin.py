@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Meeting
+from .models import Meeting, MeetingHold, ArchivedMeeting
 
 
 admin.site.register(Meeting)
+admin.site.register(MeetingHold)
+admin.site.register(ArchivedMeeting)
@@ -0,0 +1,97 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from .models import Meeting, ArchivedMeeting
+from .cache import invalidate_owner
+from .sqlite import serialized_write
+from .constants import ARCHIVE_BATCH_SIZE
+
+ARCHIVED_FIELDS = ('id', 'created_by_id', 'title', 'start_time', 'end_time', 'slot_duration_in_minutes',
+                   'reserver_name', 'reserver_email', 'reserved_at')
+
+
+def retention_horizon(days=None):
+    """
+    meetings ending before it are archived, MEETING_RETENTION_DAYS ago by default
+    """
+
+    return timezone.now() - timedelta(days=settings.MEETING_RETENTION_DAYS if days is None else days)
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class NDJSONArchive:
+    """
+    gzip compressed NDJSON file the archived meetings are appended to, one meeting per line
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, rows):
+        with gzip.open(self.path, 'at', encoding='utf-8') as archive:
+            archive.writelines(json.dumps({field: _plain(row[field]) for field in ARCHIVED_FIELDS}) + '\n'
+                               for row in rows)
+
+
+class TableArchive:
+    """
+    the ArchivedMeeting table, the archived meetings stay readable through `includeArchived`
+    """
+
+    def write(self, rows):
+        ArchivedMeeting.objects.bulk_create([ArchivedMeeting(**row) for row in rows], ignore_conflicts=True)
+
+
+@serialized_write
+def _archive_batch(before, batch_size, destination):
+    """
+    move the oldest `batch_size` finished meetings, in a transaction of its own so locks are held for one
+    batch only. Rows are written to a file before they're deleted, a failure repeats them in the file
+
+    :returns: (int) number of archived meetings
+    """
+
+    with transaction.atomic():
+        # ending before the horizon implies starting before it, the (start_time, id) index bounds the scan
+        rows = list(Meeting.objects.filter(start_time__lt=before, end_time__lt=before)
+                    .order_by('start_time', 'id').values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        destination.write(rows)
+        Meeting.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        owners = {row['created_by_id'] for row in rows}
+        for owner in get_user_model().objects.filter(id__in=owners).only('username', 'first_name', 'last_name'):
+            invalidate_owner(owner)
+    return len(rows)
+
+
+def archive_meetings(before=None, batch_size=ARCHIVE_BATCH_SIZE, path=None, progress=None):
+    """
+    move the meetings ending before given time out of the meeting table, `batch_size` at a time, into the
+    ArchivedMeeting table or appended to the compressed NDJSON file at `path`
+
+    :param before: (datetime) retention horizon, see `retention_horizon`
+    :param progress: (callable) called with the number of meetings archived so far after each batch
+
+    :returns: (int) number of archived meetings
+    """
+
+    before = before or retention_horizon()
+    destination = NDJSONArchive(path) if path else TableArchive()
+    archived = 0
+    while True:
+        moved = _archive_batch(before, batch_size, destination)
+        if not moved:
+            return archived
+        archived += moved
+        if progress:
+            progress(archived)
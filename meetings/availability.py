@@ -0,0 +1,86 @@
+from heapq import merge
+from datetime import timedelta
+
+from graphql import GraphQLError
+from django.contrib.auth import get_user_model
+
+from .schedule_cache import owner_schedules
+
+
+def free_gaps(busy, start_time, end_time, duration):
+    """
+    linear sweep over busy intervals sorted by start, returning the gaps of [start_time, end_time) at least
+    `duration` long that none of them cover, busy intervals may overlap each other
+
+    :param busy: iterable of (start, end) tuples sorted by start
+    :param duration: (timedelta) minimum length of a gap
+
+    :returns: (list) (start, end) tuples of the free gaps
+    """
+
+    gaps = []
+    free_from = start_time
+    for busy_start, busy_end in busy:
+        if busy_start >= end_time:
+            break
+        if busy_start - free_from >= duration:
+            gaps.append((free_from, busy_start))
+        free_from = max(free_from, busy_end)
+    if end_time - free_from >= duration:
+        gaps.append((free_from, end_time))
+    return gaps
+
+
+def busy_intervals(owner_ids, start_time, end_time):
+    """
+    the meetings of every given owner overlapping [start_time, end_time), read from their cached schedules,
+    the schedules missing from the cache are loaded with one query
+
+    :returns: (dict) owner ID -> list of (start, end) tuples sorted by start
+    """
+
+    schedules = owner_schedules(owner_ids)
+    return {owner_id: schedules[owner_id].busy(start_time, end_time) for owner_id in owner_ids}
+
+
+def _owner_ids(usernames):
+    owners = dict(get_user_model().objects.filter(username__in=usernames).values_list('username', 'id'))
+    missing = [username for username in usernames if username not in owners]
+    if missing:
+        raise GraphQLError(f'No user found matching the given username: {", ".join(missing)}')
+    return [owners[username] for username in usernames]
+
+
+def _validate_range(start_time, end_time, duration_in_minutes):
+    if start_time >= end_time:
+        raise GraphQLError('End time should be after the start time')
+    if duration_in_minutes <= 0:
+        raise GraphQLError('Duration should be a positive number of minutes')
+    return timedelta(minutes=duration_in_minutes)
+
+
+def availability(owner, start_time, end_time, duration_in_minutes):
+    """
+    free intervals of the owner between start_time & end_time lasting at least `duration_in_minutes`
+
+    :param owner: (str) username of the host
+    :returns: (list) (start, end) tuples
+    """
+
+    duration = _validate_range(start_time, end_time, duration_in_minutes)
+    owner_id, = _owner_ids([owner])
+    return free_gaps(busy_intervals([owner_id], start_time, end_time)[owner_id], start_time, end_time, duration)
+
+
+def common_availability(owners, start_time, end_time, duration_in_minutes):
+    """
+    intervals where every given owner is free, the owners' sorted meetings are k-way merged through a heap
+    into a single sorted stream that one sweep turns into common gaps
+
+    :param owners: (list) usernames of the hosts
+    :returns: (list) (start, end) tuples
+    """
+
+    duration = _validate_range(start_time, end_time, duration_in_minutes)
+    intervals = busy_intervals(_owner_ids(list(dict.fromkeys(owners))), start_time, end_time)
+    return free_gaps(merge(*intervals.values()), start_time, end_time, duration)
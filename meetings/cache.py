@@ -0,0 +1,167 @@
+import json
+from time import time_ns
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import caches
+from graphql.execution import ExecutionResult
+from graphql.language.ast import Field, OperationDefinition, Variable
+from graphql.language.printer import print_ast
+
+from .schedule_cache import invalidate_schedule
+
+# entries hold the data & extensions of a response
+RESPONSE_KEY = 'meetings:response:v2:{}'
+VERSION_KEY = 'meetings:response-version:{}'
+ALL_MEETINGS_SCOPE = 'all'
+
+# guest root fields whose response can be cached, listing every meeting or the meetings of one owner
+CACHEABLE_FIELDS = {'allMeetings', 'bookableMeetings', 'meetingsByOwner'}
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = Lock()
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def response_cache_stats():
+    """
+    hit & miss counters of the response cache in this process
+    """
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def owner_scope(name):
+    return f'owner:{name.casefold()}'
+
+
+def _operation(document_ast, operation_name):
+    operations = [definition for definition in document_ast.definitions
+                  if isinstance(definition, OperationDefinition)]
+    if operation_name:
+        operations = [operation for operation in operations
+                      if operation.name and operation.name.value == operation_name]
+    return operations[0] if len(operations) == 1 else None
+
+
+def _argument(field, name, variables):
+    for argument in field.arguments:
+        if argument.name.value == name:
+            if isinstance(argument.value, Variable):
+                return (variables or {}).get(argument.value.name.value)
+            return getattr(argument.value, 'value', None)
+    return None
+
+
+def cache_scopes(document_ast, operation_name, variables):
+    """
+    scopes whose writes invalidate the response of the operation, `all` for listings across owners &
+    `owner:<name>` for meetingsByOwner
+
+    :returns: (list) sorted scopes or None when the operation can't be cached
+    """
+
+    operation = _operation(document_ast, operation_name)
+    if operation is None or operation.operation != 'query':
+        return None
+
+    scopes = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, Field):
+            return None
+        name = selection.name.value
+        if name == '__typename':
+            continue
+        if name not in CACHEABLE_FIELDS:
+            return None
+        if name == 'meetingsByOwner':
+            user_name = _argument(selection, 'userName', variables)
+            if not isinstance(user_name, str):
+                return None
+            scopes.add(owner_scope(user_name))
+        else:
+            scopes.add(ALL_MEETINGS_SCOPE)
+    return sorted(scopes) or None
+
+
+def _versions(scopes):
+    """
+    current version of every scope, a scope without version gets a fresh one
+    """
+
+    cache = _cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def response_cache_key(document, operation_name, variables):
+    """
+    cache key of the operation's response, built from the normalized document, the variables & the
+    current version of its scopes, so bumping a scope's version invalidates every response depending on it
+
+    :param document: (GraphQLDocument) parsed query, normalized once by the ValidatedDocumentBackend
+
+    :returns: (str) cache key or None when the operation can't be cached
+    """
+
+    scopes = cache_scopes(document.document_ast, operation_name, variables)
+    if scopes is None:
+        return None
+    normalized_query = getattr(document, 'normalized_query', None) or print_ast(document.document_ast)
+    payload = json.dumps([normalized_query, operation_name, variables or {}, scopes, _versions(scopes)],
+                         sort_keys=True, default=str)
+    return RESPONSE_KEY.format(sha256(payload.encode()).hexdigest())
+
+
+def get_cached_response(key):
+    """
+    :returns: (ExecutionResult) the cached result with its data & extensions, i.e the query cost, None on a miss
+    """
+
+    cached = _cache().get(key)
+    _count('misses' if cached is None else 'hits')
+    if cached is None:
+        return None
+    return ExecutionResult(data=cached['data'], extensions=cached['extensions'])
+
+
+def cache_response(key, result):
+    """
+    cache the data & extensions of an executed result, before the per request tracing is added to them
+    """
+
+    _cache().set(key, {'data': result.data, 'extensions': result.extensions}, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def invalidate_owner(user, schedule=None):
+    """
+    drop every cached response listing meetings of given user & bump the version of its schedule, called by
+    every write path once the write is committed so a concurrent read can't cache the old state again
+
+    :param schedule: (OwnerSchedule) the user's schedule, already updated with the write
+    """
+
+    scopes = {ALL_MEETINGS_SCOPE}
+    scopes.update(owner_scope(name) for name in (user.username, user.first_name, user.last_name) if name)
+
+    def bump_versions():
+        _cache().set_many({VERSION_KEY.format(scope): time_ns() for scope in scopes}, None)
+
+    transaction.on_commit(bump_versions)
+    invalidate_schedule(user.pk, schedule)
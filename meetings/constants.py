@@ -1,3 +1,14 @@
 
 EMAIL_REGEX = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
 
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+MAX_SCHEDULE_SLOTS = 10000
+SCHEDULE_BATCH_SIZE = 500
+MAX_BATCH_OPERATIONS = 100
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 5000
+ARCHIVE_BATCH_SIZE = 1000
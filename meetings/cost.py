@@ -0,0 +1,137 @@
+from django.conf import settings
+from graphql import GraphQLError
+from graphql.language.ast import Field, FragmentSpread, OperationDefinition, Variable
+from graphql.type.definition import GraphQLList, GraphQLNonNull, GraphQLObjectType, get_named_type
+
+from .constants import DEFAULT_PAGE_SIZE
+
+# size assumed for plain list fields, connections use their `first`/`last` argument instead
+DEFAULT_LIST_SIZE = 10
+
+
+def _is_list(field_type):
+    if isinstance(field_type, GraphQLNonNull):
+        field_type = field_type.of_type
+    return isinstance(field_type, GraphQLList)
+
+
+def _is_connection(named_type):
+    return isinstance(named_type, GraphQLObjectType) and 'edges' in named_type.fields \
+        and 'pageInfo' in named_type.fields
+
+
+class QueryCost:
+    """
+    Static cost of an operation, computed from the document & variables before any resolver runs.
+
+    Object fields cost 1 and scalars 0 unless GRAPHQL_FIELD_COSTS says otherwise, the edges of a connection
+    are multiplied by the requested page size & other list fields by DEFAULT_LIST_SIZE
+    """
+
+    def __init__(self, schema, fragments, variables):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+        self.field_costs = settings.GRAPHQL_FIELD_COSTS
+        self.depth = 0
+        self.aliases = 0
+
+    def _argument(self, field_ast, name):
+        for argument in field_ast.arguments:
+            if argument.name.value == name:
+                if isinstance(argument.value, Variable):
+                    return self.variables.get(argument.value.name.value)
+                return int(argument.value.value)
+        return None
+
+    def _page_size(self, field_ast):
+        size = self._argument(field_ast, 'first')
+        if size is None:
+            size = self._argument(field_ast, 'last')
+        return max(size, 0) if isinstance(size, int) else DEFAULT_PAGE_SIZE
+
+    def _fields(self, parent_type, selection_set):
+        """
+        yield (parent type, field AST) of a selection set, expanding fragments
+        """
+
+        for selection in selection_set.selections:
+            if isinstance(selection, Field):
+                yield parent_type, selection
+            else:
+                if isinstance(selection, FragmentSpread):
+                    fragment = self.fragments[selection.name.value]
+                else:
+                    fragment = selection
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value) \
+                    if fragment.type_condition else parent_type
+                yield from self._fields(fragment_type, fragment.selection_set)
+
+    def selection_cost(self, parent_type, selection_set, depth, page_size=None):
+        cost = 0
+        for field_type, field_ast in self._fields(parent_type, selection_set):
+            cost += self.field_cost(field_type, field_ast, depth, page_size)
+        return cost
+
+    def field_cost(self, parent_type, field_ast, depth, page_size=None):
+        name = field_ast.name.value
+        if name.startswith('__'):
+            return 0
+        if field_ast.alias:
+            self.aliases += 1
+        self.depth = max(self.depth, depth)
+
+        field = parent_type.fields[name]
+        named_type = get_named_type(field.type)
+        cost = self.field_costs.get(f'{parent_type.name}.{name}',
+                                    1 if isinstance(named_type, GraphQLObjectType) else 0)
+        if not field_ast.selection_set:
+            return cost
+
+        if _is_connection(named_type):
+            return cost + self.selection_cost(named_type, field_ast.selection_set, depth + 1,
+                                              self._page_size(field_ast))
+        children = self.selection_cost(named_type, field_ast.selection_set, depth + 1)
+        if _is_list(field.type):
+            return (DEFAULT_LIST_SIZE if page_size is None else page_size) * (cost + children)
+        return cost + children
+
+
+def _operation(document_ast, operation_name):
+    for definition in document_ast.definitions:
+        if isinstance(definition, OperationDefinition) and \
+                (operation_name is None or (definition.name and definition.name.value == operation_name)):
+            return definition
+    return None
+
+
+def analyze_query_cost(schema, document_ast, operation_name=None, variables=None):
+    """
+    compute the cost, depth & alias count of the operation and reject it when it's over the limits
+    of GRAPHQL_QUERY_LIMITS
+
+    :returns: (dict) {'cost': int, 'depth': int, 'aliases': int, 'maxCost': int}
+    """
+
+    operation = _operation(document_ast, operation_name)
+    if operation is None:
+        return None
+
+    root_type = {'query': schema.get_query_type(), 'mutation': schema.get_mutation_type()}.get(operation.operation)
+    if root_type is None:
+        return None
+
+    fragments = {definition.name.value: definition for definition in document_ast.definitions
+                 if not isinstance(definition, OperationDefinition)}
+    analysis = QueryCost(schema, fragments, variables)
+    cost = analysis.selection_cost(root_type, operation.selection_set, 1)
+    limits = settings.GRAPHQL_QUERY_LIMITS
+
+    if analysis.depth > limits['MAX_DEPTH']:
+        raise GraphQLError(f"Query is {analysis.depth} levels deep, at most {limits['MAX_DEPTH']} are allowed")
+    if analysis.aliases > limits['MAX_ALIASES']:
+        raise GraphQLError(f"Query uses {analysis.aliases} aliases, at most {limits['MAX_ALIASES']} are allowed")
+    if cost > limits['MAX_COST']:
+        raise GraphQLError(f"Query costs {cost}, at most {limits['MAX_COST']} is allowed, "
+                           f"request smaller pages or fewer fields")
+    return {'cost': cost, 'depth': analysis.depth, 'aliases': analysis.aliases, 'maxCost': limits['MAX_COST']}
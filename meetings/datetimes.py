@@ -0,0 +1,129 @@
+import re
+import asyncio
+from functools import lru_cache
+from datetime import datetime
+
+import pytz
+from aniso8601 import parse_datetime as aniso8601_parse_datetime
+from django.utils import timezone
+from graphene.types import Scalar
+from graphql import GraphQLError
+from graphql.language import ast
+
+# the shape clients send nearly every time, YYYY-MM-DDTHH:MM[:SS[.fff|.ffffff]][Z|±HH:MM], which fromisoformat
+# reads on every supported Python version once the Z suffix is spelled as an offset
+ISO_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.(?:\d{6}|\d{3}))?)?(?:Z|[+-]\d{2}:\d{2})?')
+PARSED_DATETIME_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSED_DATETIME_CACHE_SIZE)
+def _parse(value):
+    """
+    parse an ISO 8601 date time, through the precompiled expression & fromisoformat for the common shape and
+    aniso8601 for the rest of the standard, i.e week dates. Results are cached since schedules & imports repeat
+    values
+
+    :returns: (datetime) aware when the value has an offset, naive otherwise
+    """
+
+    if ISO_DATETIME.fullmatch(value) is None:
+        return aniso8601_parse_datetime(value)
+    return datetime.fromisoformat(value[:-1] + '+00:00' if value[-1] == 'Z' else value)
+
+
+def make_aware(date_time, zone=None):
+    """
+    localize a naive wall time in given time zone, the current one by default. A wall time repeated when clocks
+    go back is read as its first occurrence
+
+    :raises: (GraphQLError) when the wall time doesn't exist in the zone, skipped when clocks go forward
+    """
+
+    zone = zone or timezone.get_current_timezone()
+    try:
+        return timezone.make_aware(date_time, zone, is_dst=None)
+    except pytz.AmbiguousTimeError:
+        return timezone.make_aware(date_time, zone, is_dst=True)
+    except pytz.NonExistentTimeError as error:
+        raise GraphQLError(f"{date_time.isoformat()} doesn't exist in {zone}, clocks skip it") from error
+
+
+def parse_datetime(value, default_timezone=None):
+    """
+    strict ISO 8601 parsing to an aware datetime, values without offset are read in given time zone,
+    the current one by default i.e the one of the `Time-Zone` request header. Looking the current time zone up
+    costs more than parsing, bulk callers resolve it once & pass it
+
+    :raises: (GraphQLError) when the value isn't an ISO 8601 date time or a wall time skipped in the time zone
+    """
+
+    try:
+        date_time = _parse(value.strip())
+    except (AttributeError, ValueError, TypeError, NotImplementedError) as error:
+        raise GraphQLError(f'Invalid date time, expected ISO 8601 format: {value}') from error
+    if date_time.tzinfo is None:
+        return make_aware(date_time, default_timezone)
+    return date_time
+
+
+class AwareDateTime(Scalar):
+    """
+    ISO 8601 date time, i.e `2022-06-20T09:00:00+05:00`. Values without offset are read in the time zone of the
+    `Time-Zone` request header, UTC when it's missing
+    """
+
+    @staticmethod
+    def serialize(date_time):
+        return date_time.isoformat()
+
+    @classmethod
+    def parse_literal(cls, node):
+        if isinstance(node, ast.StringValue):
+            return cls.parse_value(node.value)
+        return None
+
+    @staticmethod
+    def parse_value(value):
+        if isinstance(value, datetime):
+            return value if timezone.is_aware(value) else make_aware(value)
+        return parse_datetime(value)
+
+
+class TimeZoneMiddleware:
+    """
+    Read the naive date times of a request in the IANA time zone of its `Time-Zone` header, i.e Asia/Karachi,
+    unknown zones are ignored. Runs natively under ASGI too, a sync-only middleware would make Django run the
+    whole chain of every request on a single thread
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # called as a coroutine function by Django's handler, like MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # pylint: disable=protected-access
+
+    @staticmethod
+    def _zone(request):
+        try:
+            return pytz.timezone(request.headers['Time-Zone'])
+        except (KeyError, pytz.UnknownTimeZoneError):
+            return None
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        zone = self._zone(request)
+        if zone is None:
+            return self.get_response(request)
+        with timezone.override(zone):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        zone = self._zone(request)
+        if zone is None:
+            return await self.get_response(request)
+        with timezone.override(zone):
+            return await self.get_response(request)
@@ -0,0 +1,108 @@
+from hashlib import sha256
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import GraphQLError, parse, validate, execute
+from graphql.backend.base import GraphQLBackend, GraphQLDocument
+from graphql.execution import ExecutionResult
+from graphql.language.printer import print_ast
+
+from .lru import LRUCache
+from .cost import analyze_query_cost
+
+PERSISTED_QUERY_KEY = 'meetings:persisted-query:{}'
+
+
+def query_hash(query):
+    return sha256(query.encode('utf-8')).hexdigest()
+
+
+def _with_extensions(result, extensions):
+    result.extensions.update(extensions)
+    return result
+
+
+def _execute_validated(schema, document_ast, validation_errors, *args, **kwargs):
+    """
+    execute an already validated document once its cost is within the limits, the computed cost is
+    reported in the result extensions
+    """
+
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+    try:
+        cost = analyze_query_cost(schema, document_ast, kwargs.get('operation_name'), kwargs.get('variable_values'))
+    except GraphQLError as error:
+        return ExecutionResult(errors=[error], invalid=True)
+
+    result = execute(schema, document_ast, *args, **kwargs)
+    if cost is None:
+        return result
+    if isinstance(result, ExecutionResult):
+        return _with_extensions(result, {'cost': cost})
+    return result.then(lambda executed: _with_extensions(executed, {'cost': cost}))
+
+
+class ValidatedDocumentBackend(GraphQLBackend):
+    """
+    Parses & validates each query document once, the last `max_size` documents are kept in an LRU keyed
+    by the sha256 of the query so repeated queries skip straight to execution
+    """
+
+    def __init__(self, max_size):
+        self.documents = LRUCache(max_size, None)
+
+    def cached_document(self, schema, sha256_hash):
+        """
+        already parsed document of given query hash, if any
+        """
+
+        return self.documents.get((id(schema), sha256_hash))
+
+    def document_from_string(self, schema, document_string):
+        key = (id(schema), query_hash(document_string))
+        document = self.documents.get(key)
+        if document is None:
+            document_ast = parse(document_string)
+            document = GraphQLDocument(
+                schema=schema,
+                document_string=document_string,
+                document_ast=document_ast,
+                execute=partial(_execute_validated, schema, document_ast, validate(schema, document_ast)),
+            )
+            document.normalized_query = print_ast(document_ast)
+            self.documents.set(key, document)
+        return document
+
+
+document_backend = ValidatedDocumentBackend(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueryMismatch(Exception):
+    pass
+
+
+def persisted_query(sha256_hash, query=None):
+    """
+    Automatic Persisted Queries, clients first send only the sha256 of the query & send the full query
+    once when it's unknown, it's then stored in Django's cache under its hash
+
+    :returns: (str) query text matching the hash
+    """
+
+    key = PERSISTED_QUERY_KEY.format(sha256_hash)
+    if query is None:
+        query = cache.get(key)
+        if query is None:
+            raise PersistedQueryNotFound()
+        return query
+
+    if query_hash(query) != sha256_hash:
+        raise PersistedQueryMismatch()
+    cache.set(key, query, settings.PERSISTED_QUERY_TIMEOUT)
+    return query
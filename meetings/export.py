@@ -0,0 +1,134 @@
+import csv
+import json
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.db.models import F
+
+from .models import Meeting
+from .utils import owner_query
+from .constants import EXPORT_CHUNK_SIZE
+
+EXPORT_FIELDS = ('id', 'title', 'owner', 'start_time', 'end_time', 'slot_duration_in_minutes',
+                 'reserver_name', 'reserver_email')
+ICAL_DATETIME_FORMAT = '%Y%m%dT%H%M%SZ'
+ICAL_LINE_LENGTH = 75
+
+
+def export_rows(owner=None, start_time=None, end_time=None, created_by=None):
+    """
+    meetings to export as plain dicts, ordered by start time & read from the database `EXPORT_CHUNK_SIZE`
+    rows at a time so memory stays flat whatever the number of meetings
+
+    :param owner: (str) only the meetings of this user, by username, first or last name
+    :param created_by: (User) only the meetings of this user
+    :param start_time: (datetime) only the meetings ending after it
+    :param end_time: (datetime) only the meetings starting before it
+    """
+
+    meetings = Meeting.objects.all()
+    if created_by is not None:
+        meetings = meetings.filter(created_by=created_by)
+    if owner:
+        meetings = meetings.filter(owner_query(owner))
+    if start_time:
+        meetings = meetings.filter(end_time__gt=start_time)
+    if end_time:
+        meetings = meetings.filter(start_time__lt=end_time)
+    rows = meetings.order_by('start_time', 'id').values(
+        'id', 'title', 'start_time', 'end_time', 'slot_duration_in_minutes', 'reserver_name', 'reserver_email',
+        'reserved_at', owner=F('created_by__username'), owner_email=F('created_by__email'))
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """
+    file-like object handing back what's written to it, lets csv.writer produce lines for streaming
+    """
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_plain(row[field]) for field in EXPORT_FIELDS])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps({field: _plain(row[field]) for field in EXPORT_FIELDS}) + '\n'
+
+
+def _ical_text(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ical_param(value):
+    """
+    quoted parameter value, double quotes can't be escaped in one so they're dropped (RFC 5545 3.2)
+    """
+
+    return '"' + value.replace('"', '') + '"'
+
+
+def _ical_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime(ICAL_DATETIME_FORMAT)
+
+
+def _fold(line):
+    """
+    fold a content line longer than 75 octets, continuation lines start with a space (RFC 5545 3.1)
+    """
+
+    encoded = line.encode()
+    if len(encoded) <= ICAL_LINE_LENGTH:
+        return line + '\r\n'
+    parts, limit = [], ICAL_LINE_LENGTH
+    while encoded:
+        cut = min(limit, len(encoded))
+        # never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = ICAL_LINE_LENGTH - 1
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ical_lines(rows):
+    stamp = _ical_datetime(timezone.now())
+    yield '\r\n'.join(('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Calendy//Meetings export//EN',
+                       'CALSCALE:GREGORIAN')) + '\r\n'
+    for row in rows:
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:meeting-{row["id"]}@calendy',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{_ical_datetime(row["start_time"])}',
+            f'DTEND:{_ical_datetime(row["end_time"])}',
+            f'SUMMARY:{_ical_text(row["title"])}',
+            f'STATUS:{"CONFIRMED" if row["reserved_at"] else "TENTATIVE"}',
+            'END:VEVENT',
+        ]
+        if row['owner_email']:
+            lines.insert(-2, f'ORGANIZER;CN={_ical_param(row["owner"])}:mailto:{row["owner_email"]}')
+        if row['reserver_name']:
+            lines.insert(-1, f'DESCRIPTION:{_ical_text("Reserved by " + row["reserver_name"])}')
+        if row['reserver_email']:
+            lines.insert(-1, f'ATTENDEE;CN={_ical_param(row["reserver_name"] or "")}:mailto:{row["reserver_email"]}')
+        yield ''.join(_fold(line) for line in lines)
+    yield 'END:VCALENDAR\r\n'
+
+
+EXPORT_FORMATS = {
+    'ics': ('text/calendar; charset=utf-8', ical_lines),
+    'csv': ('text/csv; charset=utf-8', csv_lines),
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+}
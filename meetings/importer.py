@@ -0,0 +1,280 @@
+import re
+import csv
+import json
+from io import StringIO
+from time import perf_counter
+from datetime import datetime
+
+import pytz
+from django.db import connection, transaction
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from graphql import GraphQLError
+
+from .models import Meeting
+from .cache import invalidate_owner
+from .intervals import IntervalSet
+from .sqlite import serialized_write
+from .constants import IMPORT_BATCH_SIZE
+from .datetimes import parse_datetime, make_aware
+from .utils import calculate_meeting_end_time, _validate_meeting_duration, _validate_user_data
+
+# meeting columns written by the PostgreSQL COPY path, in order
+COPY_COLUMNS = ('created_by_id', 'title', 'start_time', 'end_time', 'slot_duration_in_minutes', 'reserver_name',
+                'reserver_email', 'reserved_at')
+MAX_REPORTED_ERRORS = 20
+# name & parameters of a content line, split on the semicolons outside quoted values
+PARAMETER = re.compile(r'(?:[^;"]|"[^"]*")+')
+
+
+def read_csv(lines):
+    """
+    yield the rows of a CSV export, columns are named like export_meetings' i.e title, owner, start_time, end_time
+    """
+
+    yield from csv.DictReader(lines)
+
+
+def read_ndjson(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _unfold(lines):
+    """
+    join the folded content lines of an iCalendar file (RFC 5545 3.1)
+    """
+
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _content_line(line):
+    """
+    split a content line into its name, parameters & value, parameter values may be quoted i.e
+    `ORGANIZER;CN="Doe, John":mailto:doe@example.com` (RFC 5545 3.1)
+    """
+
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            break
+    else:
+        index = len(line)
+    name, *params = PARAMETER.findall(line[:index]) or ['']
+    params = {key.upper(): value.strip('"') for key, _, value in (param.partition('=') for param in params)}
+    return name.upper(), params, line[index + 1:]
+
+
+def _ical_unescape(value):
+    return value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';') \
+        .replace('\\\\', '\\')
+
+
+def _ical_datetime(value, params):
+    """
+    :raises: (GraphQLError) when the value or its TZID is invalid
+    """
+
+    try:
+        if value.endswith('Z'):
+            return pytz.utc.localize(datetime.strptime(value, '%Y%m%dT%H%M%SZ')).isoformat()
+        date_time = datetime.strptime(value, '%Y%m%dT%H%M%S')
+        if 'TZID' in params:
+            date_time = make_aware(date_time, pytz.timezone(params['TZID']))
+    except pytz.UnknownTimeZoneError as error:
+        raise GraphQLError(f'Unknown time zone: {params["TZID"]}') from error
+    except ValueError as error:
+        raise GraphQLError(f'Invalid date time, expected YYYYMMDDTHHMMSS[Z]: {value}') from error
+    return date_time.isoformat()
+
+
+def read_ics(lines):
+    """
+    yield the VEVENTs of an iCalendar file as rows, the owner is the CN of the ORGANIZER & the reserver is read
+    back from the ATTENDEE & `Reserved by` DESCRIPTION written by export_meetings. Date times which can't be read
+    are reported through the row's `error`, so only that row is rejected
+    """
+
+    row = None
+    for line in _unfold(lines):
+        name, params, value = _content_line(line)
+        if name == 'BEGIN' and value == 'VEVENT':
+            row = {}
+        elif name == 'END' and value == 'VEVENT' and row is not None:
+            yield row
+            row = None
+        elif row is None:
+            continue
+        elif name in ('DTSTART', 'DTEND'):
+            try:
+                row['start_time' if name == 'DTSTART' else 'end_time'] = _ical_datetime(value, params)
+            except GraphQLError as error:
+                row['error'] = error.message
+        elif name == 'SUMMARY':
+            row['title'] = _ical_unescape(value)
+        elif name == 'ORGANIZER':
+            row['owner'] = params.get('CN')
+        elif name == 'ATTENDEE':
+            row['reserver_email'] = value[len('mailto:'):] if value.lower().startswith('mailto:') else value
+            row.setdefault('reserver_name', params.get('CN'))
+        elif name == 'DESCRIPTION' and value.startswith('Reserved by '):
+            row['reserver_name'] = _ical_unescape(value[len('Reserved by '):])
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+    'ics': read_ics,
+}
+
+
+class MeetingImporter:
+    """
+    Validate & insert a stream of meeting rows in batches. Overlaps are detected in memory against the
+    meetings each owner already has plus the imported ones, invalid rows are skipped & reported
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, default_owner=None, use_copy=None):
+        self.batch_size = batch_size
+        self.default_owner = default_owner
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.owners = {}
+        self.booked = {}
+        self.batch = []
+        self.read = 0
+        self.imported = 0
+        self.errors = []
+        self.rejected = 0
+        self.started = None
+        self.started_at = None
+        self.timezone = None
+
+    def _owner(self, username):
+        if username not in self.owners:
+            user = get_user_model().objects.filter(username=username).first() if username else None
+            self.owners[username] = user
+            if user is not None:
+                self.booked[user.id] = IntervalSet(
+                    Meeting.objects.filter(created_by=user).values_list('start_time', 'end_time', 'id'))
+        if self.owners[username] is None:
+            raise GraphQLError(f'Unknown owner: {username}')
+        return self.owners[username]
+
+    def meeting(self, row):
+        """
+        validate a row against the same rules as createUpdateMeeting & reserveMeeting
+
+        :returns: (Meeting) unsaved meeting
+        """
+
+        if row.get('error'):
+            raise GraphQLError(row['error'])
+        owner = self._owner(row.get('owner') or self.default_owner)
+        title = (row.get('title') or '').strip()
+        if not title:
+            raise GraphQLError('Meeting title should not be empty')
+        start_time = parse_datetime(row.get('start_time') or '', self.timezone)
+        if row.get('end_time'):
+            end_time = parse_datetime(row['end_time'], self.timezone)
+            duration = (end_time - start_time).total_seconds() / 60
+        else:
+            duration = int(row.get('slot_duration_in_minutes') or 0)
+            end_time = calculate_meeting_end_time(start_time, duration)
+        _validate_meeting_duration(duration)
+
+        reserver_name = (row.get('reserver_name') or '').strip() or None
+        reserver_email = (row.get('reserver_email') or '').strip() or None
+        if reserver_name or reserver_email:
+            _validate_user_data(reserver_name or '', reserver_email or '')
+
+        booked = self.booked[owner.id]
+        if booked.overlapping(start_time, end_time):
+            raise GraphQLError(f'Meeting overlaps another meeting of {owner.username} at {start_time.isoformat()}')
+        # keyed by row number, a None key would match the default `exclude` of overlapping()
+        booked.add(start_time, end_time, -self.read)
+        return Meeting(created_by=owner, title=title, start_time=start_time, end_time=end_time,
+                       slot_duration_in_minutes=int(duration), reserver_name=reserver_name,
+                       reserver_email=reserver_email, reserved_at=self.started_at if reserver_name else None)
+
+    def _copy(self, meetings):
+        """
+        write the batch with a single COPY, several times faster than INSERT on PostgreSQL
+        """
+
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        for meeting in meetings:
+            writer.writerow([getattr(meeting, column) for column in COPY_COLUMNS])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {Meeting._meta.db_table} ({", ".join(COPY_COLUMNS)}) FROM STDIN '
+                               f'WITH (FORMAT csv)', buffer)
+
+    @serialized_write
+    def flush(self):
+        """
+        write the pending batch in a transaction of its own, the owners it changed are invalidated once it's
+        committed so an interrupted import leaves no stale cached listing or schedule behind
+        """
+
+        if not self.batch:
+            return
+        with transaction.atomic():
+            if self.use_copy:
+                self._copy(self.batch)
+            else:
+                Meeting.objects.bulk_create(self.batch, batch_size=self.batch_size)
+            for owner in {meeting.created_by_id: meeting.created_by for meeting in self.batch}.values():
+                invalidate_owner(owner)
+        self.imported += len(self.batch)
+        self.batch = []
+
+    def run(self, rows, progress=None):
+        """
+        import every row, calling progress(importer) after each batch
+
+        :returns: (dict) import report, with the rows per second
+        """
+
+        self.started = perf_counter()
+        self.started_at = timezone.now()
+        self.timezone = timezone.get_current_timezone()
+        for line_number, row in enumerate(rows, start=1):
+            self.read += 1
+            try:
+                self.batch.append(self.meeting(row))
+            except (GraphQLError, ValueError, TypeError, pytz.UnknownTimeZoneError) as error:
+                self.rejected += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(f'row {line_number}: {getattr(error, "message", error)}')
+                continue
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+                if progress:
+                    progress(self)
+        self.flush()
+        return self.report()
+
+    def report(self):
+        elapsed = perf_counter() - self.started
+        return {
+            'read': self.read,
+            'imported': self.imported,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'seconds': elapsed,
+            'rows_per_second': self.imported / elapsed if elapsed else 0,
+        }
@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+
+
+class IntervalSet:
+    """
+    Sorted set of half-open [start, end) intervals, used when a host's slots are already
+    loaded in memory. Overlap lookups are O(log n) through bisect, intervals are found by key through
+    their start so discarding one bisects too
+    """
+
+    __slots__ = ('_starts', '_ends', '_keys', '_span', '_starts_by_key')
+
+    def __init__(self, intervals=()):
+        """
+        :param intervals: iterable of (start, end, key) tuples, key is usually the Meeting ID
+        """
+
+        self._starts = []
+        self._ends = []
+        self._keys = []
+        self._span = None
+        self._starts_by_key = {}
+        for start, end, key in sorted(intervals, key=lambda interval: interval[0]):
+            self._starts.append(start)
+            self._ends.append(end)
+            self._keys.append(key)
+            self._starts_by_key[key] = start
+            self._grow_span(start, end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends, self._keys))
+
+    def _grow_span(self, start, end):
+        """
+        keep track of the longest stored interval, it bounds how far back a conflict can start
+        """
+
+        if self._span is None or end - start > self._span:
+            self._span = end - start
+
+    def overlapping(self, start, end, exclude=None):
+        """
+        find the first stored interval overlapping [start, end)
+
+        :param start: lower bound of the interval to check, inclusive
+        :param end: upper bound of the interval to check, exclusive
+        :param exclude: (any) key to ignore, i.e the meeting being updated
+
+        :returns: (tuple) (start, end, key) of the conflicting interval or None
+        """
+
+        if not self._starts:
+            return None
+
+        # an interval overlapping [start, end) can't start before `start - longest interval`
+        index = bisect_right(self._starts, start - self._span)
+        while index < len(self._starts) and self._starts[index] < end:
+            if self._ends[index] > start and self._keys[index] != exclude:
+                return self._starts[index], self._ends[index], self._keys[index]
+            index += 1
+        return None
+
+    def add(self, start, end, key=None):
+        """
+        insert [start, end), caller is expected to have checked `overlapping` first
+        """
+
+        index = bisect_left(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._keys.insert(index, key)
+        self._starts_by_key[key] = start
+        self._grow_span(start, end)
+
+    def discard(self, key):
+        """
+        remove the interval stored under given key, if any
+        """
+
+        if key not in self._starts_by_key:
+            return
+        start = self._starts_by_key.pop(key)
+        index = bisect_left(self._starts, start)
+        while self._keys[index] != key:
+            index += 1
+        del self._starts[index]
+        del self._ends[index]
+        del self._keys[index]
@@ -0,0 +1,26 @@
+from promise import Promise
+from promise.dataloader import DataLoader
+from django.contrib.auth import get_user_model
+
+
+class UserLoader(DataLoader):
+    """
+    Batch every user lookup made while resolving one GraphQL request into a single `IN` query
+    """
+
+    def batch_load_fn(self, keys):
+        users = get_user_model().objects.in_bulk(keys)
+        return Promise.resolve([users.get(key) for key in keys])
+
+
+def get_user_loader(context):
+    """
+    UserLoader bound to the given request, loaders are request scoped so cached users never leak
+    between requests
+    """
+
+    loader = getattr(context, 'user_loader', None)
+    if loader is None:
+        loader = UserLoader()
+        context.user_loader = loader
+    return loader
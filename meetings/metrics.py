@@ -0,0 +1,95 @@
+from bisect import bisect_left
+from threading import Lock
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# upper bounds of the SQL queries per operation histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+# distinct values of a label, the values seen past them are counted as `other`
+MAX_LABEL_VALUES = 100
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, in the Prometheus sense
+    """
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """
+        yield the Prometheus text exposition lines of the histogram
+        """
+
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels.rstrip(",")}}} {self.total}'
+        yield f'{name}_count{{{labels.rstrip(",")}}} {self.count}'
+
+
+class LabelValues:
+    """
+    Bounded set of the values a label takes, values past the first `max_size` distinct ones are reported as
+    `other` so requests can't grow the number of series, and the memory they use, without limit
+    """
+
+    def __init__(self, max_size=MAX_LABEL_VALUES):
+        self.max_size = max_size
+        self._values = set()
+        self._lock = Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            if value not in self._values:
+                if len(self._values) >= self.max_size:
+                    return 'other'
+                self._values.add(value)
+        return value
+
+
+class MetricsRegistry:
+    """
+    In-process aggregation of the GraphQL traces, per operation & per resolver
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._histograms = {}
+
+    def _histogram(self, name, labels, buckets):
+        key = (name, labels)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(buckets)
+        return self._histograms[key]
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        labels = ''.join(f'{label}="{label_value}",' for label, label_value in sorted(labels.items()))
+        with self._lock:
+            self._histogram(name, labels, buckets).observe(value)
+
+    def exposition(self):
+        """
+        all histograms in the Prometheus text format
+        """
+
+        lines = []
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                lines.extend(histogram.samples(name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
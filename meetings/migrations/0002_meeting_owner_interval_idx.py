@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['created_by', 'start_time', 'end_time'], name='meeting_owner_interval_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0002_meeting_owner_interval_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['start_time', 'id'], name='meeting_start_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 07:10
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_reserved_at(apps, schema_editor):
+    Meeting = apps.get_model('meetings', 'Meeting')
+    Meeting.objects.using(schema_editor.connection.alias).filter(
+        reserver_name__isnull=False, reserved_at__isnull=True).update(reserved_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0003_meeting_start_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='reserved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(condition=models.Q(reserver_name__isnull=True), fields=['start_time', 'id'], name='meeting_bookable_idx'),
+        ),
+        migrations.RunPython(backfill_reserved_at, migrations.RunPython.noop),
+    ]
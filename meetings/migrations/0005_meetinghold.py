@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 07:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0004_meeting_reserved_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('meeting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hold', to='meetings.meeting')),
+            ],
+        ),
+    ]
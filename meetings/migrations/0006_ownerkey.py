@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_owner_keys(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    OwnerKey = apps.get_model('meetings', 'OwnerKey')
+    # the router would send the reads to a replica, which isn't migrated yet
+    database = schema_editor.connection.alias
+    keys = []
+    users = User.objects.using(database).values_list('id', 'username', 'first_name', 'last_name')
+    for user_id, *names in users.iterator():
+        keys.extend(OwnerKey(user_id=user_id, key=key) for key in {name.casefold() for name in names if name})
+        if len(keys) >= 1000:
+            OwnerKey.objects.using(database).bulk_create(keys)
+            keys = []
+    OwnerKey.objects.using(database).bulk_create(keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('meetings', '0005_meetinghold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='owner_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ownerkey',
+            constraint=models.UniqueConstraint(fields=('key', 'user'), name='owner_key_user_unique'),
+        ),
+        migrations.RunPython(backfill_owner_keys, migrations.RunPython.noop),
+    ]
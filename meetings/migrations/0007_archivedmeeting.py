@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('meetings', '0006_ownerkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMeeting',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('slot_duration_in_minutes', models.PositiveSmallIntegerField()),
+                ('reserver_name', models.CharField(blank=True, max_length=256, null=True)),
+                ('reserver_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('reserved_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_meetings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedmeeting',
+            index=models.Index(fields=['created_by', 'start_time'], name='archived_owner_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmeeting',
+            index=models.Index(fields=['start_time', 'id'], name='archived_start_time_id_idx'),
+        ),
+    ]
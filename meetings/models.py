@@ -1,6 +1,7 @@
 from django.utils import timezone
 
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 
@@ -18,13 +19,23 @@ class Meeting(models.Model):
     slot_duration_in_minutes = models.PositiveIntegerField(choices=SLOT_CHOICES, default=15)
     reserver_name = models.CharField(max_length=256, blank=True, null=True)
     reserver_email = models.EmailField(blank=True, null=True)
+    reserved_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by', 'start_time', 'end_time'], name='meeting_owner_interval_idx'),
+            models.Index(fields=['start_time', 'id'], name='meeting_start_time_id_idx'),
+            # only free meetings are ever looked up for booking, reserved ones stay out of the index
+            models.Index(fields=['start_time', 'id'], name='meeting_bookable_idx',
+                         condition=Q(reserved_at__isnull=True)),
+        ]
 
     @property
     def is_reserved(self):
         """
         is meeting already reserved by some other user?
         """
-        return self.reserver_name is not None
+        return self.reserved_at is not None
 
     @property
     def is_meeting_over(self):
@@ -37,3 +48,66 @@ class Meeting(models.Model):
     def __str__(self):
         return f'{self.title} Duration:{self.slot_duration_in_minutes} minutes, by: {self.created_by.username}'
 
+
+class MeetingHold(models.Model):
+    """
+    Short lived lease on a free meeting, given by `holdMeeting` & confirmed by `reserveMeeting` with its token.
+    A meeting has at most one hold, expired ones are replaced by the next hold & deleted in bulk by the reaper
+    """
+
+    meeting = models.OneToOneField(Meeting, on_delete=models.CASCADE, related_name='hold')
+    token = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f'Hold on meeting {self.meeting_id} until {self.expires_at}'
+
+
+class OwnerKey(models.Model):
+    """
+    Casefolded username, first & last name of a user, the names meetingsByOwner looks owners up by. Kept in sync
+    with the user table by a post_save receiver, see meetings.owners
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='owner_keys')
+    key = models.CharField(max_length=150)
+
+    class Meta:
+        constraints = [
+            # leads with the key, a lookup is a single index seek returning the user ids
+            models.UniqueConstraint(fields=['key', 'user'], name='owner_key_user_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.key} -> {self.user_id}'
+
+
+class ArchivedMeeting(models.Model):
+    """
+    Finished meeting moved out of the meeting table by archive_meetings, so listings & overlap checks no longer
+    carry it. It keeps the id of the meeting, cursors stay valid across both tables
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                   related_name='archived_meetings')
+    title = models.CharField(max_length=100)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    slot_duration_in_minutes = models.PositiveSmallIntegerField()
+    reserver_name = models.CharField(max_length=256, blank=True, null=True)
+    reserver_email = models.EmailField(blank=True, null=True)
+    reserved_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by', 'start_time'], name='archived_owner_start_idx'),
+            models.Index(fields=['start_time', 'id'], name='archived_start_time_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} archived, by: {self.created_by_id}'
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from .models import OwnerKey
+from .replicas import PRIMARY
+
+OWNER_KEY_BATCH_SIZE = 1000
+
+
+def owner_keys(user):
+    """
+    the keys a user is found by, its casefolded username, first & last name
+    """
+
+    return {name.casefold() for name in (user.username, user.first_name, user.last_name) if name}
+
+
+def sync_owner_keys(users, database=PRIMARY):
+    """
+    bring the owner keys of given users in line with their names, only changed keys are written so saves that
+    leave the names alone i.e a login cost a single read. Needed after bulk_create, which sends no post_save
+
+    :param database: (str) alias the users were saved to, the keys are diffed against it rather than a replica
+    """
+
+    users = list(users)
+    for offset in range(0, len(users), OWNER_KEY_BATCH_SIZE):
+        _sync_batch(users[offset:offset + OWNER_KEY_BATCH_SIZE], database)
+
+
+def _sync_batch(users, database):
+    wanted = {user.pk: owner_keys(user) for user in users}
+    keys = OwnerKey.objects.using(database)
+    existing = defaultdict(set)
+    for user_id, key in keys.filter(user_id__in=wanted).values_list('user_id', 'key'):
+        existing[user_id].add(key)
+
+    for user_id, wanted_keys in wanted.items():
+        stale = existing[user_id] - wanted_keys
+        if stale:
+            keys.filter(user_id=user_id, key__in=stale).delete()
+    keys.bulk_create([OwnerKey(user_id=user_id, key=key)
+                      for user_id, user_keys in wanted.items() for key in user_keys - existing[user_id]])
+
+
+def owner_ids(user_name):
+    """
+    ids of the users whose username, first or last name is given name, case insensitive. Left as a subquery so
+    the database seeks the owner key index then the meeting owner index within one statement, a common first
+    name can match more users than a query takes parameters
+
+    :returns: (QuerySet) user ids
+    """
+
+    return OwnerKey.objects.filter(key=user_name.casefold()).values('user_id')
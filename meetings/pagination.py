@@ -0,0 +1,142 @@
+from heapq import merge
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Q, QuerySet
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+from graphene.relay import PageInfo
+
+from .constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def encode_cursor(meeting):
+    """
+    opaque cursor holding the (start_time, id) sort key of given meeting
+    """
+
+    return base64(f'{meeting.start_time.isoformat()}|{meeting.id}')
+
+
+def decode_cursor(cursor):
+    """
+    read back the (start_time, id) sort key from a cursor built by `encode_cursor`
+    """
+
+    try:
+        start_time, meeting_id = unbase64(cursor).split('|')
+        return datetime.fromisoformat(start_time), int(meeting_id)
+    except (ValueError, TypeError) as error:
+        raise GraphQLError(f'Invalid cursor: {cursor}') from error
+
+
+def _page_size(value, argument):
+    """
+    validate requested page size lies within 0 and MAX_PAGE_SIZE
+    """
+
+    if value < 0 or value > MAX_PAGE_SIZE:
+        raise GraphQLError(f'`{argument}` should be between 0 and {MAX_PAGE_SIZE}')
+    return value
+
+
+def _after(start_time, meeting_id):
+    return Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=meeting_id)
+
+
+def _before(start_time, meeting_id):
+    return Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=meeting_id)
+
+
+def _sort_key(meeting):
+    return meeting.start_time, meeting.id
+
+
+def _between(queryset, after, before):
+    if after:
+        queryset = queryset.filter(start_time__gte=after[0]).filter(_after(*after))
+    if before:
+        queryset = queryset.filter(start_time__lte=before[0]).filter(_before(*before))
+    return queryset
+
+
+def _seek(source, after, before, descending, limit):
+    """
+    the first `limit` meetings of the source between the (start_time, id) keys, in that order or its reverse.
+    A source is a queryset or any object seeking its own rows, i.e a cached ScheduleListing
+    """
+
+    if not isinstance(source, QuerySet):
+        return source.seek(after, before, descending, limit)
+    return list(_between(source, after, before).order_by(
+        *(('-start_time', '-id') if descending else ('start_time', 'id')))[:limit])
+
+
+def _exists(sources, after=None, before=None):
+    """
+    does any of the sources hold a meeting between the (start_time, id) keys?
+    """
+
+    for source in sources:
+        if source is None:
+            continue
+        if isinstance(source, QuerySet):
+            found = _between(source, after, before).exists()
+        else:
+            found = source.exists(after, before)
+        if found:
+            return True
+    return False
+
+
+def keyset_page(queryset, first=None, after=None, last=None, before=None, archived=None):
+    """
+    slice given queryset on the (start_time, id) key instead of OFFSET, each page is an index range
+    seek starting right next to the cursor so its cost doesn't depend on how deep the client is. The page is
+    read with one extra meeting telling whether there's more past it, the other side of the cursor is probed
+
+    :param archived: (QuerySet) optional ArchivedMeeting rows to list as well, projected like the meetings,
+        seeked the same way & merged on the sort key. Archived meetings keep their id so a cursor points in both
+        tables
+
+    :returns: (tuple) meetings of the page, has_previous_page, has_next_page
+    """
+
+    if first is not None and last is not None:
+        raise GraphQLError('Use either `first` or `last` to paginate, not both')
+
+    descending = last is not None
+    if descending:
+        size = _page_size(last, 'last')
+    else:
+        size = _page_size(DEFAULT_PAGE_SIZE if first is None else first, 'first')
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+    meetings = _seek(queryset, after, before, descending, size + 1)
+    if archived is not None:
+        archived_meetings = _seek(archived, after, before, descending, size + 1)
+        meetings = list(islice(merge(meetings, archived_meetings, key=_sort_key, reverse=descending), size + 1))
+
+    # IDs are integers, the meetings up to & including the cursor are the ones before the next ID
+    if descending:
+        has_next_page = bool(before) and _exists((queryset, archived), after=(before[0], before[1] - 1))
+        return meetings[:size][::-1], len(meetings) > size, has_next_page
+    has_previous_page = bool(after) and _exists((queryset, archived), before=(after[0], after[1] + 1))
+    return meetings[:size], has_previous_page, len(meetings) > size
+
+
+def keyset_connection(queryset, connection_type, first=None, after=None, last=None, before=None, archived=None):
+    """
+    build a Relay connection of given type for one keyset page of the queryset, merged with the archived
+    meetings when given
+    """
+
+    meetings, has_previous_page, has_next_page = keyset_page(queryset, first, after, last, before, archived)
+    edges = [connection_type.Edge(node=meeting, cursor=encode_cursor(meeting)) for meeting in meetings]
+    page_info = PageInfo(
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+        has_previous_page=has_previous_page,
+        has_next_page=has_next_page,
+    )
+    return connection_type(edges=edges, page_info=page_info)
@@ -0,0 +1,79 @@
+from django.db.models import F
+from django.db.models.query import ValuesListIterable
+
+from .selections import selected_fields
+
+# columns read for each MeetingType field, `owner` is joined from the user table
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'title': ('title',),
+    'startTime': ('start_time',),
+    'endTime': ('end_time',),
+    'reserverName': ('reserver_name',),
+    'reserverEmail': ('reserver_email',),
+    'meetingDuration': ('slot_duration_in_minutes',),
+    'isReserved': ('reserved_at',),
+    'owner': ('owner',),
+}
+# the (start_time, id) sort key is always read, cursors & archive merges need it
+SORT_KEY_COLUMNS = ('id', 'start_time')
+
+
+class MeetingRow:
+    """
+    Meeting read as the few columns a GraphQL selection needs, several times lighter than a model instance.
+    Attributes outside the selection are left unset
+    """
+
+    __slots__ = ('id', 'title', 'start_time', 'end_time', 'slot_duration_in_minutes', 'reserver_name',
+                 'reserver_email', 'reserved_at', 'owner')
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_reserved(self):
+        return self.reserved_at is not None
+
+
+class MeetingRowIterable(ValuesListIterable):
+    """
+    yield a MeetingRow per row of a `values_list` queryset, the way Django's `named=True` yields namedtuples
+    """
+
+    def __iter__(self):
+        names = self.queryset._fields
+        for values in super().__iter__():
+            row = MeetingRow()
+            for name, value in zip(names, values):
+                setattr(row, name, value)
+            yield row
+
+
+def project_fields(queryset, fields):
+    """
+    read only the columns given MeetingType fields need, as MeetingRow objects
+
+    :param fields: (set) GraphQL field names i.e {'id', 'startTime', 'owner'}
+
+    :returns: (QuerySet) still open to filter, order_by & slicing
+    """
+
+    columns = set(SORT_KEY_COLUMNS)
+    for field in fields:
+        columns.update(FIELD_COLUMNS.get(field, ()))
+    if 'owner' in columns:
+        queryset = queryset.annotate(owner=F('created_by__username'))
+    rows = queryset.values_list(*(column for column in MeetingRow.__slots__ if column in columns))
+    rows._iterable_class = MeetingRowIterable
+    return rows
+
+
+def project(queryset, info, path=('edges', 'node')):
+    """
+    project a meeting listing on the fields the client selected under given path, a connection's nodes
+    by default
+    """
+
+    return project_fields(queryset, selected_fields(info, path))
@@ -0,0 +1,124 @@
+import random
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+# set on clients who just wrote, their reads go to the primary until it expires
+STICKY_COOKIE = 'calendy_primary'
+
+
+class RoutingState:
+    """
+    Routing of the current request, `pinned` sends its reads to the primary & `wrote` tells a write went through
+    """
+
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def is_pinned():
+    """
+    does the current request read from the primary?
+    """
+
+    state = _state.get()
+    return state is not None and state.pinned
+
+
+@contextmanager
+def use_primary():
+    """
+    read from the primary within the block, used for mutations so their validation sees the latest writes
+    """
+
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(pinned=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica of REPLICA_DATABASES & writes to the primary, reads of a pinned request
+    stay on the primary. Replicas aren't migrated, they're expected to replicate the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.REPLICA_DATABASES or is_pinned():
+            return PRIMARY
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read your writes: a client whose request wrote anything gets a cookie pinning its next requests to the
+    primary for REPLICA_STICKY_SECONDS, long enough for the replicas to catch up. Runs natively under ASGI too,
+    a sync-only middleware would make Django run the whole chain of every request on a single thread
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # called as a coroutine function by Django's handler, like MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # pylint: disable=protected-access
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = RoutingState(pinned=STICKY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._stick(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=STICKY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._stick(state, response)
+
+    @staticmethod
+    def _stick(state, response):
+        if state.wrote and settings.REPLICA_DATABASES:
+            response.set_cookie(STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                                samesite='Lax')
+        return response
@@ -0,0 +1,155 @@
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from graphql import GraphQLError
+
+from .datetimes import make_aware
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError) as error:
+        raise GraphQLError(f'Invalid {name}, expected YYYY-MM-DD: {value}') from error
+
+
+def _parse_time(value):
+    try:
+        return time.fromisoformat(value.strip())
+    except (TypeError, ValueError) as error:
+        raise GraphQLError(f'Invalid time in daily window, expected HH:MM: {value}') from error
+
+
+def parse_windows(windows):
+    """
+    parse daily windows given as `HH:MM-HH:MM` strings i.e ["09:00-12:00", "14:00-17:30"]
+
+    :returns: (list) sorted, non-overlapping (start time, end time) tuples
+    """
+
+    parsed = []
+    for window in windows:
+        start, _, end = window.partition('-')
+        start, end = _parse_time(start), _parse_time(end)
+        if start >= end:
+            raise GraphQLError(f'Daily window should end after it starts: {window}')
+        parsed.append((start, end))
+
+    parsed.sort()
+    for (_, previous_end), (start, _) in zip(parsed, parsed[1:]):
+        if start < previous_end:
+            raise GraphQLError('Daily windows should not overlap each other')
+    return parsed
+
+
+def parse_recurrence(rule):
+    """
+    parse the supported subset of an RFC 5545 RRULE i.e `FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10`
+
+    FREQ (DAILY or WEEKLY), INTERVAL, BYDAY, COUNT & UNTIL (YYYYMMDD) are supported
+    """
+
+    parts = {}
+    for part in filter(None, rule.upper().replace('RRULE:', '').split(';')):
+        key, _, value = part.partition('=')
+        parts[key.strip()] = value.strip()
+
+    frequency = parts.pop('FREQ', 'DAILY')
+    if frequency not in ('DAILY', 'WEEKLY'):
+        raise GraphQLError(f'Unsupported recurrence frequency: {frequency}, expected DAILY or WEEKLY')
+    try:
+        recurrence = {
+            'frequency': frequency,
+            'interval': int(parts.pop('INTERVAL', 1)),
+            'count': int(parts.pop('COUNT')) if 'COUNT' in parts else None,
+            'until': datetime.strptime(parts.pop('UNTIL')[:8], '%Y%m%d').date() if 'UNTIL' in parts else None,
+            'weekdays': {WEEKDAYS.index(day) for day in parts.pop('BYDAY').split(',')} if 'BYDAY' in parts else None,
+        }
+    except ValueError as error:
+        raise GraphQLError(f'Invalid recurrence rule: {rule}') from error
+
+    if parts:
+        raise GraphQLError(f'Unsupported recurrence rule parts: {", ".join(parts)}')
+    if recurrence['interval'] < 1:
+        raise GraphQLError('Recurrence interval should be a positive number')
+    return recurrence
+
+
+def recurrence_dates(start_date, end_date, rule=None):
+    """
+    yield the dates between start_date and end_date (both inclusive) matching given recurrence rule,
+    every day when there is no rule
+    """
+
+    recurrence = parse_recurrence(rule) if rule else parse_recurrence('FREQ=DAILY')
+    if recurrence['until'] and recurrence['until'] < end_date:
+        end_date = recurrence['until']
+    weekdays = recurrence['weekdays']
+    if recurrence['frequency'] == 'WEEKLY' and weekdays is None:
+        weekdays = {start_date.weekday()}
+    first_week = start_date - timedelta(days=start_date.weekday())
+
+    occurrences = 0
+    day = start_date
+    while day <= end_date and (recurrence['count'] is None or occurrences < recurrence['count']):
+        if recurrence['frequency'] == 'DAILY':
+            matches = (day - start_date).days % recurrence['interval'] == 0
+            matches = matches and (weekdays is None or day.weekday() in weekdays)
+        else:
+            matches = ((day - first_week).days // 7) % recurrence['interval'] == 0 and day.weekday() in weekdays
+        if matches:
+            occurrences += 1
+            yield day
+        day += timedelta(days=1)
+
+
+def _localize(wall_time, zone):
+    """
+    :returns: (datetime) given wall time in the zone, None when clocks skip it
+    """
+
+    try:
+        return make_aware(wall_time, zone)
+    except GraphQLError:
+        return None
+
+
+def expand_slots(start_date, end_date, windows, duration, rule=None):
+    """
+    yield a schedule's consecutive meeting slots, dates & windows are read in the current time zone. Slots are
+    generated lazily so callers can stop at their limit, slots starting at a wall time skipped by a DST change
+    are left out
+
+    :param start_date: (str) first day of the schedule, YYYY-MM-DD
+    :param end_date: (str) last day of the schedule, YYYY-MM-DD
+    :param windows: (list) daily windows as `HH:MM-HH:MM` strings
+    :param duration: (int) slot duration in minutes
+    :param rule: (str) optional RRULE selecting the days of the schedule
+
+    :returns: (generator) sorted (start_time, end_time) tuples of aware datetimes
+    """
+
+    start_date, end_date = _parse_date(start_date, 'start date'), _parse_date(end_date, 'end date')
+    if start_date > end_date:
+        raise GraphQLError('Schedule should end on or after its start date')
+    windows = parse_windows(windows)
+    return _slots(start_date, end_date, windows, timedelta(minutes=duration), rule)
+
+
+def _slots(start_date, end_date, windows, slot_length, rule):
+    current_timezone = timezone.get_current_timezone()
+    for day in recurrence_dates(start_date, end_date, rule):
+        for window_start, window_end in windows:
+            wall_time, window_close = datetime.combine(day, window_start), datetime.combine(day, window_end)
+            close = _localize(window_close, current_timezone)
+            while wall_time + slot_length <= window_close:
+                start_time = _localize(wall_time, current_timezone)
+                wall_time += slot_length
+                if start_time is None:
+                    continue
+                # slots last their duration across a DST change too, without running past the window
+                if close is not None and start_time + slot_length > close:
+                    break
+                yield start_time, start_time + slot_length
@@ -0,0 +1,334 @@
+from array import array
+from time import time_ns
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import caches
+
+from .models import Meeting
+from .replicas import PRIMARY
+from .projection import FIELD_COLUMNS, MeetingRow, project_fields
+
+SCHEDULE_KEY = 'meetings:schedule:{}'
+SCHEDULE_VERSION_KEY = 'meetings:schedule-version:{}'
+# MeetingType fields a schedule answers by itself, the other ones are read from the meeting table
+SCHEDULE_FIELDS = {'id', 'startTime', 'endTime', 'isReserved', 'owner'}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# set while a write path which invalidates the schedules it changes itself is running, see tracked_writes
+_tracked_writes = ContextVar('tracked_schedule_writes', default=False)
+
+
+def _cache():
+    return caches[settings.SCHEDULE_CACHE_ALIAS]
+
+
+def to_microseconds(date_time):
+    return (date_time - EPOCH) // MICROSECOND
+
+
+def from_microseconds(microseconds):
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+class OwnerSchedule:
+    """
+    Meetings of one owner as parallel arrays of (start, end, id, reserved_at) sorted on (start, id), times are
+    microseconds since the epoch & reserved_at is 0 for free meetings. Meetings are found by ID through the
+    start they're sorted on, so lookups & updates bisect instead of scanning the arrays. Cheap to pickle into
+    the cache, `version` is the owner's schedule version the arrays were read at
+    """
+
+    __slots__ = ('owner_id', 'version', 'starts', 'ends', 'ids', 'reserved', 'span', 'starts_by_id')
+
+    def __init__(self, owner_id, version, rows=()):
+        """
+        :param rows: iterable of (start, end, id, reserved_at) tuples of datetimes, sorted on (start, id)
+        """
+
+        self.owner_id = owner_id
+        self.version = version
+        self.starts, self.ends, self.ids, self.reserved = array('q'), array('q'), array('q'), array('q')
+        self.span = 0
+        self.starts_by_id = {}
+        for start_time, end_time, meeting_id, reserved_at in rows:
+            self._append(to_microseconds(start_time), to_microseconds(end_time), meeting_id,
+                         to_microseconds(reserved_at) if reserved_at else 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, meeting_id):
+        return meeting_id in self.starts_by_id
+
+    def _append(self, start, end, meeting_id, reserved):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(meeting_id)
+        self.reserved.append(reserved)
+        self.starts_by_id[meeting_id] = start
+        self.span = max(self.span, end - start)
+
+    def _index(self, start, meeting_id):
+        """
+        position of the (start, id) key, the first entry not sorting before it
+        """
+
+        index = bisect_left(self.starts, start)
+        while index < len(self.starts) and self.starts[index] == start and self.ids[index] < meeting_id:
+            index += 1
+        return index
+
+    def _position(self, meeting_id):
+        """
+        :returns: (int) index of given meeting in the arrays, None when it's not in the schedule
+        """
+
+        start = self.starts_by_id.get(meeting_id)
+        return None if start is None else self._index(start, meeting_id)
+
+    def add(self, start_time, end_time, meeting_id, reserved_at=None):
+        start = to_microseconds(start_time)
+        index = self._index(start, meeting_id)
+        end = to_microseconds(end_time)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.ids.insert(index, meeting_id)
+        self.reserved.insert(index, to_microseconds(reserved_at) if reserved_at else 0)
+        self.starts_by_id[meeting_id] = start
+        self.span = max(self.span, end - start)
+
+    def discard(self, meeting_id):
+        """
+        remove given meeting, if any
+
+        :returns: (datetime) its reservation time, None when it's free or missing
+        """
+
+        index = self._position(meeting_id)
+        if index is None:
+            return None
+        del self.starts_by_id[meeting_id]
+        reserved = self.reserved[index]
+        for column in (self.starts, self.ends, self.ids, self.reserved):
+            del column[index]
+        return from_microseconds(reserved) if reserved else None
+
+    def move(self, meeting_id, start_time, end_time):
+        self.add(start_time, end_time, meeting_id, self.discard(meeting_id))
+
+    def reserve(self, meeting_id, reserved_at):
+        index = self._position(meeting_id)
+        if index is not None:
+            self.reserved[index] = to_microseconds(reserved_at)
+
+    def _overlapping_indexes(self, start, end):
+        # a meeting overlapping [start, end) can't start before `start - longest meeting`
+        index = bisect_right(self.starts, start - self.span)
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.ends[index] > start:
+                yield index
+            index += 1
+
+    def overlapping(self, start_time, end_time, exclude=None):
+        """
+        the meeting overlapping [start_time, end_time) which ends last, same interface as IntervalSet's
+
+        :param exclude: (int) meeting ID to ignore, i.e the meeting being updated
+
+        :returns: (tuple) (start, end, id) of the conflicting meeting or None
+        """
+
+        conflict = None
+        for index in self._overlapping_indexes(to_microseconds(start_time), to_microseconds(end_time)):
+            if self.ids[index] != exclude and (conflict is None or self.ends[index] > self.ends[conflict]):
+                conflict = index
+        if conflict is None:
+            return None
+        return from_microseconds(self.starts[conflict]), from_microseconds(self.ends[conflict]), self.ids[conflict]
+
+    def busy(self, start_time, end_time):
+        """
+        :returns: (list) (start, end) tuples of the meetings overlapping [start_time, end_time), sorted by start
+        """
+
+        return [(from_microseconds(self.starts[index]), from_microseconds(self.ends[index]))
+                for index in self._overlapping_indexes(to_microseconds(start_time), to_microseconds(end_time))]
+
+    def rows(self, after=None, before=None, descending=False, limit=None):
+        """
+        meetings between the (start_time, id) keys, as MeetingRow objects holding id, times & reserved_at
+
+        :returns: (list) the first `limit` rows in (start_time, id) order, or the last ones in reverse order
+        """
+
+        low = self._index(to_microseconds(after[0]), after[1] + 1) if after else 0
+        high = self._index(to_microseconds(before[0]), before[1]) if before else len(self.ids)
+        indexes = range(low, high)
+        if descending:
+            indexes = indexes[::-1]
+        rows = []
+        for index in indexes[:limit]:
+            row = MeetingRow()
+            row.id = self.ids[index]
+            row.start_time = from_microseconds(self.starts[index])
+            row.end_time = from_microseconds(self.ends[index])
+            row.reserved_at = from_microseconds(self.reserved[index]) if self.reserved[index] else None
+            rows.append(row)
+        return rows
+
+
+def _load(owner_ids, versions):
+    """
+    read the schedules of given owners from the primary with one query, a lagging replica would hand a
+    stale schedule to the validation of the next writes
+    """
+
+    meetings = Meeting.objects.using(PRIMARY).filter(created_by_id__in=owner_ids) \
+        .order_by('created_by_id', 'start_time', 'id') \
+        .values_list('created_by_id', 'start_time', 'end_time', 'id', 'reserved_at')
+    rows = {owner_id: [] for owner_id in owner_ids}
+    for owner_id, *row in meetings.iterator():
+        rows[owner_id].append(row)
+    return {owner_id: OwnerSchedule(owner_id, versions[owner_id], rows[owner_id]) for owner_id in owner_ids}
+
+
+def _versions(owner_ids):
+    """
+    current schedule version of every owner, an owner without version gets a fresh one
+    """
+
+    cache = _cache()
+    keys = {owner_id: SCHEDULE_VERSION_KEY.format(owner_id) for owner_id in owner_ids}
+    versions = cache.get_many(keys.values())
+    for key in keys.values():
+        if key not in versions:
+            cache.add(key, time_ns(), None)
+            versions[key] = cache.get(key)
+    return {owner_id: versions[key] for owner_id, key in keys.items()}
+
+
+def owner_schedules(owner_ids):
+    """
+    schedules of given owners, from the cache when it holds their current version, the other ones are read
+    with one query & cached
+
+    :returns: (dict) owner ID -> OwnerSchedule
+    """
+
+    versions = _versions(owner_ids)
+    cached = _cache().get_many([SCHEDULE_KEY.format(owner_id) for owner_id in owner_ids])
+    schedules = {}
+    for owner_id in owner_ids:
+        schedule = cached.get(SCHEDULE_KEY.format(owner_id))
+        if schedule is not None and schedule.version == versions[owner_id]:
+            schedules[owner_id] = schedule
+    missing = [owner_id for owner_id in owner_ids if owner_id not in schedules]
+    if missing:
+        loaded = _load(missing, versions)
+        _cache().set_many({SCHEDULE_KEY.format(owner_id): schedule for owner_id, schedule in loaded.items()},
+                          settings.SCHEDULE_CACHE_TIMEOUT)
+        schedules.update(loaded)
+    return schedules
+
+
+def owner_schedule(owner_id):
+    return owner_schedules([owner_id])[owner_id]
+
+
+def cached_schedule(owner_id):
+    """
+    the owner's schedule when the cache holds its current version, None otherwise, never reads the database
+    """
+
+    schedule = _cache().get(SCHEDULE_KEY.format(owner_id))
+    if schedule is not None and schedule.version == _versions([owner_id])[owner_id]:
+        return schedule
+    return None
+
+
+def _bump(owner_id):
+    """
+    :returns: (int) the new version of the owner's schedule
+    """
+
+    key = SCHEDULE_VERSION_KEY.format(owner_id)
+    try:
+        return _cache().incr(key)
+    except ValueError:
+        _cache().add(key, time_ns(), None)
+        return None
+
+
+@contextmanager
+def tracked_writes():
+    """
+    mark the meeting writes of the block as invalidating their schedules through `invalidate_schedule`, the
+    Meeting signals then leave the versions alone so a writer's updated schedule is still stored
+    """
+
+    token = _tracked_writes.set(True)
+    try:
+        yield
+    finally:
+        _tracked_writes.reset(token)
+
+
+def writes_tracked():
+    return _tracked_writes.get()
+
+
+def invalidate_schedule(owner_id, schedule=None):
+    """
+    bump the owner's schedule version once the write is committed. A writer passing the schedule it validated
+    against & updated in place stores it under the new version, unless another write bumped it meanwhile, so
+    its next write touches the database for the write only
+    """
+
+    def bump():
+        version = _bump(owner_id)
+        if schedule is not None and version is not None and version == schedule.version + 1:
+            schedule.version = version
+            _cache().set(SCHEDULE_KEY.format(owner_id), schedule, settings.SCHEDULE_CACHE_TIMEOUT)
+
+    transaction.on_commit(bump)
+
+
+class ScheduleListing:
+    """
+    Keyset source over an owner's schedule, the page is sliced from the cached arrays & only the fields the
+    schedule doesn't hold, i.e the title, are read with one `id IN (...)` query
+    """
+
+    def __init__(self, schedule, fields, owner):
+        self.schedule = schedule
+        self.fields = fields
+        self.owner = owner
+
+    def exists(self, after, before):
+        return bool(self.schedule.rows(after, before, limit=1))
+
+    def seek(self, after, before, descending, limit):
+        rows = self.schedule.rows(after, before, descending, limit)
+        if 'owner' in self.fields:
+            for row in rows:
+                row.owner = self.owner.username
+        missing = self.fields - SCHEDULE_FIELDS
+        if not missing or not rows:
+            return rows
+
+        columns = [column for field in missing for column in FIELD_COLUMNS.get(field, ())]
+        stored = {row.id: row for row in project_fields(Meeting.objects.filter(id__in=[row.id for row in rows]),
+                                                         missing)}
+        # a meeting deleted since the schedule was cached is left out
+        rows = [row for row in rows if row.id in stored]
+        for row in rows:
+            for column in columns:
+                setattr(row, column, getattr(stored[row.id], column))
+        return rows
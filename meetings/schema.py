@@ -1,20 +1,59 @@
+import logging
+
 from django.utils import timezone
 from django.db.models import Q
 from django.contrib.auth import authenticate
 
 from graphql import GraphQLError
 from graphene import (String, Int, Boolean, ObjectType, List, Mutation,
-                      Field, Schema)
+                      Field, Schema, DateTime, Enum, InputObjectType, NonNull)
+from graphene.relay import Connection, ConnectionField
 from graphene_django import DjangoObjectType
 
-from .models import Meeting
-from .utils import (reserve_meeting, create_or_update_meeting, delete_meeting)
+from .models import Meeting, ArchivedMeeting
+from .auth import issue_token, authenticate_request
+from .loaders import get_user_loader
+from .pagination import keyset_connection
+from .projection import MeetingRow, project
+from .selections import selected_fields
+from .schedule_cache import ScheduleListing, owner_schedule
+from .datetimes import AwareDateTime
+from .availability import availability, common_availability
+from .utils import (reserve_meeting, create_or_update_meeting, delete_meeting, create_schedule,
+                    owner_query, hold_meeting, batch_meetings, BATCH_CREATE, BATCH_UPDATE, BATCH_DELETE,
+                    BATCH_RESERVE)
+
+logger = logging.getLogger(__name__)
 
 
 def resolve_meeting_duration(obj):
     return f'{obj.slot_duration_in_minutes} minutes'
 
 
+def resolve_meeting_owner(obj, info):
+    """
+    owner's username, read from the joined user when the root resolver projected the listing or used
+    select_related, otherwise batched with all other owners of the request through the UserLoader
+    """
+
+    if isinstance(obj, MeetingRow):
+        return obj.owner
+    if Meeting.created_by.is_cached(obj):
+        return obj.created_by.username
+    return get_user_loader(info.context).load(obj.created_by_id).then(lambda user: user.username)
+
+
+def archived_meetings(info, include_archived, *filters):
+    """
+    archived meetings matching given filters to merge in a listing, None unless the client asked for them
+    with `includeArchived`
+    """
+
+    if not include_archived:
+        return None
+    return project(ArchivedMeeting.objects.filter(*filters), info)
+
+
 class MeetingType(DjangoObjectType):
     """
     Meeting type to map Django Model
@@ -34,8 +73,13 @@ class MeetingType(DjangoObjectType):
     meeting_duration = String()
     is_reserved = Boolean()
 
+    @classmethod
+    def is_type_of(cls, root, info):
+        # listings are projected on the selection, see meetings.projection
+        return isinstance(root, MeetingRow) or super().is_type_of(root, info)
+
     def resolve_owner(self, info):
-        return self.created_by.username
+        return resolve_meeting_owner(self, info)
 
     def resolve_meeting_duration(self, info):
         return resolve_meeting_duration(self)
@@ -44,6 +88,33 @@ class MeetingType(DjangoObjectType):
         return self.is_reserved
 
 
+class MeetingConnection(Connection):
+    """
+    Relay connection over meetings, paginated on (start_time, id)
+    """
+    class Meta:
+        node = MeetingType
+
+
+class FreeSlotType(ObjectType):
+    """
+    Interval where a host, or every host of a group, is free
+    """
+
+    start_time = DateTime()
+    end_time = DateTime()
+    duration_in_minutes = Int()
+
+    def resolve_start_time(self, info):
+        return self[0]
+
+    def resolve_end_time(self, info):
+        return self[1]
+
+    def resolve_duration_in_minutes(self, info):
+        return int((self[1] - self[0]).total_seconds() // 60)
+
+
 class MeetingCreateUpdateType(DjangoObjectType):
     """
     Create or Update meeting
@@ -60,7 +131,7 @@ class MeetingCreateUpdateType(DjangoObjectType):
     meeting_duration = String()
 
     def resolve_owner(self, info):
-        return self.created_by.username
+        return resolve_meeting_owner(self, info)
 
     def resolve_meeting_duration(self, info):
         return resolve_meeting_duration(self)
@@ -74,21 +145,37 @@ class PrivateView:
     @classmethod
     def validate_user(cls, info, error_message="Private view"):
         """
-        validate user is logged in
+        validate user is logged in, through a token issued by `obtainToken` in the `token` header,
+        falling back to the `username` & `password` headers
         """
 
-        username = info.context.headers.get("username")
-        password = info.context.headers.get("password")
-
-        user = authenticate(**{"username": username,
-                               "password": password}
-                            )
+        user = authenticate_request(info.context)
         if user:
             info.context.user = user
         if info.context.user.is_anonymous:
             raise GraphQLError(error_message)
 
 
+class ObtainToken(Mutation):
+    """
+    Exchange username & password for a signed token, send it in the `token` header of private requests
+    instead of the password headers to skip password hashing on every request
+    """
+    class Arguments:
+        username = String(required=True)
+        password = String(required=True)
+
+    token = String()
+
+    def mutate(self, info, username, password):
+        user = authenticate(**{"username": username,
+                               "password": password}
+                            )
+        if user is None:
+            raise GraphQLError("Invalid username or password")
+        return ObtainToken(token=issue_token(user))
+
+
 class CreateUpdateMeeting(Mutation, PrivateView):
     """
     Create or update an existing Meeting, Meeting start time shouldn't be in the past
@@ -97,7 +184,7 @@ class CreateUpdateMeeting(Mutation, PrivateView):
     class Arguments:
         meeting_id = Int()
         title = String()
-        start_time = String()
+        start_time = AwareDateTime()
         slot_duration_in_minutes = Int()
 
     ok = Boolean()
@@ -110,7 +197,7 @@ class CreateUpdateMeeting(Mutation, PrivateView):
         if meeting_id is not none, fetch the matching Meeting & update that otherwise create a new one when its None
 
         :param title: (Str) title of the meeting
-        :param start_time: (str) start time of the meeting
+        :param start_time: (datetime) start time of the meeting
         :param slot_duration_in_minutes: (Int) duration of meeting in minutes
         :param meeting_id: (int) meeting ID for cases where update is required
         """
@@ -123,6 +210,56 @@ class CreateUpdateMeeting(Mutation, PrivateView):
         return CreateUpdateMeeting(meeting=meeting, ok=ok)
 
 
+class CreateSchedule(Mutation, PrivateView):
+    """
+    Publish a whole schedule of meetings at once, the date range is split into consecutive slots
+    inside the daily windows, optionally only on the days matching an RRULE style recurrence
+    """
+    class Arguments:
+        title = String(required=True)
+        start_date = String(required=True, description="First day of the schedule, YYYY-MM-DD")
+        end_date = String(required=True, description="Last day of the schedule, YYYY-MM-DD")
+        windows = List(String, required=True, description="Daily windows i.e [\"09:00-12:00\", \"14:00-17:00\"]")
+        slot_duration_in_minutes = Int(required=True)
+        recurrence = String(description="RRULE i.e FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE")
+
+    ok = Boolean()
+    created = Int()
+
+    @classmethod
+    def mutate(cls, root, info, title, start_date, end_date, windows, slot_duration_in_minutes, recurrence=None):
+        """
+        User should be logged in, none of the slots should be in the past or overlap user's meetings
+        """
+
+        cls.validate_user(info, "You must be logged in to create a schedule")
+        meetings = create_schedule(title, start_date, end_date, windows, slot_duration_in_minutes,
+                                   info.context.user, recurrence)
+        return CreateSchedule(ok=True, created=len(meetings))
+
+
+class HoldMeeting(Mutation):
+    """
+    Allows guest users to hold a free meeting for a short while, before confirming it with reserveMeeting
+    """
+    class Arguments:
+        meeting_id = Int(required=True)
+
+    ok = Boolean()
+    hold_token = String()
+    expires_at = DateTime()
+
+    def mutate(self, info, meeting_id):
+        """
+        Meeting is held when it's free, in the future and not held by anyone else
+
+        :param meeting_id: (int) ID of the the meeting to hold
+        """
+
+        hold = hold_meeting(meeting_id)
+        return HoldMeeting(ok=True, hold_token=hold.token, expires_at=hold.expires_at)
+
+
 class ReserveMeeting(Mutation):
     """
     Allows guest users to reserve a meeting added by Registered Users
@@ -131,21 +268,24 @@ class ReserveMeeting(Mutation):
         meeting_id = Int()
         reserver_name = String()
         reserver_email = String()
+        hold_token = String()
 
     ok = Boolean()
     meeting = Field(MeetingType)
 
-    def mutate(self, info, meeting_id, reserver_name, reserver_email):
+    def mutate(self, info, meeting_id, reserver_name, reserver_email, hold_token=None):
         """
-        Meeting is reserved when it is not reserved by anyone else and its start time is in future
+        Meeting is reserved when it is not reserved by anyone else, not held by another guest and its start
+        time is in future
 
         :param meeting_id: (int) ID of the the meeting to reserve
         :param reserver_name: (Str) name of the reserver
         :param reserver_email: (Str) Valid Email ID of the reserver
+        :param hold_token: (Str) token returned by holdMeeting, if the meeting was held first
         """
 
-        print(f'{id} reserved by {reserver_name} @: {reserver_email}')
-        ok, meeting = reserve_meeting(meeting_id, reserver_name, reserver_email)
+        logger.info('reserving meeting %s for %s', meeting_id, reserver_name)
+        ok, meeting = reserve_meeting(meeting_id, reserver_name, reserver_email, hold_token)
         return ReserveMeeting(meeting=meeting, ok=ok)
 
 
@@ -171,13 +311,76 @@ class DeleteMeeting(Mutation, PrivateView):
         return message
 
 
+class MeetingAction(Enum):
+    CREATE = BATCH_CREATE
+    UPDATE = BATCH_UPDATE
+    DELETE = BATCH_DELETE
+    RESERVE = BATCH_RESERVE
+
+
+class MeetingOperationInput(InputObjectType):
+    """
+    One operation of batchMeetings, taking the arguments of the matching mutation
+    """
+    action = MeetingAction(required=True)
+    meeting_id = Int()
+    title = String()
+    start_time = AwareDateTime()
+    slot_duration_in_minutes = Int()
+    reserver_name = String()
+    reserver_email = String()
+    hold_token = String()
+
+
+class MeetingOperationResult(ObjectType):
+    action = MeetingAction()
+    ok = Boolean()
+    meeting_id = Int()
+    meeting = Field(MeetingCreateUpdateType)
+    error = String()
+
+
+class BatchMeetings(Mutation, PrivateView):
+    """
+    Create, update, delete & reserve meetings in one request. The operations are validated together, conflicts
+    between them included, and applied all at once: when any of them fails nothing is written & its result
+    holds the error. A meeting can be the target of one operation per batch. Unlike the disabled deleteMeeting,
+    DELETE operations do delete the meetings
+    """
+    class Arguments:
+        operations = List(NonNull(MeetingOperationInput), required=True)
+
+    ok = Boolean()
+    results = List(MeetingOperationResult)
+
+    @classmethod
+    def mutate(cls, root, info, operations):
+        """
+        User should be logged in, updates & deletions only apply to the user's own meetings
+
+        :param operations: (list) operations applied in order
+        """
+
+        cls.validate_user(info, "You must be logged in to batch meetings")
+        ok, results = batch_meetings(operations, info.context.user)
+        return BatchMeetings(ok=ok, results=[
+            MeetingOperationResult(action=result['action'], ok=ok and not result['error'],
+                                   meeting_id=result['meeting_id'], meeting=result['meeting'],
+                                   error=result['error'])
+            for result in results])
+
+
 class Mutation(ObjectType):
     """
     Mutation Object Type Definition
     """
+    obtain_token = ObtainToken.Field()
+    hold_meeting = HoldMeeting.Field()
     reserve_meeting = ReserveMeeting.Field()
     delete_meeting = DeleteMeeting.Field()
     create_update_meeting = CreateUpdateMeeting.Field()
+    create_schedule = CreateSchedule.Field()
+    batch_meetings = BatchMeetings.Field()
 
 
 class Query(ObjectType):
@@ -186,43 +389,79 @@ class Query(ObjectType):
 
     """
 
-    my_meetings = List(MeetingType, description="List all meeting created by LoggedIn user, irrespective of status")
-    all_meetings = List(MeetingType, description="List all meeting created by all users, irrespective of status")
-    bookable_meetings = List(MeetingType, description="List bookable meetings, having date in future "
-                                                      "and not reserved by anyone")
-    meetings_by_owner = List(MeetingType, user_name=String(), description="Query meetings by user's username, "
-                                                                          "first or last name")
+    my_meetings = ConnectionField(MeetingConnection, include_archived=Boolean(default_value=False),
+                                  description="List all meeting created by LoggedIn user, irrespective of status, "
+                                              "archived ones with includeArchived")
+    all_meetings = ConnectionField(MeetingConnection, include_archived=Boolean(default_value=False),
+                                   description="List all meeting created by all users, irrespective of status, "
+                                               "archived ones with includeArchived")
+    bookable_meetings = ConnectionField(MeetingConnection, description="List bookable meetings, having date in future "
+                                                                        "and not reserved by anyone")
+    meetings_by_owner = ConnectionField(MeetingConnection, user_name=String(),
+                                        include_archived=Boolean(default_value=False),
+                                        description="Query meetings by user's username, first or last name")
+    availability = List(FreeSlotType, owner=String(required=True), start_time=AwareDateTime(required=True),
+                        end_time=AwareDateTime(required=True), duration_in_minutes=Int(default_value=15),
+                        description="Free intervals of a host, by username, lasting at least the given duration")
+    common_availability = List(FreeSlotType, owners=List(String, required=True),
+                               start_time=AwareDateTime(required=True), end_time=AwareDateTime(required=True),
+                               duration_in_minutes=Int(default_value=15),
+                               description="Intervals where every given host, by username, is free")
 
     def resolve_bookable_meetings(self, info, **kwargs):
         """
         Get all bookable meetings i.e not reserved by anyone and start time is in the future
         """
 
-        return Meeting.objects.filter(Q(Q(reserver_name=None) & Q(start_time__gte=timezone.now())))
+        meetings = Meeting.objects.filter(Q(Q(reserved_at=None) & Q(start_time__gte=timezone.now())))
+        return keyset_connection(project(meetings, info), MeetingConnection, **kwargs)
 
-    def resolve_all_meetings(self, info, **kwargs):
+    def resolve_all_meetings(self, info, include_archived, **kwargs):
         """
         Get all available meetings, including reserved and past meetings
         """
 
-        return Meeting.objects.all()
+        return keyset_connection(project(Meeting.objects.all(), info), MeetingConnection,
+                                 archived=archived_meetings(info, include_archived), **kwargs)
 
-    def resolve_meetings_by_owner(self, info, user_name):
+    def resolve_meetings_by_owner(self, info, user_name, include_archived, **kwargs):
 
         """
         Get list of meetings created by a particular User using user's first, last or username
         """
 
-        return Meeting.objects.filter(Q(Q(created_by__username__iexact=user_name) |
-                                        Q(created_by__first_name__iexact=user_name) |
-                                        Q(created_by__last_name__iexact=user_name)))
+        meetings = Meeting.objects.filter(owner_query(user_name))
+        return keyset_connection(project(meetings, info), MeetingConnection,
+                                 archived=archived_meetings(info, include_archived, owner_query(user_name)), **kwargs)
+
+    def resolve_my_meetings(self, info, include_archived, **kwargs):
+        """
+        Get list of meetings for logged In User, paginated over the user's cached schedule unless the archived
+        meetings are listed too
+        """
+
+        PrivateView.validate_user(info, "You must be logged in to list your meetings")
+        user = info.context.user
+        if not include_archived:
+            listing = ScheduleListing(owner_schedule(user.pk), selected_fields(info, ('edges', 'node')), user)
+            return keyset_connection(listing, MeetingConnection, **kwargs)
+        meetings = Meeting.objects.filter(created_by=user)
+        return keyset_connection(project(meetings, info), MeetingConnection,
+                                 archived=archived_meetings(info, include_archived, Q(created_by=user)), **kwargs)
+
+    def resolve_availability(self, info, owner, start_time, end_time, duration_in_minutes):
+        """
+        Get free intervals of given host between start & end time
+        """
+
+        return availability(owner, start_time, end_time, duration_in_minutes)
 
-    def resolve_my_meetings(self, info):
+    def resolve_common_availability(self, info, owners, start_time, end_time, duration_in_minutes):
         """
-        Get list of meetings for logged In User
+        Get intervals where all given hosts are free between start & end time
         """
 
-        return Meeting.objects.filter(created_by=info.context.user)
+        return common_availability(owners, start_time, end_time, duration_in_minutes)
 
 
 schema = Schema(query=Query, mutation=Mutation)
@@ -0,0 +1,37 @@
+from graphql.language.ast import Field, FragmentSpread, InlineFragment
+
+
+def _collect_fields(info, selection_set, names):
+    """
+    walk a selection set, expanding fragments, and collect the requested field ASTs by name
+    """
+
+    for selection in selection_set.selections:
+        if isinstance(selection, Field):
+            names.setdefault(selection.name.value, []).append(selection)
+        elif isinstance(selection, FragmentSpread):
+            _collect_fields(info, info.fragments[selection.name.value].selection_set, names)
+        elif isinstance(selection, InlineFragment):
+            _collect_fields(info, selection.selection_set, names)
+    return names
+
+
+def selected_fields(info, path=()):
+    """
+    names of the fields requested under the field being resolved, following the given path
+    i.e `selected_fields(info, ('edges', 'node'))` for the node fields of a connection
+
+    :returns: (set) field names as sent by the client i.e {'id', 'startTime', 'owner'}
+    """
+
+    field_asts = [field_ast for field_ast in info.field_asts if field_ast.selection_set]
+    for name in path:
+        children = []
+        for field_ast in field_asts:
+            children.extend(_collect_fields(info, field_ast.selection_set, {}).get(name, []))
+        field_asts = [field_ast for field_ast in children if field_ast.selection_set]
+
+    fields = set()
+    for field_ast in field_asts:
+        fields.update(_collect_fields(info, field_ast.selection_set, {}))
+    return fields
@@ -0,0 +1,50 @@
+from django.dispatch import receiver
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+
+from .auth import invalidate_user
+from .models import Meeting
+from .sqlite import apply_pragmas
+from .owners import sync_owner_keys
+from .schedule_cache import invalidate_schedule, writes_tracked
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_credentials(sender, instance, **kwargs):
+    """
+    saved users may have a new password or be deactivated, their cached tokens state must go
+    """
+
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_owner_keys(sender, instance, using, **kwargs):
+    """
+    keep the owner keys of a saved user in line with its names, deleted users lose theirs by cascade
+    """
+
+    sync_owner_keys([instance], using)
+
+
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+def invalidate_meeting_schedule(sender, instance, **kwargs):
+    """
+    bump the owner's schedule version when a meeting is written around meetings.utils, i.e by the admin,
+    loaddata or a shell, so the next write validates against the meeting table's state
+    """
+
+    if not writes_tracked():
+        invalidate_schedule(instance.created_by_id)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """
+    apply SQLITE_PRAGMAS to every new SQLite connection
+    """
+
+    apply_pragmas(connection)
@@ -0,0 +1,56 @@
+import random
+from time import sleep
+from functools import wraps
+from threading import RLock
+
+from django.conf import settings
+from django.db import connections, OperationalError
+
+from .replicas import PRIMARY
+
+# one writer at a time per process, SQLite allows a single writer per database anyway
+_write_lock = RLock()
+
+
+def apply_pragmas(connection):
+    """
+    tune a new SQLite connection with the SQLITE_PRAGMAS setting, i.e WAL lets readers run during a write
+    """
+
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def serialized_write(function):
+    """
+    run a write path of the primary SQLite database one thread at a time, retrying with a jittered exponential
+    backoff when another process holds the write lock. A transaction upgrading from read to write fails at
+    once with "database is locked" whatever the busy timeout, queueing the writers of the process avoids it.
+    Writes to other databases run as is
+    """
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        connection = connections[PRIMARY]
+        if connection.vendor != 'sqlite' or not settings.SQLITE_SERIALIZE_WRITES:
+            return function(*args, **kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                with _write_lock:
+                    return function(*args, **kwargs)
+            except OperationalError as error:
+                # a failed statement can't be retried inside the transaction of a caller
+                if not _is_locked(error) or attempt >= settings.SQLITE_WRITE_RETRIES or connection.in_atomic_block:
+                    raise
+            sleep(settings.SQLITE_WRITE_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+    return wrapper
@@ -1,3 +1,1417 @@
-from django.test import TestCase
+# pylint: disable=too-many-lines
+import gzip
+import json
+import asyncio
+import os
+from time import sleep
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from threading import Barrier, Thread
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import pytz
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.urls import path
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase, RequestFactory, \
+    override_settings
+from graphql import GraphQLError
+from promise import Promise
+
+from zee_utils.benchmarks import run_query
+
+from .archive import archive_meetings, retention_horizon
+from .auth import authenticate_token, issue_token
+from .availability import availability, common_availability, free_gaps
+from .cache import response_cache_stats
+from .documents import document_backend, query_hash
+from .importer import MAX_REPORTED_ERRORS, MeetingImporter, read_csv, read_ics
+from .loaders import get_user_loader
+from .metrics import Histogram, LabelValues, registry
+from .models import ArchivedMeeting, Meeting, MeetingHold
+from .owners import sync_owner_keys
+from .projection import MeetingRow, project_fields
+from .replicas import PRIMARY, STICKY_COOKIE, ReplicaRouter, ReplicaStickinessMiddleware, is_pinned, use_primary
+from .datetimes import AwareDateTime, parse_datetime
+from .schedule import expand_slots
+from .schema import resolve_meeting_owner, schema
+from .sqlite import serialized_write
+from .schedule_cache import OwnerSchedule, cached_schedule, invalidate_schedule, owner_schedule
+from .utils import (BATCH_CREATE, BATCH_DELETE, BATCH_RESERVE, BATCH_UPDATE, batch_meetings, create_schedule,
+                    create_or_update_meeting, hold_meeting, release_expired_holds, reserve_meeting)
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+async def current_zone(_request):
+    return HttpResponse(timezone.get_current_timezone_name())
+
+
+class Rendezvous:
+    """
+    Requests waiting for each other, they all meet only when served concurrently
+    """
+
+    def __init__(self, parties):
+        self.parties = parties
+        self.arrived = 0
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout):
+        self.arrived += 1
+        if self.arrived == self.parties:
+            self.event.set()
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+rendezvous = {}
+
+
+async def meet(_request):
+    met = await rendezvous['current'].wait(timeout=1)
+    return HttpResponse(b'met' if met else b'alone')
+
+
+# views of the middleware tests, served through ROOT_URLCONF = 'meetings.tests'
+urlpatterns = [
+    path('zone', current_zone),
+    path('meet', meet),
+]
+
+
+class ReserveMeetingConcurrencyTests(TransactionTestCase):
+    """
+    Many guests racing for the same slot
+    """
+
+    guests = 16
+
+    def setUp(self):
+        owner = get_user_model().objects.create(username='host')
+        start_time = timezone.now() + timedelta(days=1)
+        self.meeting = Meeting.objects.create(created_by=owner, title='Hot slot', start_time=start_time,
+                                              end_time=start_time + timedelta(minutes=15))
+
+    def test_exactly_one_guest_reserves_the_slot(self):
+        barrier = Barrier(self.guests)
+        winners, losers, failures = [], [], []
+
+        def reserve(guest):
+            try:
+                barrier.wait()
+                ok, _ = reserve_meeting(self.meeting.id, f'Guest {guest}', f'guest{guest}@example.com')
+                (winners if ok else failures).append(guest)
+            except GraphQLError:
+                losers.append(guest)
+            except Exception as error:
+                failures.append(error)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=reserve, args=(guest,)) for guest in range(self.guests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(len(losers), self.guests - 1)
+        self.meeting.refresh_from_db()
+        self.assertEqual(self.meeting.reserver_name, f'Guest {winners[0]}')
+
+
+
+@override_settings(SQLITE_WRITE_RETRIES=3, SQLITE_WRITE_BACKOFF=0.01)
+class SerializedWriteTests(TransactionTestCase):
+    """
+    Writes of the process run one at a time & are retried while another process holds the write lock
+    """
+
+    @staticmethod
+    def failing(*errors):
+        """
+        write raising given errors, one per call, then returning the number of calls
+        """
+
+        calls = []
+
+        @serialized_write
+        def write():
+            calls.append(None)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return len(calls)
+        return write
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone(), ('wal',))
+
+    def test_retried_with_backoff(self):
+        write = self.failing(OperationalError('database is locked'), OperationalError('database is locked'))
+        with mock.patch('meetings.sqlite.sleep') as backoff:
+            self.assertEqual(write(), 3)
+        delays = [delay for (delay,), _ in backoff.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0.005 <= delays[0] <= 0.015 and 0.01 <= delays[1] <= 0.03)
+
+    def test_gives_up_after_retries(self):
+        write = self.failing(*[OperationalError('database is locked')] * 4)
+        with mock.patch('meetings.sqlite.sleep') as backoff, self.assertRaisesMessage(OperationalError, 'locked'):
+            write()
+        self.assertEqual(backoff.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        write = self.failing(OperationalError('no such table: meetings_meeting'))
+        with mock.patch('meetings.sqlite.sleep') as backoff, self.assertRaisesMessage(OperationalError, 'no such'):
+            write()
+        backoff.assert_not_called()
+
+    def test_not_retried_in_transaction(self):
+        write = self.failing(OperationalError('database is locked'))
+        with mock.patch('meetings.sqlite.sleep') as backoff, self.assertRaisesMessage(OperationalError, 'locked'):
+            with transaction.atomic():
+                write()
+        backoff.assert_not_called()
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=False)
+    def test_disabled(self):
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            self.failing(OperationalError('database is locked'))()
+
+    def test_one_writer_at_a_time(self):
+        writers = 8
+        barrier = Barrier(writers)
+        active, overlaps = [], []
+
+        @serialized_write
+        def write():
+            active.append(None)
+            overlaps.append(len(active))
+            sleep(0.005)
+            active.pop()
+
+        def run():
+            barrier.wait()
+            write()
+
+        threads = [Thread(target=run) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overlaps, [1] * writers)
+
+
+MEETINGS_BY_OWNER = '''
+query($name: String, $first: Int, $after: String, $last: Int, $before: String) {
+  meetingsByOwner(userName: $name, first: $first, after: $after, last: $last, before: $before) {
+    pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+    edges { node { id } }
+  }
+}
+'''
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Walking a listing page by page, in both directions
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create(username='pager')
+        start_time = timezone.now() + timedelta(days=1)
+        # two meetings share a start time, the id breaks the tie
+        starts = [start_time + timedelta(hours=hour) for hour in (0, 1, 1, 2, 3, 4, 5)]
+        meetings = [Meeting.objects.create(created_by=owner, title='Slot', start_time=start,
+                                           end_time=start + timedelta(minutes=30)) for start in starts]
+        self.expected = [str(meeting.id) for meeting in sorted(meetings, key=lambda meeting: (meeting.start_time,
+                                                                                              meeting.id))]
+
+    def page(self, **arguments):
+        return run_query(MEETINGS_BY_OWNER, variables={'name': 'pager', **arguments})['meetingsByOwner']
+
+    def test_forward_pages(self):
+        ids, page_infos, cursor = [], [], None
+        while True:
+            page = self.page(first=3, after=cursor)
+            ids.extend(edge['node']['id'] for edge in page['edges'])
+            page_infos.append(page['pageInfo'])
+            if not page['pageInfo']['hasNextPage']:
+                break
+            cursor = page['pageInfo']['endCursor']
+
+        self.assertEqual(ids, self.expected)
+        self.assertEqual([info['hasPreviousPage'] for info in page_infos], [False, True, True])
+
+    def test_backward_pages(self):
+        ids, page_infos, cursor = [], [], None
+        while True:
+            page = self.page(last=3, before=cursor)
+            ids[:0] = [edge['node']['id'] for edge in page['edges']]
+            page_infos.append(page['pageInfo'])
+            if not page['pageInfo']['hasPreviousPage']:
+                break
+            cursor = page['pageInfo']['startCursor']
+
+        self.assertEqual(ids, self.expected)
+        self.assertEqual([info['hasNextPage'] for info in page_infos], [False, True, True])
+
+    def test_next_page_is_checked_past_the_cursor(self):
+        last_page = self.page(last=2)
+        Meeting.objects.filter(id__in=[int(meeting_id) for meeting_id in self.expected[-2:]]).delete()
+
+        page = self.page(last=2, before=last_page['pageInfo']['startCursor'])
+        self.assertEqual([edge['node']['id'] for edge in page['edges']], self.expected[-4:-2])
+        self.assertFalse(page['pageInfo']['hasNextPage'])
+
+    def test_invalid_cursor(self):
+        with self.assertRaisesMessage(GraphQLError, 'Invalid cursor'):
+            self.page(first=3, after='not-a-cursor')
+
+
+class UserLoaderTests(TestCase):
+    """
+    Owners of a request are looked up with one query, through a loader that lives as long as the request
+    """
+
+    def setUp(self):
+        self.request = RequestFactory().post('/graphql')
+        get_user_model().objects.first()  # opens the connection, its setup isn't counted
+
+    @staticmethod
+    def resolve(load):
+        """
+        values of the promises `load` returns, loads made within a promise callback, like during GraphQL
+        execution, are dispatched together once it's over
+        """
+
+        return Promise.resolve(None).then(lambda _: Promise.all(load())).get()
+
+    def test_batched_lookup(self):
+        loader = get_user_loader(self.request)
+        with self.assertNumQueries(1):
+            users = self.resolve(lambda: [loader.load(user_id) for user_id in (1, 2, 3, 2, 404)])
+        self.assertEqual([user and user.username for user in users], ['edx', 'doe', 'wick', 'doe', None])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_loader(self.request).load(3).get().username, 'wick')
+
+    def test_request_scoped(self):
+        get_user_loader(self.request).load(1).get()
+        other_request = RequestFactory().post('/graphql')
+        self.assertIsNot(get_user_loader(other_request), get_user_loader(self.request))
+        with self.assertNumQueries(1):
+            get_user_loader(other_request).load(1).get()
+
+    def test_owners_of_unjoined_meetings(self):
+        meetings = list(Meeting.objects.order_by('id'))
+        info = SimpleNamespace(context=self.request)
+        with self.assertNumQueries(1):
+            owners = self.resolve(lambda: [resolve_meeting_owner(meeting, info) for meeting in meetings])
+        self.assertEqual(owners, ['wick', 'doe', 'wick', 'edx', 'edx'])
+
+
+class AuthTokenTests(TestCase):
+    """
+    Signed tokens authenticate their user until they expire or the user's credentials change
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='holder', password='secret')
+
+    def my_meetings(self, token):
+        response = self.client.post('/graphql', {'query': '{ myMeetings { edges { node { title } } } }'},
+                                    content_type='application/json', HTTP_TOKEN=token)
+        return response.json()
+
+    def test_obtain_and_use_token(self):
+        data = run_query('mutation { obtainToken(username: "holder", password: "secret") { token } }')
+        token = data['obtainToken']['token']
+        self.assertEqual(authenticate_token(token), self.user)
+        self.assertEqual(self.my_meetings(token)['data'], {'myMeetings': {'edges': []}})
+        with self.assertRaisesMessage(GraphQLError, 'Invalid username or password'):
+            run_query('mutation { obtainToken(username: "holder", password: "wrong") { token } }')
+
+    def test_tampered_token(self):
+        self.assertIsNone(authenticate_token(issue_token(self.user)[:-1]))
+        self.assertIsNone(authenticate_token('token'))
+
+    def test_expired_token(self):
+        issued_at = timezone.now().timestamp() - settings.AUTH_TOKEN_MAX_AGE - 1
+        with mock.patch('django.core.signing.time.time', return_value=issued_at):
+            token = issue_token(self.user)
+        self.assertIsNone(authenticate_token(token))
+        self.assertEqual(self.my_meetings(token)['errors'][0]['message'], 'You must be logged in to list your meetings')
+
+    def test_revoked_by_password_change(self):
+        token = issue_token(self.user)
+        self.assertEqual(authenticate_token(token), self.user)
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertIsNone(authenticate_token(token))
+        self.assertEqual(authenticate_token(issue_token(self.user)), self.user)
+
+    def test_revoked_by_deactivation(self):
+        token = issue_token(self.user)
+        self.assertEqual(authenticate_token(token), self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate_token(token))
+
+    def test_revoked_by_deletion(self):
+        token = issue_token(self.user)
+        self.assertEqual(authenticate_token(token), self.user)
+        self.user.delete()
+        self.assertIsNone(authenticate_token(token))
+
+
+class TracingTests(TestCase):
+    """
+    Traced operations report their resolvers & SQL queries, and feed the metrics histograms
+    """
+
+    query = '{ allMeetings(first: 3) { edges { node { title owner } } } }'
+
+    def setUp(self):
+        caches['default'].clear()
+
+    @staticmethod
+    def operations(label):
+        prefix = f'graphql_operation_duration_seconds_count{{operation="{label}"}} '
+        counts = [line[len(prefix):] for line in registry.exposition().splitlines() if line.startswith(prefix)]
+        return int(counts[0]) if counts else 0
+
+    def test_histogram(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 9):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.samples('latency', 'field="f",')), [
+            'latency_bucket{field="f",le="1"} 2', 'latency_bucket{field="f",le="5"} 3',
+            'latency_bucket{field="f",le="+Inf"} 4', 'latency_sum{field="f"} 13', 'latency_count{field="f"} 4',
+        ])
+
+    def test_label_values_are_bounded(self):
+        labels = LabelValues(max_size=2)
+        self.assertEqual([labels(value) for value in ('a', 'b', 'c', 'a')], ['a', 'b', 'other', 'a'])
+
+    def test_untraced_by_default(self):
+        response = self.client.post('/graphql', {'query': self.query}, content_type='application/json')
+        self.assertNotIn('tracing', response.json()['extensions'])
+
+    @override_settings(GRAPHQL_TRACING=True)
+    def test_traced_operation(self):
+        operations = self.operations('Query.allMeetings')
+        for url in ('/graphql', '/graphql-async'):
+            caches['default'].clear()
+            response = self.client.post(url, {'query': self.query}, content_type='application/json')
+            tracing = response.json()['extensions']['tracing']
+            resolvers = {tuple(resolver['path']) for resolver in tracing['execution']['resolvers']}
+            self.assertIn(('allMeetings',), resolvers)
+            self.assertIn(('allMeetings', 'edges', 0, 'node', 'owner'), resolvers)
+            self.assertGreaterEqual(tracing['sql']['count'], 1)
+            self.assertGreater(tracing['duration'], 0)
+        self.assertEqual(self.operations('Query.allMeetings'), operations + 2)
+
+    @override_settings(GRAPHQL_TRACING=True)
+    def test_metrics(self):
+        self.client.post('/graphql', {'query': self.query}, content_type='application/json')
+        response = self.client.get('/graphql/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4')
+        self.assertIn('graphql_resolver_duration_seconds_count{field="Query.allMeetings"}', response.content.decode())
+        self.assertIn('graphql_operation_sql_queries_bucket{operation="Query.allMeetings",le="+Inf"}',
+                      response.content.decode())
+        self.assertEqual(self.client.get('/graphql/metrics', REMOTE_ADDR='10.0.0.1').status_code, 403)
+
+
+class ProjectionTests(TestCase):
+    """
+    Listings read only the columns of the fields the client selected
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+
+    @staticmethod
+    def selected_columns(query):
+        """
+        meeting columns read by the listing query of given GraphQL document
+        """
+
+        with CaptureQueriesContext(connection) as context:
+            data = run_query(query)
+        listings = [captured['sql'] for captured in context.captured_queries
+                    if 'FROM "meetings_meeting"' in captured['sql']]
+        select = listings[0].split(' FROM ')[0]
+        return data, {column for column in MeetingRow.__slots__ if f'"{column}"' in select}
+
+    def test_rows(self):
+        row = project_fields(Meeting.objects.filter(id=4), {'title', 'isReserved', 'owner'}).get()
+        self.assertIsInstance(row, MeetingRow)
+        self.assertEqual((row.pk, row.title, row.owner, row.is_reserved), (4, 'The created Via Web', 'edx', True))
+        with self.assertRaises(AttributeError):
+            row.reserver_email  # pylint: disable=pointless-statement
+
+    def test_selected_columns(self):
+        data, columns = self.selected_columns('{ allMeetings(first: 2) { edges { node { title } } } }')
+        self.assertEqual(columns, {'id', 'start_time', 'title'})
+        self.assertEqual(data['allMeetings']['edges'][0]['node'], {'title': 'iOS Developers Slot'})
+
+        data, columns = self.selected_columns(
+            '{ allMeetings(first: 5) { edges { node { isReserved meetingDuration endTime } } } }')
+        self.assertEqual(columns, {'id', 'start_time', 'end_time', 'reserved_at', 'slot_duration_in_minutes'})
+        self.assertEqual([edge['node']['isReserved'] for edge in data['allMeetings']['edges']].count(True), 1)
+
+    def test_owner_is_joined(self):
+        with self.assertNumQueries(1):
+            data, columns = self.selected_columns('{ allMeetings(first: 5) { edges { node { owner } } } }')
+        self.assertEqual(columns, {'id', 'start_time', 'owner'})
+        self.assertEqual(sorted(edge['node']['owner'] for edge in data['allMeetings']['edges']),
+                         ['doe', 'edx', 'edx', 'wick', 'wick'])
+
+
+class PersistedQueryTests(TestCase):
+    """
+    Automatic Persisted Queries: clients send the hash of a query, and the query itself only when it's unknown
+    """
+
+    query = '{ bookableMeetings(first: 5) { edges { node { title } } } }'
+
+    def setUp(self):
+        caches['default'].clear()
+        document_backend.documents.clear()
+
+    def send(self, url='/graphql', query=None, sha256_hash=None):
+        body = {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha256_hash or query_hash(self.query)}}}
+        if query:
+            body['query'] = query
+        return self.client.post(url, body, content_type='application/json')
+
+    def test_miss_then_hit(self):
+        for url in ('/graphql', '/graphql-async'):
+            self.assertEqual(self.send(url).json()['errors'][0]['message'], 'PersistedQueryNotFound')
+        self.assertEqual(self.send(query=self.query).json()['data'], {'bookableMeetings': {'edges': []}})
+        for url in ('/graphql', '/graphql-async'):
+            self.assertEqual(self.send(url).json()['data'], {'bookableMeetings': {'edges': []}})
+
+    def test_hit_after_documents_are_evicted(self):
+        self.send(query=self.query)
+        document_backend.documents.clear()
+        self.assertEqual(self.send().json()['data'], {'bookableMeetings': {'edges': []}})
+
+    def test_hit_over_get(self):
+        self.send(query=self.query)
+        extensions = json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': query_hash(self.query)}})
+        response = self.client.get('/graphql', {'extensions': extensions}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['data'], {'bookableMeetings': {'edges': []}})
+
+    def test_hash_mismatch(self):
+        response = self.send(query=self.query, sha256_hash=query_hash('{ allMeetings { edges { node { id } } } }'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['message'], 'provided sha does not match query')
+        self.assertEqual(self.send().json()['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_invalid_extensions(self):
+        response = self.client.get('/graphql', {'extensions': '{'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_documents_parsed_once(self):
+        document = document_backend.document_from_string(schema, self.query)
+        self.assertIs(document_backend.document_from_string(schema, self.query), document)
+        self.assertIs(document_backend.cached_document(schema, query_hash(self.query)), document)
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Guest listings served from the response cache until the owner writes
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = get_user_model().objects.create(username='cached', first_name='Cache')
+        self.host = Client(HTTP_TOKEN=issue_token(self.owner))
+
+    def listing(self, name='cached'):
+        query = f'{{ meetingsByOwner(userName: "{name}") {{ edges {{ node {{ title }} }} }} }}'
+        response = self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+        return [edge['node']['title'] for edge in response.json()['data']['meetingsByOwner']['edges']]
+
+    def create_meeting(self, title):
+        start_time = (timezone.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+        mutation = f'''mutation {{ createUpdateMeeting(title: "{title}", startTime: "{start_time}",
+                                                         slotDurationInMinutes: 30) {{ ok }} }}'''
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.host.post('/graphql', json.dumps({'query': mutation}), content_type='application/json')
+        self.assertTrue(response.json()['data']['createUpdateMeeting']['ok'])
+
+    def test_repeated_listing_is_a_hit(self):
+        before = response_cache_stats()
+        self.assertEqual(self.listing(), [])
+        self.assertEqual(self.listing(), [])
+
+        after = response_cache_stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_hit_keeps_extensions(self):
+        query = json.dumps({'query': '{ meetingsByOwner(userName: "cached", first: 5) { edges { node { id } } } }'})
+        miss = self.client.post('/graphql', query, content_type='application/json').json()
+        hit = self.client.post('/graphql', query, content_type='application/json').json()
+
+        self.assertEqual(miss['extensions']['cost']['cost'], 11)
+        self.assertEqual(hit, miss)
+
+    async def test_async_hit_keeps_extensions(self):
+        client = AsyncClient()
+        query = json.dumps({'query': '{ allMeetings(first: 5) { edges { node { id } } } }'})
+        miss = await client.post('/graphql-async', query, content_type='application/json')
+        hit = await client.post('/graphql-async', query, content_type='application/json')
+
+        self.assertIn('cost', miss.json()['extensions'])
+        self.assertEqual(hit.json(), miss.json())
+
+    def test_stats_for_internal_clients(self):
+        self.assertEqual(self.client.get('/graphql/cache-stats').status_code, 200)
+        self.assertEqual(self.client.get('/graphql/cache-stats', REMOTE_ADDR='10.0.0.1').status_code, 403)
+        staff = get_user_model().objects.create(username='operator', is_staff=True)
+        response = self.client.get('/graphql/cache-stats', REMOTE_ADDR='10.0.0.1', HTTP_TOKEN=issue_token(staff))
+        self.assertEqual(set(response.json()), {'hits', 'misses'})
+        response = self.client.get('/graphql/cache-stats', REMOTE_ADDR='10.0.0.1',
+                                   HTTP_TOKEN=issue_token(self.owner))
+        self.assertEqual(response.status_code, 403)
+
+    def test_write_invalidates_listing(self):
+        self.assertEqual(self.listing(), [])
+        self.create_meeting('Intro')
+
+        before = response_cache_stats()
+        self.assertEqual(self.listing(), ['Intro'])
+        self.assertEqual(response_cache_stats()['misses'] - before['misses'], 1)
+
+    def test_listing_by_first_name_invalidated(self):
+        self.assertEqual(self.listing('CACHE'), [])
+        self.create_meeting('Intro')
+        self.assertEqual(self.listing('CACHE'), ['Intro'])
+
+
+class QueryCostTests(TestCase):
+    """
+    Operations over the depth, alias & cost limits are rejected before any resolver runs
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def post(self, query):
+        return self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.json().get('data'))
+        self.assertIn(message, response.json()['errors'][0]['message'])
+
+    def test_cost_reported(self):
+        response = self.post('{ allMeetings(first: 5) { edges { node { title owner } } } }')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['extensions']['cost'],
+                         {'cost': 16, 'depth': 4, 'aliases': 0, 'maxCost': 5000})
+
+    def test_large_page_rejected(self):
+        response = self.post('{ allMeetings(first: 2000) { edges { node { title owner } } } }')
+        self.assertRejected(response, 'Query costs 6001, at most 5000 is allowed')
+
+    def test_page_size_from_variables(self):
+        response = self.client.post('/graphql', json.dumps({
+            'query': 'query($size: Int) { allMeetings(first: $size) { edges { node { owner } } } }',
+            'variables': {'size': 2000}}), content_type='application/json')
+        self.assertRejected(response, 'Query costs 6001')
+
+    def test_aliases_rejected(self):
+        fields = ' '.join(f'page{index}: allMeetings(first: 1) {{ edges {{ node {{ id }} }} }}' for index in range(21))
+        self.assertRejected(self.post(f'{{ {fields} }}'), 'Query uses 21 aliases, at most 20 are allowed')
+
+    @override_settings(GRAPHQL_QUERY_LIMITS={'MAX_DEPTH': 3, 'MAX_ALIASES': 20, 'MAX_COST': 5000})
+    def test_depth_rejected(self):
+        self.assertEqual(self.post('{ allMeetings(first: 1) { pageInfo { hasNextPage } } }').status_code, 200)
+        response = self.post('{ allMeetings(first: 1) { edges { node { id } } } }')
+        self.assertRejected(response, 'Query is 4 levels deep, at most 3 are allowed')
+
+
+class ScheduleDaylightSavingTests(TestCase):
+    """
+    Schedules spanning the days clocks change on, in New York clocks skip 02:00-03:00 on 2030-03-10 & repeat
+    01:00-02:00 on 2030-11-03
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = get_user_model().objects.create(username='planner')
+
+    def slots(self, day, window):
+        with timezone.override(NEW_YORK):
+            return list(expand_slots(day, day, [window], 30))
+
+    def assertConsecutive(self, slots):
+        for start_time, end_time in slots:
+            self.assertEqual(end_time - start_time, timedelta(minutes=30))
+        for (_, previous_end), (start_time, _) in zip(slots, slots[1:]):
+            self.assertLessEqual(previous_end, start_time)
+
+    def test_skipped_hour(self):
+        slots = self.slots('2030-03-10', '01:00-04:00')
+        self.assertEqual([start_time.astimezone(NEW_YORK).strftime('%H:%M %Z') for start_time, _ in slots],
+                         ['01:00 EST', '01:30 EST', '03:00 EDT', '03:30 EDT'])
+        self.assertConsecutive(slots)
+
+    def test_repeated_hour(self):
+        slots = self.slots('2030-11-03', '00:00-03:00')
+        self.assertEqual([start_time.astimezone(NEW_YORK).strftime('%H:%M %Z') for start_time, _ in slots],
+                         ['00:00 EDT', '00:30 EDT', '01:00 EDT', '01:30 EDT', '02:00 EST', '02:30 EST'])
+        self.assertConsecutive(slots)
+
+    def test_create_schedule_across_change(self):
+        with timezone.override(NEW_YORK):
+            meetings = create_schedule('Office hours', '2030-03-09', '2030-03-11', ['01:00-04:00'], 30, self.owner)
+
+        self.assertEqual(len(meetings), 16)
+        self.assertEqual(Meeting.objects.filter(created_by=self.owner).count(), 16)
+        self.assertConsecutive([(meeting.start_time, meeting.end_time) for meeting in meetings])
+
+    def test_slot_limit_stops_expansion(self):
+        with self.assertRaisesMessage(GraphQLError, 'Schedule has more than 10000 slots'):
+            create_schedule('Office hours', '2030-01-01', '2129-12-31', ['00:00-23:45'], 15, self.owner)
+        self.assertFalse(Meeting.objects.filter(created_by=self.owner).exists())
+
+
+class ParseDateTimeTests(TestCase):
+    """
+    Date times without offset read in the request's time zone
+    """
+
+    def test_offset_kept(self):
+        date_time = parse_datetime('2030-03-10T02:30:00+05:00', NEW_YORK)
+        self.assertEqual(date_time.utcoffset(), timedelta(hours=5))
+
+    def test_utc_suffix(self):
+        self.assertEqual(parse_datetime('2030-03-10T07:30:00Z').utcoffset(), timedelta(0))
+
+    def test_skipped_wall_time(self):
+        with self.assertRaisesMessage(GraphQLError, "2030-03-10T02:30:00 doesn't exist in America/New_York"):
+            parse_datetime('2030-03-10T02:30:00', NEW_YORK)
+
+    def test_repeated_wall_time_is_first_occurrence(self):
+        date_time = parse_datetime('2030-11-03T01:30:00', NEW_YORK)
+        self.assertEqual(date_time.utcoffset(), timedelta(hours=-4))
+
+    def test_invalid_value(self):
+        with self.assertRaisesMessage(GraphQLError, 'Invalid date time, expected ISO 8601 format'):
+            parse_datetime('10/03/2030 02:30', NEW_YORK)
+
+    def test_scalar_in_request_time_zone(self):
+        with timezone.override(NEW_YORK):
+            with self.assertRaisesMessage(GraphQLError, "doesn't exist in America/New_York"):
+                AwareDateTime.parse_value('2030-03-10T02:30:00')
+            with self.assertRaisesMessage(GraphQLError, "doesn't exist in America/New_York"):
+                AwareDateTime.parse_value(datetime(2030, 3, 10, 2, 30))
+            self.assertEqual(AwareDateTime.parse_value(datetime(2030, 11, 3, 1, 30)).utcoffset(), timedelta(hours=-4))
+            self.assertEqual(AwareDateTime.parse_value('2030-11-03T01:30:00').utcoffset(), timedelta(hours=-4))
+
+    def test_skipped_wall_time_in_mutation(self):
+        owner = get_user_model().objects.create(username='skipper')
+        with timezone.override(NEW_YORK), self.assertRaisesMessage(GraphQLError, "doesn't exist in America/New_York"):
+            run_query('mutation { createUpdateMeeting(title: "Intro", startTime: "2030-03-10T02:30:00", '
+                      'slotDurationInMinutes: 30) { ok } }', owner)
+
+    def test_skipped_wall_time_in_variables(self):
+        owner = get_user_model().objects.create(username='skipper')
+        with timezone.override(NEW_YORK), self.assertRaisesMessage(GraphQLError, "doesn't exist in America/New_York"):
+            run_query('mutation Create($start: AwareDateTime!) { createUpdateMeeting(title: "Intro", '
+                      'startTime: $start, slotDurationInMinutes: 30) { ok } }', owner, {'start': '2030-03-10T02:30:00'})
+
+
+class MeetingHoldTests(TestCase):
+    """
+    A held meeting can only be reserved with its hold token until the hold expires
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        owner = get_user_model().objects.create(username='holder')
+        start_time = timezone.now() + timedelta(days=1)
+        self.meeting = Meeting.objects.create(created_by=owner, title='Held', start_time=start_time,
+                                              end_time=start_time + timedelta(minutes=30))
+
+    def expire(self, hold):
+        MeetingHold.objects.filter(id=hold.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_hold_blocks_other_guests(self):
+        hold = hold_meeting(self.meeting.id)
+        with self.assertRaisesMessage(GraphQLError, 'Meeting is held by another candidate'):
+            reserve_meeting(self.meeting.id, 'Guest', 'guest@example.com')
+        with self.assertRaisesMessage(GraphQLError, 'Meeting is held by another candidate'):
+            reserve_meeting(self.meeting.id, 'Guest', 'guest@example.com', 'not-the-token')
+        with self.assertRaisesMessage(GraphQLError, 'Meeting is held by another candidate'):
+            hold_meeting(self.meeting.id)
+
+        reserved, meeting = reserve_meeting(self.meeting.id, 'Holder', 'holder@example.com', hold.token)
+        self.assertTrue(reserved)
+        self.assertEqual(meeting.reserver_email, 'holder@example.com')
+        self.assertFalse(MeetingHold.objects.filter(meeting_id=self.meeting.id).exists())
+
+    def test_expired_hold_is_replaced(self):
+        self.expire(hold_meeting(self.meeting.id))
+        hold = hold_meeting(self.meeting.id)
+        self.assertEqual(list(MeetingHold.objects.filter(meeting_id=self.meeting.id)), [hold])
+
+    def test_expired_hold_does_not_block(self):
+        self.expire(hold_meeting(self.meeting.id))
+        reserved, _ = reserve_meeting(self.meeting.id, 'Guest', 'guest@example.com')
+        self.assertTrue(reserved)
+
+    def test_reserved_meeting_cannot_be_held(self):
+        reserve_meeting(self.meeting.id, 'Guest', 'guest@example.com')
+        with self.assertRaisesMessage(GraphQLError, 'Meeting is not available'):
+            hold_meeting(self.meeting.id)
+
+    def test_release_expired_holds(self):
+        start_time = self.meeting.start_time + timedelta(hours=1)
+        other = Meeting.objects.create(created_by=self.meeting.created_by, title='Held', start_time=start_time,
+                                       end_time=start_time + timedelta(minutes=30))
+        self.expire(hold_meeting(self.meeting.id))
+        active = hold_meeting(other.id)
+
+        self.assertEqual(release_expired_holds(batch_size=1), 1)
+        self.assertEqual(list(MeetingHold.objects.all()), [active])
+
+
+class OwnerLookupTests(TestCase):
+    """
+    meetingsByOwner matches the username, first or last name of the owners regardless of case
+    """
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username='Renamer', first_name='Anna', last_name='Straße')
+        start_time = timezone.now() + timedelta(days=1)
+        Meeting.objects.create(created_by=self.owner, title='Intro', start_time=start_time,
+                               end_time=start_time + timedelta(minutes=30))
+
+    def titles(self, name):
+        data = run_query('query($name: String) { meetingsByOwner(userName: $name) { edges { node { title } } } }',
+                         variables={'name': name})
+        return [edge['node']['title'] for edge in data['meetingsByOwner']['edges']]
+
+    def test_any_case(self):
+        for name in ('renamer', 'RENAMER', 'anna', 'STRASSE', 'straße'):
+            self.assertEqual(self.titles(name), ['Intro'], name)
+
+    def test_after_rename(self):
+        self.owner.username = 'Moved'
+        self.owner.last_name = ''
+        self.owner.save()
+
+        self.assertEqual(self.titles('renamer'), [])
+        self.assertEqual(self.titles('strasse'), [])
+        self.assertEqual(self.titles('MOVED'), ['Intro'])
+        self.assertEqual(self.titles('Anna'), ['Intro'])
+
+    def test_bulk_created_users(self):
+        get_user_model().objects.bulk_create([get_user_model()(username='Bulk')])
+        guest = get_user_model().objects.get(username='Bulk')
+        start_time = timezone.now() + timedelta(days=1)
+        Meeting.objects.create(created_by=guest, title='Bulk intro', start_time=start_time,
+                               end_time=start_time + timedelta(minutes=30))
+
+        self.assertEqual(self.titles('bulk'), [])
+        sync_owner_keys([guest])
+        self.assertEqual(self.titles('bulk'), ['Bulk intro'])
+
+
+class ArchiveTests(TestCase):
+    """
+    Finished meetings moved out of the meeting table stay listed with includeArchived
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = get_user_model().objects.create(username='archivist')
+        now = timezone.now().replace(microsecond=0)
+        self.meetings = [Meeting.objects.create(created_by=self.owner, title=f'Day {days}',
+                                                start_time=now + timedelta(days=days),
+                                                end_time=now + timedelta(days=days, minutes=30))
+                         for days in (-90, -60, -40, -10, 5)]
+        self.horizon = retention_horizon(30)
+        self.expired = Meeting.objects.filter(end_time__lt=self.horizon).count()
+
+    def titles(self, query, user=None, **variables):
+        data = run_query(query, user, variables)
+        return [edge['node']['title'] for edge in next(iter(data.values()))['edges']]
+
+    def test_archive_to_table(self):
+        progress = []
+        with self.captureOnCommitCallbacks(execute=True):
+            archived = archive_meetings(before=self.horizon, batch_size=2, progress=progress.append)
+
+        self.assertEqual(archived, self.expired)
+        self.assertEqual(progress[-1], self.expired)
+        self.assertFalse(Meeting.objects.filter(end_time__lt=self.horizon).exists())
+        self.assertEqual(list(ArchivedMeeting.objects.filter(created_by=self.owner).order_by('start_time')
+                              .values_list('id', flat=True)), [meeting.id for meeting in self.meetings[:3]])
+        self.assertEqual(archive_meetings(before=self.horizon), 0)
+
+    def test_listings_with_archived(self):
+        archive_meetings(before=self.horizon)
+        by_owner = '''query($archived: Boolean, $first: Int) {
+          meetingsByOwner(userName: "archivist", includeArchived: $archived, first: $first) {
+            edges { node { title } }
+          }
+        }'''
+        mine = '''query($archived: Boolean) {
+          myMeetings(includeArchived: $archived) { edges { node { title } } }
+        }'''
+        every_title = [meeting.title for meeting in self.meetings]
+
+        self.assertEqual(self.titles(by_owner, archived=False), every_title[3:])
+        self.assertEqual(self.titles(by_owner, archived=True), every_title)
+        self.assertEqual(self.titles(by_owner, archived=True, first=2), every_title[:2])
+        self.assertEqual(self.titles(mine, self.owner, archived=False), every_title[3:])
+        self.assertEqual(self.titles(mine, self.owner, archived=True), every_title)
+
+    def test_archive_to_file(self):
+        with TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, 'archive.ndjson.gz')
+            archived = archive_meetings(before=self.horizon, batch_size=2, path=archive_path)
+            with gzip.open(archive_path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+
+        self.assertEqual(archived, len(rows))
+        self.assertEqual([row['title'] for row in rows if row['created_by_id'] == self.owner.id],
+                         ['Day -90', 'Day -60', 'Day -40'])
+        self.assertFalse(ArchivedMeeting.objects.exists())
+        self.assertFalse(Meeting.objects.filter(end_time__lt=self.horizon).exists())
+
+
+class AvailabilityTests(TestCase):
+    """
+    Free gaps of hosts between their meetings
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.day = datetime(2030, 6, 3, 9, tzinfo=pytz.utc)
+        self.hosts = [get_user_model().objects.create(username=username) for username in ('ann', 'bob')]
+
+    def at(self, hour, minute=0):
+        return self.day.replace(hour=hour, minute=minute)
+
+    def meet(self, host, start_time, end_time):
+        Meeting.objects.create(created_by=host, title='Busy', start_time=start_time, end_time=end_time)
+
+    def test_gaps_between_overlapping_and_nested_meetings(self):
+        busy = [(self.at(9), self.at(11)), (self.at(9, 30), self.at(10)), (self.at(10, 30), self.at(12)),
+                (self.at(13), self.at(13, 10))]
+        self.assertEqual(free_gaps(busy, self.at(8), self.at(15), timedelta(minutes=15)),
+                         [(self.at(8), self.at(9)), (self.at(12), self.at(13)), (self.at(13, 10), self.at(15))])
+        self.assertEqual(free_gaps(busy, self.at(8), self.at(15), timedelta(hours=1, minutes=30)),
+                         [(self.at(13, 10), self.at(15))])
+
+    def test_availability_of_host(self):
+        ann, _ = self.hosts
+        self.meet(ann, self.at(10), self.at(11))
+        self.meet(ann, self.at(11), self.at(11, 30))
+        self.assertEqual(availability('ann', self.at(9), self.at(13), 30),
+                         [(self.at(9), self.at(10)), (self.at(11, 30), self.at(13))])
+
+    def test_common_availability(self):
+        ann, bob = self.hosts
+        self.meet(ann, self.at(10), self.at(11))
+        self.meet(bob, self.at(10, 30), self.at(12))
+        self.assertEqual(common_availability(['ann', 'bob', 'ann'], self.at(9), self.at(13), 30),
+                         [(self.at(9), self.at(10)), (self.at(12), self.at(13))])
+        with self.assertRaisesMessage(GraphQLError, 'No user found matching the given username: nobody'):
+            common_availability(['ann', 'nobody'], self.at(9), self.at(13), 30)
+
+    def test_availability_query(self):
+        self.meet(self.hosts[0], self.at(10), self.at(12))
+        data = run_query('{ availability(owner: "ann", startTime: "2030-06-03T09:00:00+00:00", '
+                         'endTime: "2030-06-03T13:00:00+00:00", durationInMinutes: 60) { startTime endTime } }')
+        self.assertEqual(data['availability'], [
+            {'startTime': '2030-06-03T09:00:00+00:00', 'endTime': '2030-06-03T10:00:00+00:00'},
+            {'startTime': '2030-06-03T12:00:00+00:00', 'endTime': '2030-06-03T13:00:00+00:00'},
+        ])
+
+
+class ExportMeetingsTests(TestCase):
+    """
+    Users export their own meetings, staff users any owner's
+    """
+
+    def export(self, username, **params):
+        user = get_user_model().objects.get(username=username)
+        response = self.client.get('/meetings/export', {'format': 'ndjson', **params}, HTTP_TOKEN=issue_token(user))
+        if response.status_code != 200:
+            return response.status_code
+        return sorted(json.loads(line)['title'] for line in b''.join(response.streaming_content).splitlines())
+
+    def test_own_meetings(self):
+        self.assertEqual(self.export('wick'), ['iOS Developer Round, Detailed', 'iOS Developers Slot'])
+        self.assertEqual(self.export('edx'), ['Automation for QA Team', 'The created Via Web'])
+
+    def test_staff_exports_any_owner(self):
+        self.assertEqual(self.export('edx', owner='doe'), ['Manual QA Post'])
+        self.assertEqual(self.export('edx', owner='Doe'), ['Manual QA Post'])
+
+    def test_owner_is_staff_only(self):
+        self.assertEqual(self.export('wick', owner='doe'), 403)
+
+    def test_anonymous(self):
+        self.assertEqual(self.client.get('/meetings/export').status_code, 401)
+
+
+class ScheduleCacheTests(TestCase):
+    """
+    Cached owner schedules, stored back by a writer only when no other write happened meanwhile
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = get_user_model().objects.create(username='scheduler')
+        self.start_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def create_meeting(self, hours):
+        start_time = self.start_time + timedelta(hours=hours)
+        return Meeting.objects.create(created_by=self.owner, title='Slot', start_time=start_time,
+                                      end_time=start_time + timedelta(minutes=30))
+
+    def write(self, schedule, meeting):
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.add(meeting.start_time, meeting.end_time, meeting.id)
+            invalidate_schedule(self.owner.pk, schedule)
+
+    def test_writer_stores_its_schedule(self):
+        schedule = owner_schedule(self.owner.pk)
+        meeting = self.create_meeting(0)
+        self.write(schedule, meeting)
+
+        cached = cached_schedule(self.owner.pk)
+        self.assertEqual(cached.version, schedule.version)
+        self.assertEqual(list(cached.ids), [meeting.id])
+
+    def test_concurrent_writers(self):
+        first, second = owner_schedule(self.owner.pk), owner_schedule(self.owner.pk)
+        self.assertEqual(first.version, second.version)
+        first_meeting, second_meeting = self.create_meeting(0), self.create_meeting(1)
+
+        self.write(first, first_meeting)
+        self.write(second, second_meeting)
+
+        # the second writer's copy misses the first meeting, storing it would hide that meeting
+        self.assertIsNone(cached_schedule(self.owner.pk))
+        self.assertEqual(list(owner_schedule(self.owner.pk).ids), [first_meeting.id, second_meeting.id])
+
+    def test_write_without_schedule_drops_cached_one(self):
+        owner_schedule(self.owner.pk)
+        meeting = self.create_meeting(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_schedule(self.owner.pk)
+
+        self.assertIsNone(cached_schedule(self.owner.pk))
+        self.assertEqual(list(owner_schedule(self.owner.pk).ids), [meeting.id])
+
+    def test_rolled_back_write_keeps_version(self):
+        schedule = owner_schedule(self.owner.pk)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            invalidate_schedule(self.owner.pk, schedule)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cached_schedule(self.owner.pk).version, schedule.version)
+
+    def test_meeting_saved_around_utils_bumps_version(self):
+        owner_schedule(self.owner.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting = self.create_meeting(0)
+        self.assertIsNone(cached_schedule(self.owner.pk))
+
+        owner_schedule(self.owner.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting.delete()
+        self.assertIsNone(cached_schedule(self.owner.pk))
+
+    def test_tracked_write_stores_schedule(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting = create_or_update_meeting('Intro', self.start_time, 30, self.owner, None)
+        self.assertEqual(list(cached_schedule(self.owner.pk).ids), [meeting.id])
+
+    def test_stale_schedule_doesnt_accept_overlaps(self):
+        owner_schedule(self.owner.pk)
+        # bulk inserts send no signal, the cached schedule misses this meeting
+        Meeting.objects.bulk_create([Meeting(created_by=self.owner, title='Slot', start_time=self.start_time,
+                                             end_time=self.start_time + timedelta(minutes=30))])
+        self.assertIsNotNone(cached_schedule(self.owner.pk))
+
+        with self.assertRaisesMessage(GraphQLError, 'You already have a slot booked for this time'):
+            create_or_update_meeting('Intro', self.start_time + timedelta(minutes=15), 30, self.owner, None)
+        with self.assertRaisesMessage(GraphQLError, 'You already have a slot booked for this time'):
+            create_schedule('Office hours', self.start_time.date().isoformat(),
+                            self.start_time.date().isoformat(), ['00:00-23:45'], 15, self.owner)
+        ok, results = batch_meetings([{'action': BATCH_CREATE, 'title': 'Intro', 'slot_duration_in_minutes': 30,
+                                       'start_time': self.start_time - timedelta(minutes=15)}], self.owner)
+        self.assertFalse(ok)
+        self.assertTrue(results[0]['error'].startswith('You already have a slot booked for this time'))
+        self.assertEqual(Meeting.objects.filter(created_by=self.owner).count(), 1)
+
+    def test_schedule_lookups(self):
+        meetings = [self.create_meeting(hours) for hours in (0, 0, 1)]
+        schedule = OwnerSchedule(self.owner.pk, 1, [(meeting.start_time, meeting.end_time, meeting.id, None)
+                                                     for meeting in meetings])
+        reserved_at = timezone.now().replace(microsecond=0)
+        schedule.reserve(meetings[1].id, reserved_at)
+
+        self.assertEqual(schedule.overlapping(self.start_time + timedelta(minutes=10), self.start_time +
+                                              timedelta(minutes=20), exclude=meetings[0].id)[2], meetings[1].id)
+        self.assertEqual(schedule.discard(meetings[1].id), reserved_at)
+        self.assertNotIn(meetings[1].id, schedule)
+        self.assertIsNone(schedule.discard(meetings[1].id))
+
+        schedule.move(meetings[0].id, self.start_time + timedelta(hours=2), self.start_time + timedelta(hours=3))
+        self.assertEqual(list(schedule.ids), [meetings[2].id, meetings[0].id])
+        self.assertIsNone(schedule.overlapping(self.start_time, self.start_time + timedelta(minutes=30)))
+
+
+class BatchMeetingsTests(TestCase):
+    """
+    Batches applied as a whole or not at all
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.host = get_user_model().objects.create(username='batcher')
+        self.guest_host = get_user_model().objects.create(username='other-host')
+        self.start_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.first, self.second = [self.create_meeting(self.host, hours) for hours in (0, 2)]
+        self.bookable = self.create_meeting(self.guest_host, 0)
+
+    def create_meeting(self, owner, hours):
+        start_time = self.start_time + timedelta(hours=hours)
+        return Meeting.objects.create(created_by=owner, title='Slot', start_time=start_time,
+                                      end_time=start_time + timedelta(minutes=30), slot_duration_in_minutes=30)
+
+    def operation(self, action, meeting_id=None, hours=None, **values):
+        if hours is not None:
+            values.update(title='Batched', start_time=self.start_time + timedelta(hours=hours),
+                          slot_duration_in_minutes=30)
+        return dict(values, action=action, meeting_id=meeting_id)
+
+    def snapshot(self):
+        return list(Meeting.objects.order_by('id').values_list('id', 'title', 'start_time', 'reserver_email'))
+
+    def assertRolledBack(self, operations, errors):
+        """
+        :param errors: (list) the expected start of each operation's error, None for valid operations
+        """
+
+        before = self.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            ok, results = batch_meetings(operations, self.host)
+
+        self.assertFalse(ok)
+        self.assertEqual([result['error'] and result['error'][:len(error or '')] for result, error in
+                          zip(results, errors)], errors)
+        self.assertTrue(all(result['meeting'] is None for result in results))
+        self.assertEqual(self.snapshot(), before)
+
+    def test_applied(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ok, results = batch_meetings([
+                self.operation(BATCH_CREATE, hours=4),
+                self.operation(BATCH_UPDATE, self.first.id, hours=1),
+                self.operation(BATCH_DELETE, self.second.id),
+                self.operation(BATCH_RESERVE, self.bookable.id, reserver_name='Host', reserver_email='h@example.com'),
+            ], self.host)
+
+        self.assertTrue(ok)
+        self.assertEqual([result['error'] for result in results], [None] * 4)
+        created = Meeting.objects.get(id=results[0]['meeting_id'])
+        self.assertEqual(created.start_time, self.start_time + timedelta(hours=4))
+        self.assertEqual(Meeting.objects.get(id=self.first.id).start_time, self.start_time + timedelta(hours=1))
+        self.assertFalse(Meeting.objects.filter(id=self.second.id).exists())
+        self.assertEqual(Meeting.objects.get(id=self.bookable.id).reserver_email, 'h@example.com')
+        self.assertEqual(list(owner_schedule(self.host.pk).ids), [self.first.id, created.id])
+
+    def test_conflict_between_operations(self):
+        self.assertRolledBack([
+            self.operation(BATCH_DELETE, self.second.id),
+            self.operation(BATCH_CREATE, hours=4),
+            self.operation(BATCH_UPDATE, self.first.id, hours=4),
+        ], [None, None, 'You already have a slot booked for this time'])
+
+    def test_meeting_targeted_twice(self):
+        self.assertRolledBack([
+            self.operation(BATCH_UPDATE, self.first.id, hours=1),
+            self.operation(BATCH_DELETE, self.first.id),
+        ], [None, 'Meeting is already changed by a previous operation of the batch'])
+
+    def test_reservation_lost_while_applying(self):
+        reserve_meeting(self.bookable.id, 'Guest', 'guest@example.com')
+        self.assertRolledBack([
+            self.operation(BATCH_CREATE, hours=4),
+            self.operation(BATCH_RESERVE, self.bookable.id, reserver_name='Host', reserver_email='h@example.com'),
+        ], [None, "Meeting is not available, it's either reserved, over or doesn't exist"])
+
+    def test_batch_mutation(self):
+        data = run_query('''mutation($operations: [MeetingOperationInput!]!) {
+          batchMeetings(operations: $operations) { ok results { action ok error meeting { id } } }
+        }''', self.host, {'operations': [
+            {'action': 'DELETE', 'meetingId': self.first.id},
+            {'action': 'DELETE', 'meetingId': self.bookable.id},
+        ]})['batchMeetings']
+
+        self.assertFalse(data['ok'])
+        self.assertEqual([result['ok'] for result in data['results']], [False, False])
+        self.assertIsNone(data['results'][0]['error'])
+        self.assertIsNotNone(data['results'][1]['error'])
+        self.assertEqual(Meeting.objects.filter(id__in=[self.first.id, self.bookable.id]).count(), 2)
+
+
+@override_settings(REPLICA_DATABASES=['replica_0'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    """
+    Reads go to the replicas, except those of mutations & of the clients who just wrote
+    """
+
+    router = ReplicaRouter()
+
+    def routed(self, request, write=False):
+        """
+        response of a request through the stickiness middleware & the database its view reads from
+        """
+
+        reads = []
+
+        def view(_request):
+            reads.append(self.router.db_for_read(Meeting))
+            if write:
+                self.router.db_for_write(Meeting)
+            return HttpResponse()
+
+        return ReplicaStickinessMiddleware(view)(request), reads[0]
+
+    def test_reads_from_replicas(self):
+        self.assertEqual(self.router.db_for_read(Meeting), 'replica_0')
+        with use_primary():
+            self.assertTrue(is_pinned())
+            self.assertEqual(self.router.db_for_read(Meeting), PRIMARY)
+        self.assertFalse(is_pinned())
+        self.assertEqual(self.router.db_for_write(Meeting), PRIMARY)
+
+    def test_writer_is_pinned(self):
+        response, database = self.routed(RequestFactory().post('/graphql'), write=True)
+        self.assertEqual(database, 'replica_0')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 5)
+
+        request = RequestFactory().get('/graphql')
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        response, database = self.routed(request)
+        self.assertEqual(database, PRIMARY)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_reader_is_not_pinned(self):
+        response, _ = self.routed(RequestFactory().get('/graphql'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        response, database = self.routed(RequestFactory().post('/graphql'), write=True)
+        self.assertEqual(database, PRIMARY)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_mutation_reads_from_primary(self):
+        # replica_0 isn't configured, a read routed to it would fail
+        owner = get_user_model().objects.create(username='writer')
+        start_time = (timezone.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+        query = 'mutation($start: AwareDateTime!) { createUpdateMeeting(title: "Intro", startTime: $start, ' \
+                'slotDurationInMinutes: 30) { ok } }'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/graphql', {'query': query, 'variables': {'start': start_time}},
+                                        content_type='application/json', HTTP_TOKEN=issue_token(owner))
+        self.assertEqual(response.json()['data'], {'createUpdateMeeting': {'ok': True}})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        response = self.client.post('/graphql', {'query': '{ myMeetings { edges { node { title } } } }'},
+                                    content_type='application/json', HTTP_TOKEN=issue_token(owner))
+        self.assertEqual(response.json()['data'], {'myMeetings': {'edges': [{'node': {'title': 'Intro'}}]}})
+
+
+@override_settings(ROOT_URLCONF='meetings.tests')
+class TimeZoneMiddlewareTests(SimpleTestCase):
+    """
+    The Time-Zone header applies under WSGI & ASGI alike
+    """
+
+    def test_sync_request(self):
+        self.assertEqual(self.client.get('/zone', HTTP_TIME_ZONE='Asia/Karachi').content, b'Asia/Karachi')
+        self.assertEqual(self.client.get('/zone', HTTP_TIME_ZONE='Mars/Olympus').content, b'UTC')
+
+    async def test_async_request(self):
+        client = AsyncClient()
+        # Django 3.2's AsyncClient sends its extra arguments as raw header names
+        response = await client.get('/zone', **{'time-zone': 'Asia/Karachi'})
+        self.assertEqual(response.content, b'Asia/Karachi')
+        self.assertEqual((await client.get('/zone')).content, b'UTC')
+
+
+@override_settings(ROOT_URLCONF='meetings.tests')
+class AsgiConcurrencyTests(SimpleTestCase):
+    """
+    The middleware chain lets ASGI requests run concurrently instead of one at a time on a single thread
+    """
+
+    async def test_concurrent_requests(self):
+        rendezvous['current'] = Rendezvous(4)
+        client = AsyncClient()
+        responses = await asyncio.gather(*(client.get('/meet') for _ in range(4)))
+        self.assertEqual([response.content for response in responses], [b'met'] * 4)
+
+
+class MeetingImportTests(TestCase):
+    """
+    Rows imported in batches, each committed batch invalidating the owners it changed, invalid rows are
+    skipped & reported
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = get_user_model().objects.create(username='importer')
+        self.start_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def row(self, hours, **values):
+        return {'owner': 'importer', 'title': 'Imported', 'slot_duration_in_minutes': '30',
+                'start_time': (self.start_time + timedelta(hours=hours)).isoformat(), **values}
+
+    def test_interrupted_import_invalidates_flushed_batches(self):
+        owner_schedule(self.owner.pk)
+
+        def interrupt(importer):
+            raise KeyboardInterrupt
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(KeyboardInterrupt):
+            MeetingImporter(batch_size=2).run([self.row(hours) for hours in range(5)], progress=interrupt)
+
+        self.assertEqual(Meeting.objects.filter(created_by=self.owner).count(), 2)
+        self.assertIsNone(cached_schedule(self.owner.pk))
+        self.assertEqual(len(owner_schedule(self.owner.pk)), 2)
+
+    def test_row_errors(self):
+        Meeting.objects.create(created_by=self.owner, title='Booked', start_time=self.start_time,
+                               end_time=self.start_time + timedelta(minutes=30))
+        rows = [
+            self.row(1),
+            self.row(2, owner='nobody'),
+            self.row(3, title=' '),
+            self.row(4, start_time='tomorrow'),
+            self.row(5, slot_duration_in_minutes='7'),
+            self.row(6, reserver_name='Guest'),
+            self.row(7, reserver_name='Guest', reserver_email='guest'),
+            self.row(0),
+            self.row(1, start_time=(self.start_time + timedelta(hours=1, minutes=15)).isoformat()),
+            self.row(8, reserver_name='Guest', reserver_email='guest@example.com'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            report = MeetingImporter(batch_size=3).run(rows)
+
+        self.assertEqual((report['read'], report['imported'], report['rejected']), (10, 2, 8))
+        self.assertEqual(report['errors'], [
+            'row 2: Unknown owner: nobody',
+            'row 3: Meeting title should not be empty',
+            'row 4: Invalid date time, expected ISO 8601 format: tomorrow',
+            'row 5: Invalid Meeting duration, expected values are :[15, 30, 45]',
+            "row 6: Name & emails shouldn't be empty strings",
+            'row 7: Invalid Email, please provide a correct Email',
+            f'row 8: Meeting overlaps another meeting of importer at {self.start_time.isoformat()}',
+            f'row 9: Meeting overlaps another meeting of importer at '
+            f'{(self.start_time + timedelta(hours=1, minutes=15)).isoformat()}',
+        ])
+        reserved = Meeting.objects.get(created_by=self.owner, reserver_email='guest@example.com')
+        self.assertIsNotNone(reserved.reserved_at)
+
+    def test_reported_errors_are_capped(self):
+        report = MeetingImporter().run([self.row(hours, owner='nobody') for hours in range(MAX_REPORTED_ERRORS + 5)])
+        self.assertEqual(report['rejected'], MAX_REPORTED_ERRORS + 5)
+        self.assertEqual(len(report['errors']), MAX_REPORTED_ERRORS)
+
+    def test_csv_rows(self):
+        start_time, end_time = self.start_time.isoformat(), (self.start_time + timedelta(minutes=45)).isoformat()
+        lines = ['title,owner,start_time,end_time\n', f'Intro,importer,{start_time},{end_time}\n',
+                 f'Late,importer,{start_time},{start_time}\n']
+        report = MeetingImporter().run(read_csv(lines))
+        self.assertEqual((report['imported'], report['rejected']), (1, 1))
+        self.assertEqual(Meeting.objects.get(created_by=self.owner).slot_duration_in_minutes, 45)
+
+    def test_ics_rows(self):
+        lines = [
+            'BEGIN:VCALENDAR',
+            'BEGIN:VEVENT', 'SUMMARY:Intro', 'ORGANIZER;CN=importer:mailto:importer@example.com',
+            'DTSTART:20300603T090000Z', 'DTEND:20300603T093000Z', 'END:VEVENT',
+            'BEGIN:VEVENT', 'SUMMARY:Typo', 'ORGANIZER;CN=importer:mailto:importer@example.com',
+            'DTSTART:2030-06-03 10:00', 'DTEND:20300603T103000Z', 'END:VEVENT',
+            'BEGIN:VEVENT', 'SUMMARY:Far away', 'ORGANIZER;CN=importer:mailto:importer@example.com',
+            'DTSTART;TZID=Mars/Olympus:20300603T110000', 'DTEND;TZID=Mars/Olympus:20300603T113000', 'END:VEVENT',
+            'BEGIN:VEVENT', 'SUMMARY:Karachi', 'ORGANIZER;CN=importer:mailto:importer@example.com',
+            'DTSTART;TZID=Asia/Karachi:20300603T170000', 'DTEND;TZID=Asia/Karachi:20300603T173000', 'END:VEVENT',
+            'END:VCALENDAR',
+        ]
+        report = MeetingImporter().run(read_ics(lines))
+        self.assertEqual(report['errors'], [
+            'row 2: Invalid date time, expected YYYYMMDDTHHMMSS[Z]: 2030-06-03 10:00',
+            'row 3: Unknown time zone: Mars/Olympus',
+        ])
+        self.assertEqual(sorted(Meeting.objects.filter(created_by=self.owner).values_list('title', 'start_time')), [
+            ('Intro', datetime(2030, 6, 3, 9, tzinfo=pytz.utc)),
+            ('Karachi', datetime(2030, 6, 3, 12, tzinfo=pytz.utc)),
+        ])
+
+
+class ReservedStateTests(TestCase):
+    """
+    reserved_at alone tells a reserved meeting from a free one, whichever other column was written
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        owner = get_user_model().objects.create(username='reserved')
+        start_time = timezone.now() + timedelta(days=1)
+        # written without the other column, i.e through the admin
+        self.reserved = Meeting.objects.create(created_by=owner, title='Reserved', start_time=start_time,
+                                               end_time=start_time + timedelta(minutes=30),
+                                               reserved_at=timezone.now())
+        start_time += timedelta(hours=1)
+        self.free = Meeting.objects.create(created_by=owner, title='Free', start_time=start_time,
+                                           end_time=start_time + timedelta(minutes=30), reserver_name='Guest')
+
+    def test_listings(self):
+        data = run_query('{ bookableMeetings(first: 50) { edges { node { title isReserved } } } }')
+        nodes = [edge['node'] for edge in data['bookableMeetings']['edges']]
+        self.assertIn({'title': 'Free', 'isReserved': False}, nodes)
+        self.assertNotIn('Reserved', [node['title'] for node in nodes])
+
+    def test_hold_and_reserve(self):
+        with self.assertRaisesMessage(GraphQLError, 'Meeting is not available'):
+            hold_meeting(self.reserved.id)
+        with self.assertRaisesMessage(GraphQLError, 'Meeting already reserved by another candidate'):
+            reserve_meeting(self.reserved.id, 'Guest', 'guest@example.com')
+
+        hold = hold_meeting(self.free.id)
+        reserved, meeting = reserve_meeting(self.free.id, 'Guest', 'guest@example.com', hold.token)
+        self.assertTrue(reserved)
+        self.assertTrue(meeting.is_reserved)
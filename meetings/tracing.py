@@ -0,0 +1,125 @@
+from threading import Lock
+from time import perf_counter_ns
+from contextlib import contextmanager, ExitStack
+
+from django.db import connections
+from django.utils import timezone
+from promise import Promise
+
+from .metrics import registry, LabelValues, QUERY_COUNT_BUCKETS
+
+# operations are labelled by the root fields they select, the operation names are picked by clients
+operation_labels = LabelValues()
+
+
+class OperationTracer:
+    """
+    Collects the timing of every resolver & the SQL queries of one GraphQL operation, it's installed as the
+    execute_wrapper of every connection while the operation runs, see `traced_connections`
+    """
+
+    def __init__(self):
+        self.started_at = timezone.now()
+        self.started = perf_counter_ns()
+        self.ended_at = None
+        self.duration = None
+        self.resolvers = []
+        self.sql_count = 0
+        self.sql_duration = 0
+        self._lock = Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.sql_count += 1
+                self.sql_duration += perf_counter_ns() - started
+
+    def record(self, info, started):
+        duration = perf_counter_ns() - started
+        with self._lock:
+            self.resolvers.append({
+                'path': list(info.path),
+                'parentType': str(info.parent_type),
+                'fieldName': info.field_name,
+                'returnType': str(info.return_type),
+                'startOffset': started - self.started,
+                'duration': duration,
+            })
+        registry.observe('graphql_resolver_duration_seconds',
+                         {'field': f'{info.parent_type}.{info.field_name}'}, duration / 1e9)
+
+    def operation_label(self):
+        """
+        the root fields the operation resolved i.e `Query.allMeetings+Query.myMeetings`, `none` for operations
+        that didn't resolve any, like the cached or invalid ones
+        """
+
+        fields = sorted({f"{resolver['parentType']}.{resolver['fieldName']}" for resolver in self.resolvers
+                         if len(resolver['path']) == 1})
+        return operation_labels('+'.join(fields) or 'none')
+
+    def finish(self):
+        """
+        stop the clock & export the operation totals to the metrics registry
+        """
+
+        self.duration = perf_counter_ns() - self.started
+        self.ended_at = timezone.now()
+        labels = {'operation': self.operation_label()}
+        registry.observe('graphql_operation_duration_seconds', labels, self.duration / 1e9)
+        registry.observe('graphql_operation_sql_queries', labels, self.sql_count, QUERY_COUNT_BUCKETS)
+        registry.observe('graphql_operation_sql_duration_seconds', labels, self.sql_duration / 1e9)
+
+    def as_extension(self):
+        """
+        the trace in the Apollo tracing format, with the SQL totals of the operation
+        """
+
+        return {
+            'version': 1,
+            'startTime': self.started_at.isoformat(),
+            'endTime': self.ended_at.isoformat(),
+            'duration': self.duration,
+            'execution': {'resolvers': self.resolvers},
+            'sql': {'count': self.sql_count, 'duration': self.sql_duration},
+        }
+
+
+@contextmanager
+def traced_connections(tracer):
+    """
+    install the tracer on the connections of every database alias, reads going to the replicas included
+    """
+
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(tracer))
+        yield
+
+
+class TracingMiddleware:
+    """
+    Graphene middleware timing every resolver of the operations traced by an OperationTracer, it's only
+    installed when GRAPHQL_TRACING is enabled so untraced requests don't pay for the promise wrapping
+    """
+
+    def resolve(self, next_resolver, root, info, **args):
+        tracer = getattr(info.context, 'graphql_tracer', None)
+        started = perf_counter_ns()
+        result = next_resolver(root, info, **args)
+        if tracer is None:
+            return result
+        if isinstance(result, Promise) and result.is_pending:
+            def record(value):
+                tracer.record(info, started)
+                return value
+
+            def record_error(error):
+                tracer.record(info, started)
+                raise error
+            return result.then(record, record_error)
+        tracer.record(info, started)
+        return result
@@ -1,11 +1,43 @@
+import logging
 from re import fullmatch
+from secrets import token_urlsafe
+from itertools import islice
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q, Exists, OuterRef
 from django.utils import timezone
-from datetime import datetime, timedelta
 
 from graphql import GraphQLError
 
-from .models import Meeting
-from .constants import EMAIL_REGEX
+from .models import Meeting, MeetingHold
+from .intervals import IntervalSet
+from .cache import invalidate_owner
+from .schedule_cache import owner_schedule, cached_schedule, tracked_writes
+from .owners import owner_ids
+from .schedule import expand_slots
+from .sqlite import serialized_write
+from .datetimes import parse_datetime
+from .constants import EMAIL_REGEX, MAX_SCHEDULE_SLOTS, SCHEDULE_BATCH_SIZE, MAX_BATCH_OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+# operations of batchMeetings
+BATCH_CREATE, BATCH_UPDATE, BATCH_DELETE, BATCH_RESERVE = 'create', 'update', 'delete', 'reserve'
+BATCH_ACTIONS = (BATCH_CREATE, BATCH_UPDATE, BATCH_DELETE, BATCH_RESERVE)
+
+MAX_MEETING_DURATION = timedelta(minutes=max(duration for duration, _ in Meeting.SLOT_CHOICES))
+
+
+def owner_query(user_name):
+    """
+    filter on the meetings of a user, matching given name against the username, first or last name. Owners are
+    looked up in the owner key table, meetings are then read by `created_by_id IN (...)` through the owner index
+    instead of joining the user table on three case insensitive comparisons
+    """
+
+    return Q(created_by_id__in=owner_ids(user_name))
 
 
 def calculate_meeting_end_time(start_time, duration_in_minutes):
@@ -16,47 +48,60 @@ def calculate_meeting_end_time(start_time, duration_in_minutes):
     return start_time + timedelta(minutes=duration_in_minutes)
 
 
-def str_to_datetime(str_time):
+def str_to_aware_datetime(str_time):
     """
-    converts given time in str format to datetime
+    converts given time in str format to an aware datetime, times without offset are read in the current time zone
     """
 
-    return datetime.fromisoformat(str_time)
+    return parse_datetime(str_time)
 
 
-def _next_free_slot(reserved_meetings, start_time):
+def validate_availability_in_memory(schedule, start_time, end_time, meeting_to_update=None):
     """
-    calculate the time when user will be free by comparing two timestamps
+    validate user isn't already booked for any part of [start_time, end_time), against its already loaded slots
+
+    :param schedule: (OwnerSchedule|IntervalSet) user's meetings keyed by meeting ID
+    :param meeting_to_update: (int) ID of the meeting being moved, it can't conflict with itself
+    """
+
+    conflict = schedule.overlapping(start_time, end_time, exclude=meeting_to_update)
+    if conflict:
+        raise GraphQLError(f"You already have a slot booked for this time: {start_time},"
+                           f" try again in {(conflict[1] - start_time).total_seconds() / 60.0} minutes")
 
-    :param reserved_meetings: (Queryset) meeting object
-    :param start_time: (datetime)
 
-    :returns: (str) Minutes in str format i.e 10.0 Minutes
+def overlapping_meetings(user, start_time, end_time):
     """
+    meetings of given user overlapping the half-open interval [start_time, end_time)
 
-    wait_message = ""
-    first_meeting = reserved_meetings.first()
-    if first_meeting:
-        wait_message = f'{(first_meeting.end_time - start_time).total_seconds() / 60.0} minutes'
+    A conflicting meeting can't start earlier than `start_time - MAX_MEETING_DURATION`, bounding
+    `start_time` on both sides lets the (created_by, start_time, end_time) index do a range seek
+    instead of scanning every meeting of the user
+    """
 
-    return wait_message
+    return Meeting.objects.filter(created_by=user,
+                                  start_time__gt=start_time - MAX_MEETING_DURATION,
+                                  start_time__lt=end_time,
+                                  end_time__gt=start_time)
 
 
-def _validate_user_availability(user, meeting_time, meeting_to_update=None):
+def booked_slots(user, start_time, end_time):
     """
-    validate user isn't already booked
+    load user's meetings overlapping [start_time, end_time) into an IntervalSet with a single range query
     """
 
-    user_meetings = Meeting.objects.filter(start_time__lte=meeting_time,
-                                           end_time__gte=meeting_time, created_by=user)
-    if meeting_to_update:
-        user_meetings = user_meetings.exclude(id=meeting_to_update.id)
+    return IntervalSet(overlapping_meetings(user, start_time, end_time).values_list('start_time', 'end_time', 'id'))
+
 
-    wait_message = _next_free_slot(user_meetings, meeting_time)
+def _validate_user_availability(user, start_time, end_time, meeting_to_update=None):
+    """
+    validate user isn't already booked for any part of [start_time, end_time) against the meeting table, run
+    inside the write's transaction. The cached schedule only turns conflicts down early, it misses the writes
+    made since its version was last bumped
+    """
 
-    if user_meetings:
-        raise GraphQLError(f"You already have a slot booked for this time: {meeting_time},"
-                           f" try again in {wait_message}")
+    validate_availability_in_memory(booked_slots(user, start_time, end_time), start_time, end_time,
+                                    meeting_to_update)
 
 
 def _validate_past_dates(meeting_time):
@@ -68,45 +113,56 @@ def _validate_past_dates(meeting_time):
         raise GraphQLError(f"Given date has already passed, try a future date: {meeting_time}")
 
 
-def _create_meeting(title, start_time, end_time, duration, user):
+def _create_meeting(title, start_time, end_time, duration, user, schedule):
     """
-    create a meeting with given info
+    create a meeting with given info, validated against the user's schedule which gets the new meeting
     """
 
     _validate_past_dates(start_time)
-    _validate_user_availability(user, start_time)
-    return Meeting.objects.create(created_by=user, title=title,
-                                  start_time=start_time, end_time=end_time,
-                                  slot_duration_in_minutes=duration)
+    validate_availability_in_memory(schedule, start_time, end_time)
+    with transaction.atomic():
+        _validate_user_availability(user, start_time, end_time)
+        meeting = Meeting.objects.create(created_by=user, title=title,
+                                         start_time=start_time, end_time=end_time,
+                                         slot_duration_in_minutes=duration)
+    schedule.add(start_time, end_time, meeting.id)
+    return meeting
 
 
-def _validate_meeting_owner(meeting_owner, current_user):
+def _validate_schedule_meeting(schedule, meeting_id):
     """
-    validate current user matches the given meeting owner
+    validate given meeting belongs to the schedule's owner, the meeting table is only read to tell a missing
+    meeting from somebody else's
     """
 
-    if meeting_owner != current_user:
+    if meeting_id in schedule:
+        return
+    if Meeting.objects.filter(id=meeting_id).exists():
         raise GraphQLError("Invalid meeting, you don't have the rights to update or delete this meeting")
+    raise GraphQLError(f'No Meeting found matching the given ID: {meeting_id}')
 
 
-def _update_meeting(title, start_time, end_time, duration, meeting_id, current_user):
+def _update_meeting(title, start_time, end_time, duration, meeting_id, current_user, schedule):
     """
-    update meeting matching given meeting ID
+    update meeting matching given meeting ID, validated against the user's schedule then the meeting table.
+    The updated meeting is built from the given values rather than read back
     """
 
-    meeting = Meeting.objects.filter(id=meeting_id).first()
-    _validate_meeting_owner(meeting.created_by, current_user)
+    _validate_schedule_meeting(schedule, meeting_id)
     _validate_past_dates(start_time)
-    _validate_user_availability(current_user, start_time, meeting)
+    validate_availability_in_memory(schedule, start_time, end_time, meeting_id)
 
-    if meeting:
-        Meeting.objects.filter(id=meeting_id).update(
+    with transaction.atomic():
+        _validate_user_availability(current_user, start_time, end_time, meeting_id)
+        updated = Meeting.objects.filter(id=meeting_id, created_by=current_user).update(
             title=title, start_time=start_time, end_time=end_time,
             slot_duration_in_minutes=duration
         )
-        meeting.refresh_from_db()
-        return meeting
-    return None
+    if not updated:
+        raise GraphQLError(f'No Meeting found matching the given ID: {meeting_id}')
+    schedule.move(meeting_id, start_time, end_time)
+    return Meeting(id=meeting_id, created_by=current_user, title=title, start_time=start_time, end_time=end_time,
+                   slot_duration_in_minutes=duration)
 
 
 def _validate_meeting_duration(duration):
@@ -119,6 +175,8 @@ def _validate_meeting_duration(duration):
         raise GraphQLError(f'Invalid Meeting duration, expected values are :{valid_durations}')
 
 
+@serialized_write
+@tracked_writes()
 def create_or_update_meeting(title, start_time, duration, user, meeting_id):
     """
     Create and Meeting and associate with given User
@@ -132,13 +190,64 @@ def create_or_update_meeting(title, start_time, duration, user, meeting_id):
     """
 
     _validate_meeting_duration(duration)
-    start_time = str_to_datetime(start_time)
+    if isinstance(start_time, str):
+        start_time = str_to_aware_datetime(start_time)
     end_time = calculate_meeting_end_time(start_time, duration)
-    meeting = _create_meeting(title, start_time, end_time, duration, user) if \
-        meeting_id is None else _update_meeting(title, start_time, end_time, duration, meeting_id, user)
+    schedule = owner_schedule(user.pk)
+    meeting = _create_meeting(title, start_time, end_time, duration, user, schedule) if \
+        meeting_id is None else _update_meeting(title, start_time, end_time, duration, meeting_id, user, schedule)
+    invalidate_owner(user, schedule)
     return meeting
 
 
+@serialized_write
+def create_schedule(title, start_date, end_date, windows, duration, user, recurrence=None):
+    """
+    Create every slot of a schedule at once, slots are checked against the user's cached schedule, then against
+    the meetings loaded with one range query & inserted in batches inside a single transaction
+
+    :param title: (str) title of every created meeting
+    :param start_date: (str) first day of the schedule, YYYY-MM-DD
+    :param end_date: (str) last day of the schedule, YYYY-MM-DD
+    :param windows: (list) daily windows as `HH:MM-HH:MM` strings
+    :param duration: (Int) slot duration in minutes
+    :param user: (UserModel)
+    :param recurrence: (str) optional RRULE i.e FREQ=WEEKLY;BYDAY=MO,WE,FR
+
+    :returns: (list) created Meeting objects
+    """
+
+    _validate_meeting_duration(duration)
+    # one slot past the limit is enough to reject the schedule, the rest is never expanded
+    slots = list(islice(expand_slots(start_date, end_date, windows, duration, recurrence), MAX_SCHEDULE_SLOTS + 1))
+    if not slots:
+        raise GraphQLError("Given schedule doesn't contain any slot")
+    if len(slots) > MAX_SCHEDULE_SLOTS:
+        raise GraphQLError(f'Schedule has more than {MAX_SCHEDULE_SLOTS} slots, at most {MAX_SCHEDULE_SLOTS} can be '
+                           f'created at once')
+    _validate_past_dates(slots[0][0])
+
+    schedule = owner_schedule(user.pk)
+    for start_time, end_time in slots:
+        validate_availability_in_memory(schedule, start_time, end_time)
+
+    meetings = [Meeting(created_by=user, title=title, start_time=start_time, end_time=end_time,
+                        slot_duration_in_minutes=duration) for start_time, end_time in slots]
+    with transaction.atomic():
+        booked = booked_slots(user, slots[0][0], slots[-1][1])
+        for start_time, end_time in slots:
+            validate_availability_in_memory(booked, start_time, end_time)
+        meetings = Meeting.objects.bulk_create(meetings, batch_size=SCHEDULE_BATCH_SIZE)
+    # bulk_create only sets the ids on databases returning them, i.e PostgreSQL, otherwise the schedule is reloaded
+    if all(meeting.id for meeting in meetings):
+        for meeting in meetings:
+            schedule.add(meeting.start_time, meeting.end_time, meeting.id)
+        invalidate_owner(user, schedule)
+    else:
+        invalidate_owner(user)
+    return meetings
+
+
 def _validate_email(email):
     """
     validate given Email is valid
@@ -158,36 +267,298 @@ def _validate_user_data(name, email):
     return _validate_email(email.strip())
 
 
-def reserve_meeting(meeting_id, reserver_name, reserver_email):
+def _held_by_others(meeting_id, hold_token, now):
+    """
+    active holds on the meeting, other than the one of given token
+    """
+
+    return MeetingHold.objects.filter(meeting_id=meeting_id, expires_at__gt=now).exclude(token=hold_token or '')
+
+
+def _reserve(meeting_id, reserver_name, reserver_email, hold_token=None):
+    """
+    reserve the meeting with a single conditional UPDATE, only succeeds while the meeting is still free,
+    in the future & not held by another guest, so concurrent reservations of the same slot can't both win
+
+    :returns: (int) number of rows changed, 1 when reserved & 0 otherwise
+    """
+
+    now = timezone.now()
+    held = _held_by_others(OuterRef('pk'), hold_token, now)
+    return Meeting.objects.filter(~Exists(held), id=meeting_id, reserved_at__isnull=True,
+                                  start_time__gt=now).update(reserver_name=reserver_name,
+                                                             reserver_email=reserver_email, reserved_at=now)
+
+
+@serialized_write
+def hold_meeting(meeting_id):
+    """
+    hold a free meeting for MEETING_HOLD_TTL seconds, only the guest knowing the returned token can
+    reserve it meanwhile. An expired hold is replaced, an active one fails fast without waiting on the meeting
+
+    :returns: (MeetingHold) the new hold
+    """
+
+    now = timezone.now()
+    if not Meeting.objects.filter(id=meeting_id, reserved_at__isnull=True, start_time__gt=now).exists():
+        raise GraphQLError("Meeting is not available, it's either reserved, over or doesn't exist")
+
+    try:
+        with transaction.atomic():
+            MeetingHold.objects.filter(meeting_id=meeting_id, expires_at__lte=now).delete()
+            return MeetingHold.objects.create(meeting_id=meeting_id, token=token_urlsafe(32),
+                                              expires_at=now + timedelta(seconds=settings.MEETING_HOLD_TTL))
+    except IntegrityError as error:
+        raise GraphQLError("Meeting is held by another candidate, please try again in a moment") from error
+
+
+@serialized_write
+def release_expired_holds(batch_size=1000):
     """
-    reserve meeting matching given ID for guest users with details
+    delete the expired holds, `batch_size` at a time through the expiry index
+
+    :returns: (int) number of released holds
+    """
+
+    now = timezone.now()
+    released = 0
+    while True:
+        expired = list(MeetingHold.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not expired:
+            return released
+        released += MeetingHold.objects.filter(id__in=expired).delete()[0]
+
+
+@serialized_write
+def reserve_meeting(meeting_id, reserver_name, reserver_email, hold_token=None):
+    """
+    reserve meeting matching given ID for guest users with details, a meeting held by someone else
+    is rejected before anything else is checked
+
+    :param hold_token: (str) token returned by `holdMeeting`, confirms the hold
 
     :returns: (Bool) True if meeting is reserved, False if already reserved or passed
     """
 
-    if Meeting.objects.filter(id=meeting_id).exists():
-        meeting = Meeting.objects.filter(id=meeting_id).first()
-        if meeting.is_reserved:
-            raise GraphQLError("Meeting already reserved by another candidate")
-        if meeting.is_meeting_over:
-            raise GraphQLError("Meeting is over, please reserve a new meeting with Future date")
-        _validate_user_data(reserver_name, reserver_email)
-        meeting.reserver_name = reserver_name
-        meeting.reserver_email = reserver_email
-        meeting.save()
+    if _held_by_others(meeting_id, hold_token, timezone.now()).exists():
+        raise GraphQLError("Meeting is held by another candidate, please try again in a moment")
+    _validate_user_data(reserver_name, reserver_email)
+    with transaction.atomic():
+        reserved = _reserve(meeting_id, reserver_name, reserver_email, hold_token)
+        if reserved:
+            MeetingHold.objects.filter(meeting_id=meeting_id).delete()
+    meeting = Meeting.objects.select_related('created_by').filter(id=meeting_id).first()
+    if reserved:
+        # the host's cached schedule takes the reservation instead of being reloaded by its next write
+        schedule = cached_schedule(meeting.created_by_id)
+        if schedule is not None:
+            schedule.reserve(meeting_id, meeting.reserved_at)
+        invalidate_owner(meeting.created_by, schedule)
         return True, meeting
-    return False, None
+    if meeting is None:
+        return False, None
+    if meeting.is_reserved:
+        raise GraphQLError("Meeting already reserved by another candidate")
+    if meeting.start_time > timezone.now():
+        raise GraphQLError("Meeting is held by another candidate, please try again in a moment")
+    raise GraphQLError("Meeting is over, please reserve a new meeting with Future date")
 
 
+@serialized_write
+@tracked_writes()
 def delete_meeting(meeting_id, user):
     """
     Delete the meeting matching given meeting ID & User
     """
 
-    meeting = Meeting.objects.filter(id=meeting_id).first()
+    schedule = owner_schedule(user.pk)
+    _validate_schedule_meeting(schedule, meeting_id)
+    logger.info('deleting meeting %s', meeting_id)
+    deleted = Meeting.objects.filter(id=meeting_id, created_by=user).delete()
+    schedule.discard(meeting_id)
+    invalidate_owner(user, schedule)
+    return deleted
 
-    if meeting is None:
-        raise GraphQLError(f'No Meeting found matching the given ID: {meeting_id}')
-    _validate_meeting_owner(meeting.created_by, user)
-    print(f'Deleting meeting with ID:{meeting_id}')
-    return meeting.delete()
+
+def _batch_meeting(operation, user, schedule, meeting_id=None):
+    """
+    validate the values of a create or update operation against the schedule, like createUpdateMeeting
+
+    :returns: (Meeting) unsaved meeting holding the new values
+    """
+
+    title, start_time = operation.get('title'), operation.get('start_time')
+    duration = operation.get('slot_duration_in_minutes')
+    if not (title or '').strip():
+        raise GraphQLError('Meeting title should not be empty')
+    if start_time is None:
+        raise GraphQLError('Invalid date time, expected ISO 8601 format')
+    _validate_meeting_duration(duration)
+    end_time = calculate_meeting_end_time(start_time, duration)
+    _validate_past_dates(start_time)
+    validate_availability_in_memory(schedule, start_time, end_time, meeting_id)
+    return Meeting(id=meeting_id, created_by=user, title=title, start_time=start_time, end_time=end_time,
+                   slot_duration_in_minutes=duration)
+
+
+def _validate_operation(index, operation, user, schedule, touched):
+    """
+    validate one operation of a batch & apply it to the schedule, so the following operations are checked
+    against it as well. Deletions, updates & reservations are written by kind rather than in order, so a meeting
+    can only be the target of one of them
+
+    :param touched: (set) IDs of the meetings targeted by the previous operations
+
+    :returns: (Meeting) unsaved meeting to create or update, None for deletions & reservations
+    """
+
+    action, meeting_id = operation['action'], operation.get('meeting_id')
+    if action == BATCH_CREATE:
+        meeting = _batch_meeting(operation, user, schedule)
+        # the meeting has no ID yet, it's booked under a negative key until it's inserted
+        schedule.add(meeting.start_time, meeting.end_time, -(index + 1))
+        return meeting
+
+    if meeting_id in touched:
+        raise GraphQLError("Meeting is already changed by a previous operation of the batch")
+    if action == BATCH_RESERVE:
+        _validate_user_data(operation.get('reserver_name') or '', operation.get('reserver_email') or '')
+        if _held_by_others(meeting_id, operation.get('hold_token'), timezone.now()).exists():
+            raise GraphQLError("Meeting is held by another candidate, please try again in a moment")
+        touched.add(meeting_id)
+        return None
+
+    _validate_schedule_meeting(schedule, meeting_id)
+    touched.add(meeting_id)
+    if action == BATCH_DELETE:
+        schedule.discard(meeting_id)
+        return None
+    meeting = _batch_meeting(operation, user, schedule, meeting_id)
+    schedule.move(meeting_id, meeting.start_time, meeting.end_time)
+    return meeting
+
+
+def _validate_written(user, written):
+    """
+    validate the meetings written by a batch don't overlap any other meeting of the user, the error of each
+    conflicting operation is set on its result
+
+    :param written: (list) (operation, result) of the update & create operations
+
+    :returns: (bool) True when none of them conflicts
+    """
+
+    meetings = [result['meeting'] for _, result in written]
+    if not meetings:
+        return True
+    booked = booked_slots(user, min(meeting.start_time for meeting in meetings),
+                          max(meeting.end_time for meeting in meetings))
+    for meeting, (_, result) in zip(meetings, written):
+        try:
+            validate_availability_in_memory(booked, meeting.start_time, meeting.end_time, meeting.id)
+        except GraphQLError as error:
+            result['error'] = error.message
+    return not any(result['error'] for _, result in written)
+
+
+def _apply_batch(operations, results, user):
+    """
+    write the validated operations in a single transaction, deletions, updates & creations in bulk. The written
+    meetings are checked against the meeting table with one range query, the schedule they were validated against
+    may miss writes. A conflict or a reservation losing its meeting to another guest rolls the whole batch back
+
+    :returns: (bool) True when the batch was committed
+    """
+
+    by_action = {action: [] for action in BATCH_ACTIONS}
+    for operation, result in zip(operations, results):
+        by_action[operation['action']].append((operation, result))
+
+    with transaction.atomic():
+        deleted = [operation['meeting_id'] for operation, _ in by_action[BATCH_DELETE]]
+        if deleted:
+            Meeting.objects.filter(id__in=deleted, created_by=user).delete()
+        updated = [result['meeting'] for _, result in by_action[BATCH_UPDATE]]
+        if updated:
+            Meeting.objects.bulk_update(updated, ['title', 'start_time', 'end_time', 'slot_duration_in_minutes'],
+                                        batch_size=SCHEDULE_BATCH_SIZE)
+        created = [result['meeting'] for _, result in by_action[BATCH_CREATE]]
+        if created:
+            Meeting.objects.bulk_create(created, batch_size=SCHEDULE_BATCH_SIZE)
+            # databases not returning the IDs of bulk inserts: an owner's meetings never share a start time
+            if any(meeting.id is None for meeting in created):
+                ids = dict(Meeting.objects.filter(created_by=user, start_time__in=[
+                    meeting.start_time for meeting in created]).values_list('start_time', 'id'))
+                for meeting in created:
+                    meeting.id = ids[meeting.start_time]
+
+        if not _validate_written(user, by_action[BATCH_UPDATE] + by_action[BATCH_CREATE]):
+            transaction.set_rollback(True)
+            return False
+        for operation, result in by_action[BATCH_RESERVE]:
+            if not _reserve(operation['meeting_id'], operation['reserver_name'], operation['reserver_email'],
+                            operation.get('hold_token')):
+                result['error'] = "Meeting is not available, it's either reserved, over or doesn't exist"
+        if any(result['error'] for _, result in by_action[BATCH_RESERVE]):
+            transaction.set_rollback(True)
+            return False
+        MeetingHold.objects.filter(meeting_id__in=[operation['meeting_id']
+                                                   for operation, _ in by_action[BATCH_RESERVE]]).delete()
+    return True
+
+
+@serialized_write
+@tracked_writes()
+def batch_meetings(operations, user):
+    """
+    run create, update, delete & reserve operations as one unit. Every operation is validated in order against
+    a single snapshot of the user's schedule, so conflicts between operations of the batch are caught too, then
+    they're all applied in a single transaction. Nothing is written when any of them is invalid
+
+    :param operations: (list) dicts holding an `action` among BATCH_ACTIONS & the arguments of the matching
+        mutation i.e meeting_id, title, start_time, slot_duration_in_minutes, reserver_name, reserver_email
+
+    :returns: (tuple) whether the batch was applied & a result dict per operation, with its meeting or error
+    """
+
+    if not operations:
+        raise GraphQLError("Batch doesn't contain any operation")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise GraphQLError(f'Batch has {len(operations)} operations, at most {MAX_BATCH_OPERATIONS} are allowed')
+
+    schedule = owner_schedule(user.pk)
+    touched = set()
+    results = []
+    for index, operation in enumerate(operations):
+        result = {'action': operation['action'], 'meeting_id': operation.get('meeting_id'), 'meeting': None,
+                  'error': None}
+        try:
+            result['meeting'] = _validate_operation(index, operation, user, schedule, touched)
+        except GraphQLError as error:
+            result['error'] = error.message
+        results.append(result)
+    if any(result['error'] for result in results) or not _apply_batch(operations, results, user):
+        # nothing was written, the validated meetings aren't returned
+        for result in results:
+            result['meeting'] = None
+        return False, results
+
+    reserved = [operation['meeting_id'] for operation in operations if operation['action'] == BATCH_RESERVE]
+    reserved_meetings = Meeting.objects.select_related('created_by').in_bulk(reserved)
+    owners = {}
+    for index, (operation, result) in enumerate(zip(operations, results)):
+        if operation['action'] == BATCH_CREATE:
+            meeting = result['meeting']
+            schedule.discard(-(index + 1))
+            schedule.add(meeting.start_time, meeting.end_time, meeting.id)
+            result['meeting_id'] = meeting.id
+        elif operation['action'] == BATCH_RESERVE:
+            meeting = result['meeting'] = reserved_meetings[operation['meeting_id']]
+            if meeting.created_by_id == user.pk:
+                schedule.reserve(meeting.id, meeting.reserved_at)
+            else:
+                owners[meeting.created_by_id] = meeting.created_by
+    invalidate_owner(user, schedule)
+    for owner in owners.values():
+        invalidate_owner(owner)
+    return True, results
@@ -1,3 +1,347 @@
-from django.shortcuts import render
+import json
+import asyncio
+from functools import partial
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import (JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed,
+                         HttpResponseForbidden, StreamingHttpResponse)
+from graphql import GraphQLError
+from graphql.execution import ExecutionResult
+from graphql.execution.executors.asyncio import AsyncioExecutor
+from graphene_django.views import GraphQLView, HttpError
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.utils.utils import set_rollback
+
+from .cache import response_cache_key, get_cached_response, cache_response, response_cache_stats
+from .documents import document_backend, persisted_query, PersistedQueryNotFound, PersistedQueryMismatch
+from .auth import authenticate_request
+from .metrics import registry
+from .replicas import use_primary, is_pinned
+from .utils import str_to_aware_datetime
+from .export import EXPORT_FORMATS, export_rows
+from .tracing import OperationTracer, TracingMiddleware, traced_connections
+
+
+def result_to_dict(view, result):
+    """
+    response body of an ExecutionResult with its errors, data & extensions
+    """
+
+    response = {}
+    if result.errors:
+        response['errors'] = [view.format_error(error) for error in result.errors]
+    if not result.invalid:
+        response['data'] = result.data
+    if result.extensions:
+        response['extensions'] = result.extensions
+    return response
+
+
+def _with_trace(result, tracer):
+    """
+    add the trace of the operation to the result extensions
+    """
+
+    if result is not None:
+        result.extensions = dict(result.extensions or {}, tracing=tracer.as_extension())
+    return result
+
+
+class MeetingsGraphQLView(GraphQLView):
+    """
+    GraphQL view reusing parsed & validated documents, supporting Automatic Persisted Queries and
+    serving guest listings from the response cache. Operations are traced when GRAPHQL_TRACING is enabled
+    """
+
+    def __init__(self, backend=None, **kwargs):
+        super().__init__(backend=backend or document_backend, **kwargs)
+
+    @staticmethod
+    def _persisted_query_hash(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError as error:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON.")) from error
+        persisted = (extensions or {}).get('persistedQuery') or {}
+        return persisted.get('sha256Hash')
+
+    def resolve_persisted_query(self, request, data, query):
+        """
+        query string of an Automatic Persisted Query, registering it when the client sends it with its hash
+
+        :raises: (HttpError) when the hash isn't registered yet or doesn't match the query
+        """
+
+        sha256_hash = self._persisted_query_hash(request, data)
+        if not sha256_hash:
+            return query
+        document = None if query else self.backend.cached_document(self.schema, sha256_hash)
+        try:
+            return document.document_string if document else persisted_query(sha256_hash, query)
+        except PersistedQueryNotFound as error:
+            raise HttpError(HttpResponse(), "PersistedQueryNotFound") from error
+        except PersistedQueryMismatch as error:
+            raise HttpError(HttpResponseBadRequest(), "provided sha does not match query") from error
+
+    def get_response(self, request, data, show_graphiql=False):
+        """
+        same as GraphQLView.get_response, also resolving persisted queries & reporting the result extensions
+        i.e the query cost
+        """
+
+        query, variables, operation_name, request_id = self.get_graphql_params(request, data)
+        query = self.resolve_persisted_query(request, data, query)
+        execution_result = self.execute_graphql_request(request, data, query, variables, operation_name,
+                                                        show_graphiql)
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+        if not execution_result:
+            return None, 200
+
+        if execution_result.errors:
+            set_rollback()
+        response = result_to_dict(self, execution_result)
+        if self.batch:
+            response["id"] = request_id
+            response["status"] = 400 if execution_result.invalid else 200
+        return self.json_encode(request, response, pretty=show_graphiql), 400 if execution_result.invalid else 200
+
+    def get_middleware(self, request):
+        middleware = super().get_middleware(request)
+        if settings.GRAPHQL_TRACING:
+            middleware = list(middleware or []) + [TracingMiddleware()]
+        return middleware
+
+    def _is_mutation(self, request, query, operation_name):
+        try:
+            document = self.get_backend(request).document_from_string(self.schema, query)
+            return document.get_operation_type(operation_name) == 'mutation'
+        except Exception:
+            return False
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        mutations read from the primary database, queries from the replicas unless the client just wrote
+        """
+
+        if query and self._is_mutation(request, query, operation_name):
+            with use_primary():
+                return self._execute_traced(request, data, query, variables, operation_name, show_graphiql)
+        return self._execute_traced(request, data, query, variables, operation_name, show_graphiql)
+
+    def _execute_traced(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not settings.GRAPHQL_TRACING:
+            return self._execute_cached(request, data, query, variables, operation_name, show_graphiql)
+
+        tracer = request.graphql_tracer = OperationTracer()
+        with traced_connections(tracer):
+            result = self._execute_cached(request, data, query, variables, operation_name, show_graphiql)
+        tracer.finish()
+        return _with_trace(result, tracer)
+
+    def _execute_cached(self, request, data, query, variables, operation_name, show_graphiql=False):
+        key = None
+        # clients pinned to the primary skip the cache, it may hold what a lagging replica returned
+        if query and not is_pinned():
+            try:
+                document = self.get_backend(request).document_from_string(self.schema, query)
+                key = response_cache_key(document, operation_name, variables)
+            except Exception:
+                key = None
+
+        if key:
+            cached = get_cached_response(key)
+            if cached is not None:
+                return cached
+
+        result = super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        if key and result and not result.errors and not result.invalid:
+            cache_response(key, result)
+        return result
+
+
+resolver_pool = ThreadPoolExecutor(max_workers=settings.GRAPHQL_ASYNC_WORKERS, thread_name_prefix='graphql')
+
+
+def _evaluate(result):
+    return list(result) if hasattr(result, '_fetch_all') else result
+
+
+def _resolve_in_thread(next_resolver, root, info, **args):
+    """
+    run a resolver, and the ORM queries it makes, in a resolver pool thread, results are fully
+    evaluated there since the ORM can't be used from the event loop
+    """
+
+    close_old_connections()
+    tracer = getattr(info.context, 'graphql_tracer', None)
+    try:
+        if tracer is None:
+            return _evaluate(next_resolver(root, info, **args))
+        with traced_connections(tracer):
+            return _evaluate(next_resolver(root, info, **args))
+    finally:
+        close_old_connections()
+
+
+class ThreadPoolResolverMiddleware:
+    """
+    Runs root field resolvers through sync_to_async on the bounded resolver pool, so independent root
+    fields resolve concurrently while the event loop keeps serving other requests. Nested fields read the
+    already loaded objects and resolve inline
+    """
+
+    def resolve(self, next_resolver, root, info, **args):
+        if len(info.path) > 1:
+            return next_resolver(root, info, **args)
+        return sync_to_async(partial(_resolve_in_thread, next_resolver), thread_sensitive=False,
+                             executor=resolver_pool)(root, info, **args)
+
+
+def _error_response(view, request, error):
+    return HttpResponse(view.json_encode(request, {"errors": [view.format_error(error)]}),
+                        status=error.response.status_code, content_type="application/json")
+
+
+def _cached_response(document, operation_name, variables):
+    if is_pinned():
+        return None, None
+    key = response_cache_key(document, operation_name, variables)
+    return key, get_cached_response(key) if key else None
+
+
+async def _execute_async(document, operation_name, variables, request, middleware):
+    with use_primary() if document.get_operation_type(operation_name) == 'mutation' else nullcontext():
+        result = document.execute(
+            variable_values=variables,
+            operation_name=operation_name,
+            context_value=request,
+            middleware=middleware,
+            executor=AsyncioExecutor(loop=asyncio.get_running_loop()),
+            return_promise=True,
+        )
+        if not isinstance(result, ExecutionResult):
+            result = await result
+    return result
+
+
+async def async_graphql_view(request):
+    """
+    GraphQL endpoint for ASGI servers, executes the same schema with the asyncio executor, sharing the
+    document cache & persisted queries of MeetingsGraphQLView
+    """
+
+    view = MeetingsGraphQLView()
+    try:
+        if request.method not in ('GET', 'POST'):
+            raise HttpError(HttpResponseNotAllowed(['GET', 'POST'], "GraphQL only supports GET and POST requests."))
+        data = view.parse_body(request)
+        query, variables, operation_name, _ = view.get_graphql_params(request, data)
+        query = view.resolve_persisted_query(request, data, query)
+        if not query:
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+    except HttpError as error:
+        return _error_response(view, request, error)
+
+    key = None
+    middleware = [ThreadPoolResolverMiddleware()]
+    tracer = None
+    if settings.GRAPHQL_TRACING:
+        # timed inside the resolver pool threads, where the resolvers & their queries run
+        tracer = request.graphql_tracer = OperationTracer()
+        middleware.insert(0, TracingMiddleware())
+    try:
+        document = view.backend.document_from_string(view.schema, query)
+        if request.method == 'GET' and document.get_operation_type(operation_name) != 'query':
+            raise HttpError(HttpResponseNotAllowed(['POST'], "Can only perform a query operation from a GET request."))
+        key, result = await sync_to_async(_cached_response, thread_sensitive=False,
+                                          executor=resolver_pool)(document, operation_name, variables)
+        if result is None:
+            result = await _execute_async(document, operation_name, variables, request, middleware)
+            if key and not result.errors and not result.invalid:
+                await sync_to_async(cache_response, thread_sensitive=False, executor=resolver_pool)(key, result)
+    except HttpError as error:
+        return _error_response(view, request, error)
+    except Exception as error:
+        result = ExecutionResult(errors=[error], invalid=True)
+
+    if tracer is not None:
+        tracer.finish()
+        result = _with_trace(result, tracer)
+    response = result_to_dict(view, result)
+    return HttpResponse(view.json_encode(request, response), status=400 if result.invalid else 200,
+                        content_type="application/json")
+
+
+# Django 3.2's csrf_exempt would hide the coroutine function from the handler
+async_graphql_view.csrf_exempt = True
+
+
+def _is_internal(request):
+    """
+    is the request from a client of GRAPHQL_METRICS_ALLOWED_IPS or a staff user?
+    """
+
+    if request.META.get('REMOTE_ADDR') in settings.GRAPHQL_METRICS_ALLOWED_IPS:
+        return True
+    user = authenticate_request(request)
+    return user is not None and user.is_staff
+
+
+def cache_stats(request):
+    """
+    hit & miss counters of the response cache, served like the metrics
+    """
+
+    if not _is_internal(request):
+        return HttpResponseForbidden()
+    return JsonResponse(response_cache_stats())
+
+
+def metrics(request):
+    """
+    GraphQL operation & resolver latency histograms, in the Prometheus text format. Served to the scrapers of
+    GRAPHQL_METRICS_ALLOWED_IPS & to staff users only
+    """
+
+    if not _is_internal(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4')
+
+
+def export_meetings(request):
+    """
+    stream the meetings of the logged in user as iCalendar, CSV or NDJSON, filtered by the `start` & `end` query
+    parameters, rows are read & written in chunks so memory stays flat whatever the number of meetings. Users
+    authenticate like private GraphQL requests, with the `token` header. Staff users can export the meetings
+    of any owner with the `owner` query parameter, like the export_meetings command
+    """
+
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = authenticate_request(request)
+    if user is None:
+        return HttpResponse("You must be logged in to export meetings", status=401)
+    owner = request.GET.get('owner')
+    if owner and not user.is_staff:
+        return HttpResponseForbidden("Only staff users can export the meetings of other owners")
+    export_format = request.GET.get('format', 'ics')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported format, expected one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        start_time = str_to_aware_datetime(request.GET['start']) if request.GET.get('start') else None
+        end_time = str_to_aware_datetime(request.GET['end']) if request.GET.get('end') else None
+    except GraphQLError as error:
+        return HttpResponseBadRequest(error.message)
+
+    content_type, lines = EXPORT_FORMATS[export_format]
+    rows = export_rows(owner=owner, start_time=start_time, end_time=end_time, created_by=None if owner else user)
+    response = StreamingHttpResponse(lines(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="meetings.{export_format}"'
+    return response
@@ -0,0 +1,622 @@
+import tracemalloc
+from random import Random
+from heapq import merge
+from threading import Barrier, Lock, Thread
+from time import perf_counter
+from datetime import datetime, time, timedelta
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.db.models import Q
+from django.test.utils import override_settings
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import RequestFactory
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.utils.dateparse import parse_datetime as django_parse_datetime
+
+from aniso8601 import parse_datetime as aniso8601_parse_datetime
+from graphql import validate
+from graphql.backend import GraphQLCoreBackend
+
+from meetings.models import Meeting
+from meetings.datetimes import parse_datetime, _parse
+from meetings.documents import ValidatedDocumentBackend
+from meetings.availability import availability, busy_intervals, free_gaps
+from meetings.schema import schema
+from meetings.projection import FIELD_COLUMNS, project_fields
+from meetings.schedule_cache import SCHEDULE_KEY
+from meetings.utils import owner_query
+
+from .datagen import seed_dataset, seed_meetings, seed_users
+
+BENCHMARKS = {}
+
+
+def benchmark(name, default_size):
+    """
+    register a benchmark under given name, it's called with the requested size & returns its results as a dict
+    """
+
+    def register(function):
+        BENCHMARKS[name] = (function, default_size)
+        return function
+    return register
+
+
+@contextmanager
+def throwaway_database():
+    """
+    run benchmarks against a freshly migrated test database, never against the configured one
+    """
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def stopwatch(results, name):
+    """
+    store the wall time of the block in results[name], in seconds
+    """
+
+    started = perf_counter()
+    yield
+    results[name] = perf_counter() - started
+
+
+def run_query(query, user=None, variables=None):
+    """
+    execute given GraphQL document in-process with a request logged in as given user, anonymous by default,
+    raising its first error
+    """
+
+    request = RequestFactory().post('/graphql')
+    request.user = user or AnonymousUser()
+    result = schema.execute(query, variables=variables, context_value=request)
+    if result.errors:
+        raise result.errors[0]
+    return result.data
+
+
+CREATE_MEETING = '''
+mutation($title: String, $startTime: AwareDateTime, $duration: Int) {
+  createUpdateMeeting(title: $title, startTime: $startTime, slotDurationInMinutes: $duration) { ok }
+}
+'''
+
+CREATE_SCHEDULE = '''
+mutation($startDate: String!, $endDate: String!) {
+  createSchedule(title: "Office hours", startDate: $startDate, endDate: $endDate,
+                 windows: ["09:00-17:00"], slotDurationInMinutes: 15) { created }
+}
+'''
+
+
+@benchmark('schedule', default_size=30)
+def schedule_vs_per_slot(size):
+    """
+    publish `size` days of 15 minutes slots between 09:00 & 17:00, once through createUpdateMeeting
+    per slot & once through a single createSchedule
+    """
+
+    results = {}
+    first_day = (timezone.now() + timedelta(days=1)).date()
+    last_day = first_day + timedelta(days=size - 1)
+    per_slot_user = get_user_model().objects.create(username='per-slot-host')
+    schedule_user = get_user_model().objects.create(username='schedule-host')
+
+    with stopwatch(results, 'per_slot_seconds'):
+        for day in range(size):
+            start_time = timezone.make_aware(datetime.combine(first_day + timedelta(days=day), time(9)))
+            for slot in range(32):
+                slot_start = start_time + slot * timedelta(minutes=15)
+                run_query(CREATE_MEETING, per_slot_user, {'title': 'Office hours', 'duration': 15,
+                                                        'startTime': slot_start.isoformat()})
+
+    with stopwatch(results, 'schedule_seconds'):
+        created = run_query(CREATE_SCHEDULE, schedule_user, {'startDate': first_day.isoformat(),
+                                                           'endDate': last_day.isoformat()})
+
+    results['slots'] = created['createSchedule']['created']
+    results['speedup'] = results['per_slot_seconds'] / results['schedule_seconds']
+    return results
+
+
+BOOKABLE_MEETINGS = '''
+query {
+  bookableMeetings(first: 50) { edges { node { id title startTime endTime owner } } }
+}
+'''
+
+
+def _median(samples):
+    return sorted(samples)[len(samples) // 2]
+
+
+def _percentile(samples, percent):
+    """
+    nearest-rank percentile of the samples
+    """
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))]
+
+
+@benchmark('bookable', default_size=1000000)
+def bookable_meetings_latency(size):
+    """
+    latency of the first bookableMeetings page while the table fills up with `size` historical
+    reserved meetings, it should stay flat thanks to the partial index on free meetings
+    """
+
+    results = {'checkpoints': []}
+    host = get_user_model().objects.create(username='busy-host')
+    now = timezone.now()
+    Meeting.objects.bulk_create([
+        Meeting(created_by=host, title='Free slot', start_time=now + timedelta(minutes=15 * (slot + 1)),
+                end_time=now + timedelta(minutes=15 * (slot + 2))) for slot in range(200)
+    ])
+
+    inserted = 0
+    for checkpoint in (size // 100, size // 10, size):
+        while inserted < checkpoint:
+            batch = min(10000, checkpoint - inserted)
+            Meeting.objects.bulk_create([
+                Meeting(created_by=host, title='Past slot', start_time=now - timedelta(minutes=15 * (row + 2)),
+                        end_time=now - timedelta(minutes=15 * (row + 1)), reserver_name='Guest',
+                        reserver_email='guest@example.com', reserved_at=now)
+                for row in range(inserted, inserted + batch)
+            ], batch_size=batch)
+            inserted += batch
+
+        samples = []
+        for _ in range(20):
+            started = perf_counter()
+            run_query(BOOKABLE_MEETINGS)
+            samples.append(perf_counter() - started)
+        results['checkpoints'].append({'historical_rows': inserted, 'median_ms': _median(samples) * 1000})
+
+    results['plan'] = Meeting.objects.filter(reserved_at=None, start_time__gte=now) \
+        .order_by('start_time', 'id')[:51].explain()
+    return results
+
+
+@benchmark('documents', default_size=2000)
+def document_cache_hits(size):
+    """
+    per request cost of turning a query into an executable document, parsing & validating it every time
+    like the default backend against a hit in the ValidatedDocumentBackend LRU
+    """
+
+    results = {}
+    core_backend = GraphQLCoreBackend()
+    cached_backend = ValidatedDocumentBackend(max_size=16)
+    cached_backend.document_from_string(schema, BOOKABLE_MEETINGS)
+
+    with stopwatch(results, 'parse_and_validate_seconds'):
+        for _ in range(size):
+            document = core_backend.document_from_string(schema, BOOKABLE_MEETINGS)
+            validate(schema, document.document_ast)
+
+    with stopwatch(results, 'cache_hit_seconds'):
+        for _ in range(size):
+            cached_backend.document_from_string(schema, BOOKABLE_MEETINGS)
+
+    results['parse_and_validate_us'] = results['parse_and_validate_seconds'] / size * 1e6
+    results['cache_hit_us'] = results['cache_hit_seconds'] / size * 1e6
+    results['speedup'] = results['parse_and_validate_seconds'] / results['cache_hit_seconds']
+    return results
+
+
+@benchmark('availability', default_size=100000)
+def availability_sweep(size):
+    """
+    free intervals of hosts owning `size` back to back 15 minutes slots with a free hour every day,
+    split between loading the meetings with one range query & sweeping them
+    """
+
+    results = {}
+    hosts = [get_user_model().objects.create(username=f'availability-host-{host}') for host in range(3)]
+    start_time = timezone.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    for host in hosts:
+        meetings, slot_start = [], start_time
+        for _ in range(size):
+            if slot_start.hour == 12:
+                slot_start += timedelta(hours=1)
+            meetings.append(Meeting(created_by=host, title='Busy', start_time=slot_start,
+                                    end_time=slot_start + timedelta(minutes=15)))
+            slot_start += timedelta(minutes=15)
+        Meeting.objects.bulk_create(meetings, batch_size=10000)
+    end_time = slot_start
+
+    with stopwatch(results, 'load_seconds'):
+        busy = busy_intervals([host.id for host in hosts], start_time, end_time)
+    with stopwatch(results, 'single_host_sweep_seconds'):
+        gaps = free_gaps(busy[hosts[0].id], start_time, end_time, timedelta(minutes=15))
+    with stopwatch(results, 'common_sweep_seconds'):
+        common_gaps = free_gaps(merge(*busy.values()), start_time, end_time, timedelta(minutes=15))
+    with stopwatch(results, 'single_host_total_seconds'):
+        availability(hosts[0].username, start_time, end_time, 15)
+
+    results.update({'meetings_per_host': size, 'hosts': len(hosts), 'free_intervals': len(gaps),
+                    'common_free_intervals': len(common_gaps)})
+    return results
+
+
+class QueryCounter:
+    """
+    execute_wrapper counting the SQL queries of the block
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def profile_field(query, user, variables, iterations):
+    """
+    run a GraphQL document `iterations` times, then once more under tracemalloc for its peak memory
+
+    :param variables: (callable) variables of the n-th run, so mutations never repeat themselves
+
+    :returns: (dict) latency percentiles in milliseconds, SQL queries per run & peak memory in KiB
+    """
+
+    latencies, queries = [], []
+    for run in range(iterations):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = perf_counter()
+            run_query(query, user, variables(run))
+            latencies.append((perf_counter() - started) * 1000)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        run_query(query, user, variables(iterations))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': _percentile(latencies, 50),
+        'p90_ms': _percentile(latencies, 90),
+        'p99_ms': _percentile(latencies, 99),
+        'max_ms': max(latencies),
+        'mean_ms': sum(latencies) / len(latencies),
+        'sql_queries': _median(queries),
+        'max_sql_queries': max(queries),
+        'peak_memory_kib': peak / 1024,
+    }
+
+
+MEETING_FIELDS = 'edges { node { id title startTime endTime meetingDuration owner } } pageInfo { hasNextPage }'
+FIELD_QUERIES = {
+    'allMeetings': f'query {{ allMeetings(first: 50) {{ {MEETING_FIELDS} }} }}',
+    'bookableMeetings': f'query {{ bookableMeetings(first: 50) {{ {MEETING_FIELDS} }} }}',
+    'meetingsByOwner': f'query($name: String) {{ meetingsByOwner(userName: $name, first: 50) {{ {MEETING_FIELDS} }} }}',
+    'myMeetings': f'query {{ myMeetings(first: 50) {{ {MEETING_FIELDS} }} }}',
+    'createUpdateMeeting': CREATE_MEETING,
+    'reserveMeeting': '''
+mutation($id: Int) {
+  reserveMeeting(meetingId: $id, reserverName: "Benchmark", reserverEmail: "bench@example.com") { ok }
+}
+''',
+    # deleteMeeting is disabled and deletes nothing, deletions are timed through batchMeetings
+    'batchMeetings (delete)': '''
+mutation($id: Int) {
+  batchMeetings(operations: [{action: DELETE, meetingId: $id}]) { ok }
+}
+''',
+}
+FIELD_ITERATIONS = 50
+
+
+@benchmark('fields', default_size=10000)
+def root_fields(size):
+    """
+    latency percentiles, SQL queries & peak memory of every root field, run in-process through the schema
+    against the fixtures plus `size` seeded meetings, 1 owner per 100 meetings up to 10k owners i.e
+    `--size 1000000` for 1M meetings across 10k users
+    """
+
+    call_command('loaddata', 'users', 'meetings', verbosity=0)
+    owners = seed_dataset(size)
+    host = owners[len(owners) // 2]
+    guest_host = get_user_model().objects.create(username='benchmark-host')
+
+    # targets of the mutations, far from the seeded meetings so none of them conflicts
+    first_slot = timezone.now().replace(second=0, microsecond=0) + timedelta(days=400)
+    free_slots = Meeting.objects.bulk_create([
+        Meeting(created_by=guest_host, title='Free slot', start_time=first_slot + timedelta(minutes=15 * slot),
+                end_time=first_slot + timedelta(minutes=15 * (slot + 1))) for slot in range(FIELD_ITERATIONS + 1)
+    ])
+    free_ids = [meeting.id for meeting in Meeting.objects.filter(created_by=guest_host).order_by('id')]
+    # meetings of the host to delete, one per run
+    deleted_slot = first_slot + timedelta(days=2)
+    Meeting.objects.bulk_create([
+        Meeting(created_by=host, title='Deleted slot', start_time=deleted_slot + timedelta(minutes=15 * slot),
+                end_time=deleted_slot + timedelta(minutes=15 * (slot + 1))) for slot in range(FIELD_ITERATIONS + 1)
+    ])
+    deleted_ids = list(Meeting.objects.filter(created_by=host, title='Deleted slot').order_by('id')
+                       .values_list('id', flat=True))
+
+    variables = {
+        'meetingsByOwner': lambda run: {'name': host.username},
+        'createUpdateMeeting': lambda run: {
+            'title': 'Benchmark', 'duration': 15,
+            'startTime': (first_slot + timedelta(days=1, minutes=15 * run)).isoformat()},
+        'reserveMeeting': lambda run: {'id': free_ids[run]},
+        'batchMeetings (delete)': lambda run: {'id': deleted_ids[run]},
+    }
+    results = {'meetings': Meeting.objects.count() - len(free_slots) - len(deleted_ids), 'users': len(owners),
+               'iterations': FIELD_ITERATIONS, 'fields': {}}
+    for name, query in FIELD_QUERIES.items():
+        user = None if name in ('allMeetings', 'bookableMeetings', 'meetingsByOwner', 'reserveMeeting') else host
+        results['fields'][name] = profile_field(query, user, variables.get(name, lambda run: None),
+                                                FIELD_ITERATIONS)
+    return results
+
+
+RESERVE_MEETING = '''
+mutation($id: Int) {
+  reserveMeeting(meetingId: $id, reserverName: "Guest", reserverEmail: "guest@example.com") { ok }
+}
+'''
+# SQLite as configured before the production profile: rollback journal & no write serialization
+LEGACY_SQLITE = {'SQLITE_PRAGMAS': {'journal_mode': 'delete', 'synchronous': 'full'}, 'SQLITE_SERIALIZE_WRITES': False}
+WRITER_THREADS = 8
+
+
+def _concurrent_writes(size, round_number):
+    """
+    WRITER_THREADS threads sharing `size` writes, each host creates meetings while guests reserve free ones
+
+    :returns: (dict) throughput & the number of writes failing on a locked database
+    """
+
+    now = timezone.now().replace(second=0, microsecond=0) + timedelta(days=30 * (round_number + 1))
+    hosts = [get_user_model().objects.create(username=f'writer-{round_number}-{thread}')
+             for thread in range(WRITER_THREADS)]
+    Meeting.objects.bulk_create([
+        Meeting(created_by=hosts[0], title='Free slot', start_time=now - timedelta(days=1, minutes=15 * (slot + 1)),
+                end_time=now - timedelta(days=1, minutes=15 * slot)) for slot in range(size)
+    ])
+    free_ids = list(Meeting.objects.filter(created_by=hosts[0], title='Free slot').values_list('id', flat=True))
+    connections.close_all()
+
+    outcomes = {'ok': 0, 'locked': 0, 'failed': 0}
+    outcomes_lock = Lock()
+    barrier = Barrier(WRITER_THREADS)
+
+    def count(outcome):
+        with outcomes_lock:
+            outcomes[outcome] += 1
+
+    def write(thread):
+        try:
+            barrier.wait()
+            for operation in range(thread, size, WRITER_THREADS):
+                try:
+                    if operation % 2:
+                        run_query(RESERVE_MEETING, variables={'id': free_ids[operation]})
+                    else:
+                        run_query(CREATE_MEETING, hosts[thread], {
+                            'title': 'Busy', 'duration': 15,
+                            'startTime': (now + timedelta(minutes=15 * operation)).isoformat()})
+                    count('ok')
+                except Exception as error:  # pylint: disable=broad-except
+                    count('locked' if 'locked' in str(error) else 'failed')
+        finally:
+            connection.close()
+
+    threads = [Thread(target=write, args=(thread,)) for thread in range(WRITER_THREADS)]
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - started
+    return dict(outcomes, seconds=elapsed, writes_per_second=outcomes['ok'] / elapsed)
+
+
+@benchmark('sqlite-writes', default_size=800)
+def sqlite_concurrent_writes(size):
+    """
+    `size` createUpdateMeeting & reserveMeeting calls spread over WRITER_THREADS threads, with the legacy
+    SQLite configuration then with the WAL pragmas & serialized writes of meetings.sqlite
+    """
+
+    results = {}
+    for round_number, (name, overrides) in enumerate((('legacy', LEGACY_SQLITE), ('profile', {}))):
+        with override_settings(**overrides):
+            connections.close_all()
+            results[name] = _concurrent_writes(size, round_number)
+    connections.close_all()
+    results['speedup'] = results['profile']['writes_per_second'] / results['legacy']['writes_per_second']
+    return results
+
+
+def _aware(date_time, zone):
+    return date_time if timezone.is_aware(date_time) else timezone.make_aware(date_time, zone)
+
+
+def _from_isoformat(value):
+    # Python 3.8's fromisoformat doesn't read the `Z` suffix
+    return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+
+
+@benchmark('datetimes', default_size=100000)
+def datetime_parsing(size):
+    """
+    parse `size` distinct ISO 8601 date times, shaped like a schedule import, with the fast path of
+    meetings.datetimes (cold, then with every value cached), fromisoformat, Django's parse_datetime & aniso8601.
+    Naive values are made aware in a time zone resolved once, like the importer does
+    """
+
+    first = datetime(2022, 6, 20, 9)
+    shapes = ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S+05:00', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S.%f-08:00')
+    values = [(first + timedelta(minutes=15 * index)).strftime(shapes[index % len(shapes)]) for index in range(size)]
+    zone = timezone.get_current_timezone()
+    parsers = {
+        'fast_path_cold': lambda value: parse_datetime(value, zone),
+        'fast_path_cached': lambda value: parse_datetime(value, zone),
+        'fromisoformat': lambda value: _aware(_from_isoformat(value), zone),
+        'django_dateparse': lambda value: _aware(django_parse_datetime(value), zone),
+        'aniso8601': lambda value: _aware(aniso8601_parse_datetime(value), zone),
+    }
+
+    results = {}
+    _parse.cache_clear()
+    for name, parser in parsers.items():
+        if name == 'fast_path_cached':
+            # the LRU only keeps the latest values, replay a chunk that fits in it
+            sample = values[:_parse.cache_info().maxsize] * (size // _parse.cache_info().maxsize or 1)
+            for value in sample[:_parse.cache_info().maxsize]:
+                parser(value)
+        else:
+            sample = values
+        with stopwatch(results, f'{name}_seconds'):
+            for value in sample:
+                parser(value)
+        results[f'{name}_us'] = results[f'{name}_seconds'] / len(sample) * 1e6
+    results['speedup_vs_aniso8601'] = results['aniso8601_us'] / results['fast_path_cold_us']
+    results['speedup_vs_fromisoformat'] = results['fromisoformat_us'] / results['fast_path_cold_us']
+    results['cached_speedup_vs_fromisoformat'] = results['fromisoformat_us'] / results['fast_path_cached_us']
+    return results
+
+
+def _legacy_owner_query(user_name):
+    return Q(created_by__username__iexact=user_name) | Q(created_by__first_name__iexact=user_name) | \
+        Q(created_by__last_name__iexact=user_name)
+
+
+@benchmark('owners', default_size=1000000)
+def owner_lookup(size):
+    """
+    meetingsByOwner filtering while the user table grows to `size` users, the case insensitive join across three
+    name columns against the owner key table seek followed by `created_by_id IN (...)`
+    """
+
+    rng = Random(2022)
+    owners = seed_users(100, rng, prefix='owner')
+    seed_meetings(owners, 10000, rng)
+    names = ['owner-00042', 'OWNER-00007', 'Sara', 'khan', 'nobody']
+    queries = {'legacy': _legacy_owner_query, 'owner_keys': owner_query}
+
+    results = {'checkpoints': []}
+    created = len(owners)
+    for checkpoint in (size // 100, size // 10, size):
+        if checkpoint > created:
+            seed_users(checkpoint - created, rng, prefix=f'crowd{checkpoint}')
+            created = checkpoint
+        checkpoint_results = {'users': created}
+        for name, query in queries.items():
+            samples = []
+            for _ in range(5):
+                for user_name in names:
+                    started = perf_counter()
+                    list(Meeting.objects.filter(query(user_name)).order_by('start_time', 'id')
+                         .values_list('id', flat=True)[:51])
+                    samples.append(perf_counter() - started)
+            checkpoint_results[f'{name}_median_ms'] = _median(samples) * 1000
+        results['checkpoints'].append(checkpoint_results)
+    results['plan'] = Meeting.objects.filter(owner_query('owner-00042')).order_by('start_time', 'id')[:51].explain()
+    return results
+
+
+PROJECTION_PAGE = 500
+PROJECTION_SELECTIONS = {
+    'id_start_time': {'id', 'startTime'},
+    'every_field': set(FIELD_COLUMNS),
+}
+
+
+def _read(rows, traced=False):
+    """
+    wall time of reading given listing rows in ms, or their peak memory in KiB when traced
+    """
+
+    if traced:
+        tracemalloc.start()
+    started = perf_counter()
+    rows = list(rows)
+    elapsed = perf_counter() - started
+    if not traced:
+        return elapsed * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+@benchmark('projection', default_size=100000)
+def projected_listings(size):
+    """
+    read allMeetings pages of PROJECTION_PAGE meetings as full model instances joined with their owner, like
+    the listings did, then projected on the selection as MeetingRow objects, over `size` seeded meetings.
+    The whole table is listed once per variant too, the memory a large export-like listing needs
+    """
+
+    seed_dataset(size)
+    listing = Meeting.objects.order_by('start_time', 'id')
+    variants = {'model_instances': lambda limit: listing.select_related('created_by')[:limit]}
+    for name, fields in PROJECTION_SELECTIONS.items():
+        variants[f'projected_{name}'] = lambda limit, fields=fields: project_fields(listing, fields)[:limit]
+
+    results = {'meetings': size, 'page_size': PROJECTION_PAGE}
+    for name, rows in variants.items():
+        results[name] = {
+            'page_median_ms': _median([_read(rows(PROJECTION_PAGE)) for _ in range(20)]),
+            'listing_ms': _read(rows(size)),
+            'listing_peak_kib': _read(rows(size), traced=True),
+        }
+    return results
+
+
+UPDATE_MEETING = '''
+mutation($id: Int, $startTime: AwareDateTime) {
+  createUpdateMeeting(title: "Moved", startTime: $startTime, slotDurationInMinutes: 15, meetingId: $id) { ok }
+}
+'''
+EDIT_ITERATIONS = 200
+
+
+@benchmark('edits', default_size=5000)
+def repeated_edits(size):
+    """
+    a host owning `size` meetings moves one of them back & forth EDIT_ITERATIONS times, with its schedule
+    reloaded before every edit (cold, as if every write invalidated it) then kept in the cache across edits
+    """
+
+    host = get_user_model().objects.create(username='editing-host')
+    first_slot = timezone.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    Meeting.objects.bulk_create([
+        Meeting(created_by=host, title='Busy', start_time=first_slot + timedelta(minutes=30 * slot),
+                end_time=first_slot + timedelta(minutes=30 * slot + 15)) for slot in range(size)
+    ], batch_size=10000)
+    meeting_id = Meeting.objects.filter(created_by=host).order_by('start_time').values_list('id', flat=True)[0]
+
+    results = {'meetings': size, 'edits': EDIT_ITERATIONS}
+    for name in ('cold', 'cached'):
+        counter, samples = QueryCounter(), []
+        with connection.execute_wrapper(counter):
+            for run in range(EDIT_ITERATIONS):
+                if name == 'cold':
+                    caches[settings.SCHEDULE_CACHE_ALIAS].delete(SCHEDULE_KEY.format(host.id))
+                started = perf_counter()
+                start_time = first_slot - timedelta(minutes=15 * (run % 2 + 1))
+                run_query(UPDATE_MEETING, host, {'id': meeting_id, 'startTime': start_time.isoformat()})
+                samples.append(perf_counter() - started)
+        results[name] = {'median_ms': _median(samples) * 1000, 'p95_ms': _percentile(samples, 95) * 1000,
+                         'queries_per_edit': counter.count / EDIT_ITERATIONS}
+    return results
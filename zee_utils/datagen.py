@@ -0,0 +1,97 @@
+from random import Random
+from datetime import timedelta
+
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from meetings.models import Meeting
+from meetings.owners import sync_owner_keys
+
+FIRST_NAMES = ('Ali', 'Sara', 'John', 'Jane', 'Omar', 'Fatima', 'Wei', 'Maria', 'Ivan', 'Aisha')
+LAST_NAMES = ('Khan', 'Doe', 'Smith', 'Garcia', 'Chen', 'Ivanova', 'Ahmed', 'Silva', 'Mori', 'Okafor')
+TITLES = ('Office hours', 'Interview', '1:1', 'Demo', 'Planning', 'Review', 'Mentoring', 'Support call')
+DURATIONS = tuple(duration for duration, _ in Meeting.SLOT_CHOICES)
+
+# share of meetings already reserved, before & after the time the data is generated at
+PAST_RESERVED_RATIO = 0.7
+FUTURE_RESERVED_RATIO = 0.2
+
+
+def seed_users(count, rng, prefix='user'):
+    """
+    create `count` users with random first & last names, they can't log in with a password
+
+    :param rng: (Random) seeded generator, the same seed always creates the same users
+
+    :returns: (list) created users, in username order
+    """
+
+    users = [
+        get_user_model()(username=f'{prefix}-{number:05d}', first_name=rng.choice(FIRST_NAMES),
+                         last_name=rng.choice(LAST_NAMES), email=f'{prefix}-{number:05d}@example.com',
+                         password=make_password(None))
+        for number in range(count)
+    ]
+    get_user_model().objects.bulk_create(users, batch_size=1000)
+    users = list(get_user_model().objects.filter(username__startswith=f'{prefix}-').order_by('username'))
+    # bulk_create sends no post_save, owner keys are written here
+    sync_owner_keys(users)
+    return users
+
+
+def _owner_meetings(owner, count, rng, now, history):
+    """
+    yield `count` non-overlapping meetings of one owner, starting `history` before now
+    """
+
+    start_time = now - history + timedelta(minutes=15 * rng.randrange(96))
+    for _ in range(count):
+        duration = rng.choice(DURATIONS)
+        end_time = start_time + timedelta(minutes=duration)
+        reserved = rng.random() < (PAST_RESERVED_RATIO if start_time < now else FUTURE_RESERVED_RATIO)
+        yield Meeting(created_by=owner, title=rng.choice(TITLES), start_time=start_time, end_time=end_time,
+                      slot_duration_in_minutes=duration,
+                      reserver_name=f'Guest {rng.randrange(10000)}' if reserved else None,
+                      reserver_email='guest@example.com' if reserved else None,
+                      reserved_at=min(start_time, now) if reserved else None)
+        start_time = end_time + timedelta(minutes=15 * rng.randrange(4))
+
+
+def seed_meetings(owners, count, rng, now=None, history=timedelta(days=180), batch_size=10000):
+    """
+    spread `count` meetings across given owners, back to back with random gaps, around `now`. Meetings are
+    inserted in batches so generating millions of them keeps a flat memory profile
+
+    :param owners: (list) users owning the meetings, each gets the same share give or take one
+    :param rng: (Random) seeded generator, the same seed always creates the same meetings
+
+    :returns: (int) number of created meetings
+    """
+
+    now = now or timezone.now().replace(second=0, microsecond=0)
+    per_owner, remainder = divmod(count, len(owners))
+    batch = []
+    for index, owner in enumerate(owners):
+        for meeting in _owner_meetings(owner, per_owner + (index < remainder), rng, now, history):
+            batch.append(meeting)
+            if len(batch) == batch_size:
+                Meeting.objects.bulk_create(batch, batch_size=batch_size)
+                batch = []
+    Meeting.objects.bulk_create(batch, batch_size=batch_size)
+    return count
+
+
+def seed_dataset(meetings, users=None, seed=2022):
+    """
+    create a reproducible dataset of `meetings` meetings, owned by `users` users, 1 per 100 meetings
+    by default, at most 10k
+
+    :returns: (list) the owners
+    """
+
+    rng = Random(seed)
+    users = users or min(10000, max(1, meetings // 100))
+    owners = seed_users(users, rng)
+    seed_meetings(owners, meetings, rng)
+    return owners
@@ -0,0 +1,39 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meetings.archive import archive_meetings, retention_horizon
+from meetings.constants import ARCHIVE_BATCH_SIZE
+from meetings.replicas import use_primary
+
+
+class Command(BaseCommand):
+    help = "Move finished meetings older than the retention horizon to the archive table or a compressed NDJSON " \
+           "file, once or every --every seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help="Archive meetings ended more than given days ago, MEETING_RETENTION_DAYS by default")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help="Meetings moved per transaction")
+        parser.add_argument('--file', help="Append the meetings to this gzip compressed NDJSON file instead of the "
+                                           "archive table, they can't be read back with includeArchived")
+        parser.add_argument('--every', type=int, help="Keep running, archiving every given seconds")
+
+    def progress(self, archived):
+        self.stderr.write(f"{archived} meetings archived")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("Batch size should be a positive number")
+        progress = self.progress if options['verbosity'] > 1 else None
+        while True:
+            # the batches are read on the primary, a lagging replica could hand back meetings already moved
+            with use_primary():
+                archived = archive_meetings(retention_horizon(options['days']), options['batch_size'],
+                                            options['file'], progress)
+            if archived or options['verbosity'] > 1:
+                self.stdout.write(f"Archived {archived} meetings")
+            if not options['every']:
+                return
+            sleep(options['every'])
@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from zee_utils.benchmarks import BENCHMARKS, throwaway_database
+
+
+class Command(BaseCommand):
+    help = "Run a benchmark against a throwaway database & print its results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS))
+        parser.add_argument('--size', type=int, help="Scale of the benchmark, meaning depends on the benchmark")
+        parser.add_argument('--output', help="Also write the results to this JSON file, to compare commits")
+
+    def handle(self, *args, **options):
+        function, default_size = BENCHMARKS[options['name']]
+        with throwaway_database():
+            results = function(options['size'] or default_size)
+        self.stdout.write(json.dumps(results, indent=2))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump({'benchmark': options['name'], 'size': options['size'] or default_size,
+                           'results': results}, output, indent=2)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from graphql import GraphQLError
+
+from meetings.utils import str_to_aware_datetime
+from meetings.export import EXPORT_FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream meetings as iCalendar, CSV or NDJSON, to stdout or a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ics')
+        parser.add_argument('--owner', help="Only the meetings of this user, by username, first or last name")
+        parser.add_argument('--start', help="Only the meetings ending after this date time, ISO 8601")
+        parser.add_argument('--end', help="Only the meetings starting before this date time, ISO 8601")
+        parser.add_argument('--output', help="File to write to, stdout by default")
+
+    def handle(self, *args, **options):
+        try:
+            start_time = str_to_aware_datetime(options['start']) if options['start'] else None
+            end_time = str_to_aware_datetime(options['end']) if options['end'] else None
+        except GraphQLError as error:
+            raise CommandError(error.message) from error
+
+        _, lines = EXPORT_FORMATS[options['format']]
+        rows = export_rows(options['owner'], start_time, end_time)
+        if not options['output']:
+            for line in lines(rows):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(lines(rows))
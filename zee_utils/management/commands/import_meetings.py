@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meetings.constants import IMPORT_BATCH_SIZE
+from meetings.importer import READERS, MeetingImporter
+from meetings.replicas import use_primary
+
+
+class Command(BaseCommand):
+    help = "Import meetings from a CSV, NDJSON or iCalendar file, streamed & inserted in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, the format is read from its extension by default")
+        parser.add_argument('--format', choices=sorted(READERS))
+        parser.add_argument('--owner', help="Username owning the rows without an owner")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-copy', action='store_true', help="Use bulk_create even on PostgreSQL")
+
+    def progress(self, importer):
+        report = importer.report()
+        self.stderr.write(f"{report['imported']} rows imported, {report['rows_per_second']:.0f} rows/s")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        import_format = options['format'] or path.suffix.lstrip('.').lower()
+        if import_format not in READERS:
+            raise CommandError(f"Unknown format {import_format}, expected one of: {', '.join(sorted(READERS))}")
+        if options['batch_size'] < 1:
+            raise CommandError("Batch size should be a positive number")
+
+        importer = MeetingImporter(options['batch_size'], options['owner'], False if options['no_copy'] else None)
+        # overlaps are checked against the primary, a lagging replica could miss meetings
+        with use_primary(), path.open(encoding='utf-8', newline='') as lines:
+            report = importer.run(READERS[import_format](lines), self.progress if options['verbosity'] > 1 else None)
+        self.stdout.write(json.dumps(report, indent=2))
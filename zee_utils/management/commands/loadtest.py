@@ -0,0 +1,74 @@
+import json
+from time import perf_counter
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_QUERY = '''
+query {
+  allMeetings(first: 20) { edges { node { id title startTime endTime owner } } }
+  bookableMeetings(first: 20) { edges { node { id title startTime } } }
+}
+'''
+
+
+def _percentile(samples, percentile):
+    return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+
+def _client(url, body, requests):
+    """
+    send `requests` POSTs over one keep-alive connection, returns their latencies & the failed count
+    """
+
+    parts = urlsplit(url)
+    connection = HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    latencies, failures = [], 0
+    for _ in range(requests):
+        started = perf_counter()
+        try:
+            connection.request('POST', parts.path, body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            failures += response.status != 200
+        except OSError:
+            failures += 1
+            connection.close()
+        latencies.append(perf_counter() - started)
+    connection.close()
+    return latencies, failures
+
+
+class Command(BaseCommand):
+    help = "Load test running GraphQL endpoints, i.e the WSGI /graphql against the ASGI /graphql-async, " \
+           "with a fixed number of concurrent clients & print requests per second and latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True,
+                            help="Endpoint to test, repeat to compare, i.e http://127.0.0.1:8000/graphql")
+        parser.add_argument('--concurrency', type=int, default=32, help="Number of concurrent clients")
+        parser.add_argument('--requests', type=int, default=100, help="Requests sent by every client")
+        parser.add_argument('--query', default=DEFAULT_QUERY)
+
+    def handle(self, *args, **options):
+        body = json.dumps({'query': options['query']})
+        concurrency, requests = options['concurrency'], options['requests']
+        results = {}
+        for url in options['url']:
+            started = perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(partial(_client, url, body), [requests] * concurrency))
+            elapsed = perf_counter() - started
+
+            latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+            results[url] = {
+                'requests': len(latencies),
+                'failures': sum(failures for _, failures in outcomes),
+                'requests_per_second': len(latencies) / elapsed,
+                'p50_ms': _percentile(latencies, 50) * 1000,
+                'p99_ms': _percentile(latencies, 99) * 1000,
+            }
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,22 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from meetings.utils import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release the expired meeting holds, once or every --every seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, help="Keep running, releasing expired holds every given seconds")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Holds deleted per query")
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_holds(options['batch_size'])
+            if released or options['verbosity'] > 1:
+                self.stdout.write(f"Released {released} expired holds")
+            if not options['every']:
+                return
+            sleep(options['every'])